@@ -1,7 +1,9 @@
 using System;
 using System.Collections.Generic;
+using System.Globalization;
 using System.IO;
 using System.Linq;
+using System.Web.Script.Serialization;
 using Autodesk.Revit.DB;
 using Autodesk.Revit.ApplicationServices;
 using Autodesk.Revit.UI;
@@ -18,7 +20,16 @@ namespace RevitViewExporter
                 string viewName = Environment.GetEnvironmentVariable("RVE_VIEW");
                 string outDir = Environment.GetEnvironmentVariable("RVE_OUT");
 
-                if (string.IsNullOrWhiteSpace(rvtPath) || string.IsNullOrWhiteSpace(viewName) || string.IsNullOrWhiteSpace(outDir))
+                // Optional view-selection manifest (views.json from the workitem's viewSelection argument)
+                string manifestPath = Environment.GetEnvironmentVariable("RVE_VIEWS");
+                if (string.IsNullOrWhiteSpace(manifestPath) && File.Exists("views.json")) manifestPath = "views.json";
+                ViewSelection selection = ViewSelection.Load(manifestPath);
+
+                // In Design Automation the engine opens the model and DA zips the "outputs"
+                // folder (PNGs, annotation JSONs, log) into the workitem's outputBundle argument
+                if (selection != null && string.IsNullOrWhiteSpace(outDir)) outDir = "outputs";
+
+                if ((string.IsNullOrWhiteSpace(rvtPath) && selection == null) || string.IsNullOrWhiteSpace(outDir) || (string.IsNullOrWhiteSpace(viewName) && selection == null))
                 {
                     return ExternalDBApplicationResult.Succeeded;
                 }
@@ -30,7 +41,10 @@ namespace RevitViewExporter
                 {
                     try
                     {
-                        ExecuteHeadless(args.Document, viewName, outDir);
+                        if (selection != null)
+                            ExecuteSelection(args.Document, selection, outDir);
+                        else
+                            ExecuteHeadless(args.Document, viewName, outDir);
                     }
                     catch (Exception ex)
                     {
@@ -49,6 +63,32 @@ namespace RevitViewExporter
             return Autodesk.Revit.DB.ExternalDBApplicationResult.Succeeded;
         }
 
+        private void ExecuteSelection(Document doc, ViewSelection selection, string exportFolder)
+        {
+            // Export every selected view while the model is open once
+            List<View> views = new FilteredElementCollector(doc)
+                .OfClass(typeof(View))
+                .Cast<View>()
+                .Where(v => !v.IsTemplate && selection.Matches(v))
+                .ToList();
+
+            var log = new List<string>();
+            foreach (View view in views)
+            {
+                try
+                {
+                    ExportView(doc, view, exportFolder);
+                    log.Add($"Exported: {view.Id} {view.Name}");
+                }
+                catch (Exception ex)
+                {
+                    log.Add($"Failed: {view.Id} {view.Name}: {ex.Message}");
+                }
+            }
+            log.Add($"Selected {views.Count} view(s) from {selection.Count} manifest entries");
+            File.WriteAllLines(Path.Combine(exportFolder, "headless_log.txt"), log);
+        }
+
         private void ExecuteHeadless(Document doc, string viewName, string exportFolder)
         {
             // Find view by name
@@ -63,6 +103,11 @@ namespace RevitViewExporter
                 return;
             }
 
+            ExportView(doc, target, exportFolder);
+        }
+
+        private void ExportView(Document doc, View target, string exportFolder)
+        {
             // Reuse existing ExportViewsCommand logic by calling private methods is not possible.
             // Implement minimal export here.
             ImageExportOptions options = new ImageExportOptions
@@ -132,6 +177,38 @@ namespace RevitViewExporter
             }
         }
 
+        // Reader for {"viewIds": [...], "viewNames": [...]} written by scripts/view_selection.py
+        private class ViewSelection
+        {
+            private readonly HashSet<string> _ids = new HashSet<string>();
+            private readonly HashSet<string> _names = new HashSet<string>(StringComparer.OrdinalIgnoreCase);
+
+            public int Count => _ids.Count + _names.Count;
+
+            public static ViewSelection Load(string path)
+            {
+                if (string.IsNullOrWhiteSpace(path) || !File.Exists(path)) return null;
+                var manifest = new JavaScriptSerializer().DeserializeObject(File.ReadAllText(path)) as Dictionary<string, object>;
+                if (manifest == null) return null;
+                var selection = new ViewSelection();
+                foreach (string id in ReadArray(manifest, "viewIds")) selection._ids.Add(id);
+                foreach (string name in ReadArray(manifest, "viewNames")) selection._names.Add(name);
+                return selection;
+            }
+
+            public bool Matches(View view) => _ids.Contains(view.Id.ToString()) || _names.Contains(view.Name);
+
+            // View ids may be written as numbers or strings
+            private static IEnumerable<string> ReadArray(Dictionary<string, object> manifest, string key)
+            {
+                if (!manifest.TryGetValue(key, out object value) || !(value is object[] items)) yield break;
+                foreach (object item in items)
+                {
+                    if (item != null) yield return Convert.ToString(item, CultureInfo.InvariantCulture);
+                }
+            }
+        }
+
         private static string Escape(string s) => string.IsNullOrEmpty(s) ? string.Empty : s.Replace("\\", "\\\\").Replace("\"", "\\\"");
         private static T Safe<T>(Func<T> f) { try { return f(); } catch { return default(T); } }
         private static string SanitizeFileName(string fileName)
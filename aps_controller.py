@@ -5,18 +5,24 @@ Uploads bundle, creates activity, and runs workitem to extract view from Revit f
 """
 
 import os
+import sys
 import json
 import time
 import requests
 import zipfile
 from config import *
 
+# Signed URLs come from the scripts' broker (batch issuance, cached, prefetched)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from signed_urls import broker
+
 class APSController:
     def __init__(self):
         self.access_token = None
         self.bucket_key = f"revit-view-extractor-{int(time.time())}"
         self.app_bundle_id = "RevitViewExtractor"
         self.activity_id = "ExtractViewActivity"
+        self.output_upload_key = None
         
     def authenticate(self):
         """Get access token from APS"""
@@ -157,6 +163,12 @@ class APSController:
                     'verb': 'put',
                     'description': 'Output image file',
                     'localName': 'extracted_view.png'
+                },
+                'viewSelection': {
+                    'verb': 'get',
+                    'description': 'JSON manifest of view ids/names to export',
+                    'localName': 'views.json',
+                    'required': False
                 }
             },
             'engine': 'Autodesk.Revit+2024',
@@ -193,42 +205,33 @@ class APSController:
         """Run workitem to process the Revit file"""
         print("Running workitem...")
         
+        # Sign the output upload in the background while the input uploads
+        broker.prefetch(self.access_token, self.bucket_key, ["output.png"], upload=True)
+        
         # Upload input file
         input_upload = self.upload_file(input_file_path, "input.rvt")
         if not input_upload:
             return None
         
-        # Get signed URLs for input and output
         headers = {
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
         
-        # Get signed URL for input
-        input_url_response = requests.post(
-            f"{UPLOAD_URL}/{self.bucket_key}/objects/input.rvt/signed",
-            headers=headers,
-            json={'access': 'read'}
-        )
-        
-        if input_url_response.status_code != 200:
+        # Signed URLs for input and output: one batch request each, the upload one already in flight
+        broker.invalidate(self.bucket_key, "input.rvt")
+        input_signed_url = broker.download_url(self.access_token, self.bucket_key, "input.rvt")
+        if not input_signed_url:
             print("✗ Failed to get input signed URL")
             return None
         
-        input_signed_url = input_url_response.json()['signedUrl']
-        
-        # Get signed URL for output
-        output_url_response = requests.post(
-            f"{UPLOAD_URL}/{self.bucket_key}/objects/output.png/signed",
-            headers=headers,
-            json={'access': 'readwrite'}
-        )
-        
-        if output_url_response.status_code != 200:
+        output_upload = broker.upload_urls(self.access_token, self.bucket_key, ["output.png"]).get("output.png")
+        if not output_upload:
             print("✗ Failed to get output signed URL")
             return None
         
-        output_signed_url = output_url_response.json()['signedUrl']
+        output_signed_url = output_upload['urls'][0]
+        self.output_upload_key = output_upload['uploadKey']
         
         # Create workitem
         workitem_data = {
@@ -285,6 +288,8 @@ class APSController:
                 
                 if status == 'success':
                     print("✓ Workitem completed successfully")
+                    if not self.complete_output_upload():
+                        return None
                     return self.download_result()
                 elif status == 'failed':
                     print("✗ Workitem failed")
@@ -304,6 +309,25 @@ class APSController:
         print("✗ Workitem timed out")
         return None
     
+    def complete_output_upload(self):
+        """Turn the S3 upload DA made through the signed URL into the output object"""
+        headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
+        
+        response = requests.post(
+            f"{UPLOAD_URL}/{self.bucket_key}/objects/output.png/signeds3upload",
+            headers=headers,
+            json={'uploadKey': self.output_upload_key}
+        )
+        
+        if response.status_code == 200:
+            return True
+        else:
+            print(f"✗ Failed to complete output upload: {response.status_code} - {response.text}")
+            return False
+    
     def download_result(self):
         """Download the result image"""
         print("Downloading result image...")
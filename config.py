@@ -1,3 +1,5 @@
+import os
+
 # APS Configuration
 CLIENT_ID = "rfZQOaSWaILCGB3wRheGj994IH1qCoy9f0tZiPrGs117K48n"
 CLIENT_SECRET = "FRAmVrbnXcyp72GUcgmwANOk3lnil0ELRJGmPCzgebvr8DVEnGaNmk1b2ed9Gatq"
@@ -9,7 +11,8 @@ RVT_FILE_PATH = "100.rvt"
 OUTPUT_DIR = "output"
 
 # APS API endpoints
-APS_BASE_URL = "https://developer.api.autodesk.com"
+# Set APS_BASE_URL (e.g. http://127.0.0.1:8765 from scripts/mock_aps.py) to run offline
+APS_BASE_URL = os.environ.get("APS_BASE_URL", "https://developer.api.autodesk.com")
 AUTH_URL = f"{APS_BASE_URL}/authentication/v2/token"
 BUCKET_URL = f"{APS_BASE_URL}/oss/v2/buckets"
 UPLOAD_URL = f"{APS_BASE_URL}/oss/v2/buckets"
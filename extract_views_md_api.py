@@ -15,6 +15,9 @@ import sys
 CLIENT_ID = "rfZQOaSWaILCGB3wRheGj994IH1qCoy9f0tZiPrGs117K48n"
 CLIENT_SECRET = "FRAmVrbnXcyp72GUcgmwANOk3lnil0ELRJGmPCzgebvr8DVEnGaNmk1b2ed9Gatq"
 
+# Override to run against a local APS stand-in (scripts/mock_aps.py)
+APS_BASE_URL = os.environ.get("APS_BASE_URL", "https://developer.api.autodesk.com")
+
 def log(message):
     """Print with timestamp and flush immediately"""
     timestamp = time.strftime("%H:%M:%S", time.localtime())
@@ -23,7 +26,7 @@ def log(message):
 def get_access_token():
     """Get 2-legged OAuth token"""
     log("🔑 Getting access token...")
-    url = "https://developer.api.autodesk.com/authentication/v2/token"
+    url = f"{APS_BASE_URL}/authentication/v2/token"
     data = {
         "client_id": CLIENT_ID,
         "client_secret": CLIENT_SECRET,
@@ -46,7 +49,7 @@ def create_bucket(token):
     bucket_name = f"revitviews{int(time.time())}"
     log(f"🪣 Creating bucket: {bucket_name}")
     
-    url = "https://developer.api.autodesk.com/oss/v2/buckets"
+    url = f"{APS_BASE_URL}/oss/v2/buckets"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
@@ -74,7 +77,7 @@ def upload_file_signed(token, bucket_name, file_path):
     log(f"File size: {file_size} bytes")
     
     # Get signed URL
-    url = f"https://developer.api.autodesk.com/oss/v2/buckets/{bucket_name}/objects/{file_name}/signeds3upload"
+    url = f"{APS_BASE_URL}/oss/v2/buckets/{bucket_name}/objects/{file_name}/signeds3upload"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
@@ -97,7 +100,7 @@ def upload_file_signed(token, bucket_name, file_path):
         
         if upload_response.status_code == 200:
             # Complete the upload
-            complete_url = f"https://developer.api.autodesk.com/oss/v2/buckets/{bucket_name}/objects/{file_name}/signeds3upload"
+            complete_url = f"{APS_BASE_URL}/oss/v2/buckets/{bucket_name}/objects/{file_name}/signeds3upload"
             complete_data = {"uploadKey": upload_key}
             
             complete_response = requests.post(complete_url, headers=headers, json=complete_data)
@@ -125,7 +128,7 @@ def start_translation(token, urn):
     """Start Model Derivative translation to extract metadata"""
     log(f"🔄 Starting translation for URN: {urn}")
     
-    url = "https://developer.api.autodesk.com/modelderivative/v2/designdata/job"
+    url = f"{APS_BASE_URL}/modelderivative/v2/designdata/job"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
@@ -160,7 +163,7 @@ def wait_for_translation(token, urn, max_wait_minutes=10):
     """Wait for translation to complete"""
     log(f"⏳ Waiting for translation to complete (up to {max_wait_minutes} minutes)...")
     
-    url = f"https://developer.api.autodesk.com/modelderivative/v2/designdata/{urn}/manifest"
+    url = f"{APS_BASE_URL}/modelderivative/v2/designdata/{urn}/manifest"
     headers = {"Authorization": f"Bearer {token}"}
     
     start_time = time.time()
@@ -201,7 +204,7 @@ def get_metadata(token, urn):
     """Get metadata from translated model"""
     log(f"📊 Getting metadata...")
     
-    url = f"https://developer.api.autodesk.com/modelderivative/v2/designdata/{urn}/metadata"
+    url = f"{APS_BASE_URL}/modelderivative/v2/designdata/{urn}/metadata"
     headers = {"Authorization": f"Bearer {token}"}
     
     response = requests.get(url, headers=headers)
@@ -219,7 +222,7 @@ def get_model_views(token, urn, guid):
     log(f"🔍 Getting model views for GUID: {guid}")
     
     # Get properties
-    url = f"https://developer.api.autodesk.com/modelderivative/v2/designdata/{urn}/metadata/{guid}/properties"
+    url = f"{APS_BASE_URL}/modelderivative/v2/designdata/{urn}/metadata/{guid}/properties"
     headers = {"Authorization": f"Bearer {token}"}
     
     response = requests.get(url, headers=headers)
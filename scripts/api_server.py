@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - HTTP API Service
+
+Small asyncio HTTP service in front of the extraction pipeline, so other
+services can list and export views without shelling out to list_views.py:
+
+- POST /jobs?filename=100.rvt[&type=FloorPlan][&exportable=true]
+      Body: the RVT file, streamed to disk (Content-Length or chunked).
+      202 {"id": ..., "status": "queued"}; 429 with Retry-After when the job
+      queue is full (checked before the upload is read); 413 when too large.
+- GET  /jobs/{id}                 Job status
+- GET  /jobs/{id}/views           Views JSON (202 while the job is not done)
+- GET  /jobs/{id}/image?view=NAME[&format=png]
+      Exported view image, streamed
+- POST /jobs/{id}/overlay?view=NAME
+      Body: annotations JSON; the exported image with the boxes drawn on it
+- GET  /health                    Queue depth, running jobs and capacity
+
+While the pipeline still falls back to placeholders (list_views.MOCK_VIEWS,
+export_view's mock export files), they are not served as results: the job
+is marked "mock" and /views, /image and /overlay answer 501.
+
+The event loop only parses requests and streams bodies. Pipeline calls
+(upload, workitem, polling, export, overlay) are blocking and run on a
+bounded thread pool, so dozens of clients can poll and download while jobs
+run. Jobs and their files live under --data-dir until the service stops.
+
+Usage:
+    python api_server.py [options]
+
+Options:
+    --host HOST        Interface to listen on (default: 127.0.0.1)
+    --port N           Port to listen on (default: 8080)
+    --workers N        Jobs processed concurrently (default: 4)
+    --queue-size N     Jobs waiting before submissions get 429 (default: 16)
+    --max-upload MB    Largest accepted RVT upload (default: 2048)
+    --data-dir DIR     Where uploads and outputs are kept (default: temporary)
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+CHUNK_SIZE = 256 * 1024
+RETRY_AFTER = 30  # seconds suggested to clients when the queue is full
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 411: "Length Required", 413: "Payload Too Large", 429: "Too Many Requests",
+           500: "Internal Server Error", 501: "Not Implemented"}
+CONTENT_TYPES = {"png": "image/png", "jpg": "image/jpeg", "pdf": "application/pdf"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Request:
+    def __init__(self, method: str, target: str, headers: Dict[str, str], reader: asyncio.StreamReader):
+        url = urlsplit(target)
+        self.method = method
+        self.path = unquote(url.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.headers = headers
+        self.reader = reader
+
+    async def body_chunks(self, limit: int):
+        """Yield the request body in chunks; HTTPError 413 past `limit` bytes"""
+        received = 0
+        if "chunked" in self.headers.get("transfer-encoding", "").lower():
+            while True:
+                line = (await self.reader.readline()).split(b";")[0].strip()
+                try:
+                    size = int(line or b"0", 16)
+                except ValueError:
+                    raise HTTPError(400, "Malformed chunk size")
+                if size == 0:
+                    await self.reader.readline()  # Trailer terminator
+                    return
+                received += size
+                if received > limit:
+                    raise HTTPError(413, f"Body larger than {limit} bytes")
+                yield await self.reader.readexactly(size)
+                await self.reader.readline()
+        else:
+            remaining = int(self.headers.get("content-length", "0"))
+            if remaining > limit:
+                raise HTTPError(413, f"Body larger than {limit} bytes")
+            while remaining:
+                chunk = await self.reader.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise HTTPError(400, "Body ended early")
+                remaining -= len(chunk)
+                yield chunk
+
+    async def json(self, limit: int = 16 * 1024 * 1024) -> Any:
+        data = b"".join([chunk async for chunk in self.body_chunks(limit)])
+        try:
+            return json.loads(data.decode("utf-8-sig"))
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return Request(method.upper(), target, headers, reader)
+
+
+async def send_response(writer: asyncio.StreamWriter, status: int, body: bytes = b"",
+                        content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+    head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}", "Connection: close"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+    await send_response(writer, status, json.dumps(payload, default=str).encode("utf-8"), headers=headers)
+
+
+async def send_file(writer: asyncio.StreamWriter, path: str, content_type: str):
+    """Stream a file without reading it into memory"""
+    size = os.path.getsize(path)
+    head = ["HTTP/1.1 200 OK", f"Content-Type: {content_type}", f"Content-Length: {size}", "Connection: close",
+            f'Content-Disposition: inline; filename="{os.path.basename(path)}"']
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^\w.\- ]", "_", os.path.basename(name or "")).strip() or "upload.rvt"
+
+
+class Job:
+    def __init__(self, job_id: str, file_path: str, view_type: Optional[str], exportable: Optional[bool]):
+        self.id = job_id
+        self.file_path = file_path
+        self.view_type = view_type
+        self.exportable = exportable
+        self.status = "queued"
+        self.error = None
+        self.views = None
+        self.mock = False  # the pipeline returned placeholder data
+        self.exports: Dict[str, str] = {}
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def directory(self) -> str:
+        return os.path.dirname(self.file_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "file": os.path.basename(self.file_path),
+            "size": os.path.getsize(self.file_path) if os.path.exists(self.file_path) else None,
+            "type": self.view_type,
+            "exportable": self.exportable,
+            "views": len(self.views) if self.views is not None else None,
+            "mock": self.mock,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+
+
+# Pipeline steps; blocking, run on the worker pool
+
+def list_job_views(job: Job):
+    """Upload the job's file, run the extraction workitem and return its views"""
+    import list_views
+    views = list_views.process_revit_file(job.file_path, job.view_type, job.exportable)
+    job.mock = views is list_views.MOCK_VIEWS
+    return views
+
+
+def is_mock_export(path: str) -> bool:
+    """True for the placeholder files export_view writes instead of real exports"""
+    import export_view
+    header = export_view.MOCK_EXPORT_HEADER.encode("utf-8")
+    with open(path, "rb") as f:
+        return f.read(len(header)) == header
+
+
+def export_job_view(job: Job, view_name: str, format: str) -> str:
+    import export_view
+    output_path = os.path.join(job.directory, "exports", f"{_safe_name(view_name)}.{format}")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    paths = export_view.export_view(job.file_path, view_name, job.view_type, output_path, format)
+    return paths[0] if paths else None
+
+
+def render_overlay(json_path: str, image_path: str, out_path: str) -> str:
+    import overlay_boxes
+    return overlay_boxes.overlay_boxes(json_path, image_path, out_path)
+
+
+def _call(fn, *args):
+    """Run a pipeline step, turning the scripts' sys.exit() into an exception"""
+    try:
+        return fn(*args)
+    except SystemExit as exc:
+        raise RuntimeError(f"{fn.__name__} exited with {exc.code}")
+
+
+class ApiService:
+    def __init__(self, data_dir: str, workers: int = 4, queue_size: int = 16, max_upload: int = 2048 * 1024 * 1024):
+        self.data_dir = data_dir
+        self.workers = workers
+        self.max_upload = max_upload
+        self.jobs: Dict[str, Job] = {}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # One thread per job worker, plus threads for exports and overlays
+        self.executor = ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="rve-api")
+        self.running = 0
+        self._export_locks: Dict[tuple, asyncio.Lock] = {}
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started = time.time()
+            self.running += 1
+            try:
+                views = await loop.run_in_executor(self.executor, _call, list_job_views, job)
+                if views is None:
+                    job.status, job.error = "failed", "No view data retrieved"
+                else:
+                    job.status, job.views = "done", views
+            except Exception as exc:
+                job.status, job.error = "failed", str(exc)
+            finally:
+                job.finished = time.time()
+                self.running -= 1
+                self.queue.task_done()
+
+    def _job(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if not job:
+            raise HTTPError(404, f"No job {job_id}")
+        return job
+
+    async def _exported_image(self, job: Job, view_name: str, format: str) -> str:
+        """Export a view once per job, even when several clients ask at the same time"""
+        key = (job.id, view_name, format)
+        lock = self._export_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                path = job.exports.get(f"{view_name}.{format}")
+                if not path or not os.path.exists(path):
+                    loop = asyncio.get_running_loop()
+                    try:
+                        path = await loop.run_in_executor(self.executor, _call, export_job_view, job, view_name,
+                                                          format)
+                    except Exception as exc:
+                        raise HTTPError(500, f"Export failed: {exc}")
+                    if not path:
+                        raise HTTPError(500, f"Export of view '{view_name}' failed")
+                    job.exports[f"{view_name}.{format}"] = path
+        finally:
+            # Later requests find the file in job.exports; only current waiters need this lock
+            if self._export_locks.get(key) is lock:
+                del self._export_locks[key]
+        if is_mock_export(path):
+            raise HTTPError(501, "View export is not implemented yet; the pipeline wrote a placeholder file")
+        return path
+
+    # Handlers
+
+    async def on_health(self, request, writer):
+        await send_json(writer, 200, {
+            "queued": self.queue.qsize(),
+            "running": self.running,
+            "workers": self.workers,
+            "capacity": self.queue.maxsize,
+            "jobs": len(self.jobs)
+        })
+
+    async def on_submit(self, request, writer):
+        # Refuse before reading the upload, so a full service costs clients nothing
+        if self.queue.full():
+            raise HTTPError(429, "Job queue is full", {"Retry-After": str(RETRY_AFTER)})
+        if "content-length" not in request.headers and "transfer-encoding" not in request.headers:
+            raise HTTPError(411, "Send the RVT file as the request body")
+
+        # Clients sending "Expect: 100-continue" upload only once accepted
+        if request.headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.data_dir, job_id)
+        os.makedirs(job_dir)
+        file_path = os.path.join(job_dir, _safe_name(request.query.get("filename") or request.headers.get("x-filename")))
+        try:
+            with open(file_path, "wb") as f:
+                async for chunk in request.body_chunks(self.max_upload):
+                    f.write(chunk)
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        exportable = request.query.get("exportable")
+        job = Job(job_id, file_path, request.query.get("type"),
+                  None if exportable is None else exportable.lower() in ("1", "true", "yes"))
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise HTTPError(429, "Job queue is full", {"Retry-After": str(RETRY_AFTER)})
+        self.jobs[job_id] = job
+        await send_json(writer, 202, job.to_dict(), {"Location": f"/jobs/{job_id}"})
+
+    async def on_job(self, request, writer, job_id):
+        await send_json(writer, 200, self._job(job_id).to_dict())
+
+    async def on_views(self, request, writer, job_id):
+        job = self._job(job_id)
+        if job.status == "failed":
+            raise HTTPError(409, f"Job failed: {job.error}")
+        if job.status != "done":
+            await send_json(writer, 202, job.to_dict(), {"Retry-After": "5"})
+            return
+        if job.mock:
+            raise HTTPError(501, "The workitem returned no view data; only example views are available")
+        await send_json(writer, 200, job.views)
+
+    async def on_image(self, request, writer, job_id):
+        job = self._job(job_id)
+        view_name = request.query.get("view")
+        format = request.query.get("format", "png").lower()
+        if not view_name:
+            raise HTTPError(400, "view is required")
+        if format not in CONTENT_TYPES:
+            raise HTTPError(400, f"format must be one of {', '.join(CONTENT_TYPES)}")
+        path = await self._exported_image(job, view_name, format)
+        await send_file(writer, path, CONTENT_TYPES[format])
+
+    async def on_overlay(self, request, writer, job_id):
+        job = self._job(job_id)
+        view_name = request.query.get("view")
+        if not view_name:
+            raise HTTPError(400, "view is required")
+        annotations = await request.json()
+
+        image_path = await self._exported_image(job, view_name, "png")
+        overlay_dir = os.path.join(job.directory, "overlays")
+        os.makedirs(overlay_dir, exist_ok=True)
+        name = f"{_safe_name(view_name)}.{uuid.uuid4().hex[:8]}"
+        json_path = os.path.join(overlay_dir, f"{name}.annotations.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(annotations, f)
+
+        loop = asyncio.get_running_loop()
+        try:
+            out_path = await loop.run_in_executor(self.executor, _call, render_overlay, json_path, image_path,
+                                                  os.path.join(overlay_dir, f"{name}.png"))
+        except (ValueError, FileNotFoundError) as exc:
+            raise HTTPError(400, str(exc))
+        except Exception as exc:
+            raise HTTPError(500, f"Overlay failed: {exc}")
+        await send_file(writer, out_path, "image/png")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await read_request(reader)
+            if request:
+                await self.dispatch(request, writer)
+        except HTTPError as exc:
+            await send_json(writer, exc.status, {"error": str(exc)}, exc.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            traceback.print_exc()
+            await send_json(writer, 500, {"error": "internal error"})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def dispatch(self, request: Request, writer: asyncio.StreamWriter):
+        allowed = []
+        for method, pattern, name in ROUTES:
+            match = pattern.fullmatch(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            await getattr(self, f"on_{name}")(request, writer, **match.groupdict())
+            return
+        if allowed:
+            raise HTTPError(405, f"Use {', '.join(allowed)}", {"Allow": ", ".join(allowed)})
+        raise HTTPError(404, f"No route for {request.path}")
+
+
+_ID = r"[0-9a-f]+"
+ROUTES = [
+    ("GET", r"/health", "health"),
+    ("POST", r"/jobs", "submit"),
+    ("GET", rf"/jobs/(?P<job_id>{_ID})", "job"),
+    ("GET", rf"/jobs/(?P<job_id>{_ID})/views", "views"),
+    ("GET", rf"/jobs/(?P<job_id>{_ID})/image", "image"),
+    ("POST", rf"/jobs/(?P<job_id>{_ID})/overlay", "overlay"),
+]
+ROUTES = [(method, re.compile(pattern), name) for method, pattern, name in ROUTES]
+
+
+async def serve(host: str, port: int, service: ApiService):
+    service.start()
+    server = await asyncio.start_server(service.handle, host, port, limit=64 * 1024)
+    address = server.sockets[0].getsockname()
+    print(f"🚀 RevitViewExtractor API on http://{address[0]}:{address[1]} "
+          f"({service.workers} workers, queue {service.queue.maxsize})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - HTTP API Service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=4, help="Jobs processed concurrently")
+    parser.add_argument("--queue-size", type=int, default=16, help="Jobs waiting before submissions get 429")
+    parser.add_argument("--max-upload", type=float, default=2048, help="Largest accepted upload in MB")
+    parser.add_argument("--data-dir", help="Where uploads and outputs are kept (default: temporary)")
+
+    args = parser.parse_args(argv)
+
+    # Cancel outstanding workitems and delete registered temporary storage on exit
+    import list_views
+    from lifecycle import lifecycle
+    lifecycle.token_provider = list_views.get_access_token
+    lifecycle.install_handlers(delete_storage=True)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="rve-api-")
+    os.makedirs(data_dir, exist_ok=True)
+
+    async def run():
+        service = ApiService(data_dir, args.workers, args.queue_size, int(args.max_upload * 1024 * 1024))
+        await serve(args.host, args.port, service)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        print("👋 API service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Shared APS Client State
+
+State worth keeping between calls, shared by the scripts in one process and
+kept warm across commands by the rve daemon (rve_daemon.py):
+
+- get_token(scope) caches client-credentials tokens per scope until shortly
+  before they expire, so repeated calls do not re-authenticate
+- session() is one pooled requests.Session, so connections to APS are reused
+- upload_index remembers the input URL of uploaded local files; an unchanged
+  file (same path, size and mtime) is not uploaded again while the URL is fresh
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+import metrics
+from config import CLIENT_ID, CLIENT_SECRET, APS_BASE_URL
+from tracing import tracer
+
+TOKEN_MARGIN = 60        # seconds before expiry a cached token is replaced
+UPLOAD_TTL = 50 * 60     # signed URLs are issued for 60 minutes
+POOL_SIZE = 32           # connections kept per host
+
+_lock = threading.Lock()
+_session = None
+_tokens: Dict[str, Tuple[str, float]] = {}  # scope -> (token, expires at)
+
+
+def session():
+    """The shared requests.Session, created on first use"""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_token(scope: str = "code:all") -> Optional[str]:
+    """Client-credentials token for `scope`, cached until shortly before it expires"""
+    with _lock:
+        cached = _tokens.get(scope)
+    if cached and cached[1] - TOKEN_MARGIN > time.time():
+        return cached[0]
+
+    url = f"{APS_BASE_URL}/authentication/v2/token"
+    data = {
+        "client_id": CLIENT_ID,
+        "client_secret": CLIENT_SECRET,
+        "grant_type": "client_credentials",
+        "scope": scope
+    }
+    with tracer.span("token") as span:
+        response = session().post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
+        span.set(status_code=response.status_code)
+    metrics.observe_response("token", response)
+
+    if response.status_code != 200:
+        print(f"Failed to get access token: {response.text}")
+        return None
+    payload = response.json()
+    token = payload["access_token"]
+    with _lock:
+        _tokens[scope] = (token, time.time() + float(payload.get("expires_in", 3599)))
+    return token
+
+
+def clear_tokens():
+    with _lock:
+        _tokens.clear()
+
+
+class UploadIndex:
+    """Input URLs of uploaded local files, keyed by path, size and mtime"""
+
+    def __init__(self, ttl: float = UPLOAD_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int, int], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path: str) -> Optional[Tuple[str, int, int]]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, file_path: str) -> Optional[str]:
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.time():
+                return entry[0]
+            self._entries.pop(key, None)
+        return None
+
+    def put(self, file_path: str, url: str):
+        key = self._key(file_path)
+        if key:
+            with self._lock:
+                self._entries[key] = (url, time.time() + self.ttl)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Shared index used by the scripts
+upload_index = UploadIndex()
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        tokens = sum(1 for _, expires in _tokens.values() if expires > time.time())
+    return {"tokens": tokens, "uploads": len(upload_index), "session": int(_session is not None)}
@@ -12,154 +12,539 @@ Options:
     --format FORMAT    Export format (png, jpg, pdf) - default: png
     --type TYPE        Filter views by type
     --exportable       Process only exportable views
+    --views-dir DIR    Current view listings (<model>.views.json) used to build
+                       a per-model view-selection manifest
+    --previous-dir DIR Previous view listings; export only changed views
+    --view-id ID       Always export this view id (repeatable)
+    --pack             Process small files together, several per workitem (not
+                       with --views-dir or --bundle-outputs)
+    --pack-threshold MB  Files up to this size are packed (default: 20)
+    --pack-size MB     Maximum total size of one pack (default: 200)
+    --bundle-outputs   Have each workitem upload its exports as one zip, which is
+                       extracted while it downloads (output_bundle.py)
+    --max-size MB      Reject files larger than this before upload
+    --skip-preflight   Submit every *.rvt without the local pre-flight checks
+    --order ORDER      Queue order: smallest, oldest or name (default: smallest)
+    --priority-file F  JSON {"file.rvt": priority}; lower runs first
+    --submit-rate N    Workitem submissions per second (default: 1)
+    --status-rate N    Workitem status reads per second (default: 5)
+    --cleanup-storage  Also delete temporary objects (staging uploads, output and
+                       pack bundles, pack uploads) on shutdown
+    --trace FILE       Append timing spans as JSON lines to FILE
+    --metrics-port N   Serve Prometheus metrics on http://<host>:N/metrics
+    --metrics-host H   Interface for the metrics endpoint (default: 0.0.0.0)
+
+Before anything is uploaded, the files pass a parallel pre-flight check
+(preflight.py): backup copies (*.0001.rvt), empty, truncated, unreadable or
+locked files, files that are not Revit models, models newer than every
+engine and duplicate contents are rejected and listed in the batch report
+with the reason.
+
+Each model runs on the activity for the engine it was saved with (read
+locally by rvt_file.py, resolved by da_deploy.py), so DA does not upgrade it
+first; packs only hold files of one engine year.
+
+Workitems still running when a file times out, or when the run is
+interrupted (Ctrl-C, SIGTERM), are cancelled in Design Automation.
+
+Every stage (token, submit, queue_wait, processing, report, download) is
+timed with tracing spans; a per-stage summary is printed at the end of the run.
+Engine-side phases parsed from each workitem report (queue, download, model
+open, add-in, upload) are stored with the job record and summarized per
+model size.
+With --metrics-port, long-running batches also publish counters, histograms
+and gauges (files processed/failed, queue/run duration, HTTP status codes,
+retries, in-flight workitems) for Prometheus to scrape.
 """
 
 import os
 import sys
+import time
 import argparse
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from config import CLIENT_ID, CLIENT_SECRET
+import zipfile
+import aps_client
+import metrics
+import output_bundle
+import preflight
+from concurrent.futures import as_completed
+from bucket_pool import buckets
+from config import APS_BASE_URL
+from da_deploy import engine_id, engine_year
+from list_views import create_activity
+from rvt_file import saved_year
+from view_selection import VIEW_SELECTION_PARAM, build_manifest, is_empty, select_views, workitem_argument
+from view_diff import load_views
+from da_report import aggregate, parse_report, print_aggregate
+from da_scheduler import WorkitemScheduler, limiter, positive_rate
+from lifecycle import lifecycle
+from signed_urls import broker
+from tracing import tracer
+from upload_stream import stream_upload
+from workitem_packing import MB, PACK_INPUT_PARAM, PACK_OUTPUT_PARAM, build_pack, plan_packs, split_pack_results
+
+# Fallback when no activity is deployed (see list_views.create_activity)
+NOP_ACTIVITY = "Autodesk.Nop+Latest"
+
+# Workitem polling; the benchmark harness shortens these against the stand-in server
+POLL_INTERVAL = 10      # seconds between status reads
+WORKITEM_TIMEOUT = 300  # seconds before a workitem is cancelled
 
 def get_access_token():
-    """Get Autodesk access token"""
-    import requests
-    url = "https://developer.api.autodesk.com/authentication/v2/token"
-    data = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials",
-        "scope": "code:all"
-    }
-    response = requests.post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
-    return response.json()["access_token"] if response.status_code == 200 else None
+    """Get Autodesk access token (cached until shortly before it expires)"""
+    return aps_client.get_token("code:all")
 
-def process_revit_file(file_path, output_dir, view_type=None, exportable=None, format='png'):
-    """Process a single Revit file"""
+def run_workitem(workitem_data, label):
+    """Submit a workitem and wait for it; return the final status data on success"""
     token = get_access_token()
     
-    # For now, use a working activity to test the system
-    workitem_data = {
-        "activityId": "Autodesk.Nop+Latest",
-        "arguments": {}
-    }
-    
     # Send workitem to process file
-    import requests
-    url = "https://developer.api.autodesk.com/da/us-east/v3/workitems"
+    url = f"{APS_BASE_URL}/da/us-east/v3/workitems"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
     
-    response = requests.post(url, headers=headers, json=workitem_data)
+    with tracer.span("submit", label=label) as span:
+        response = limiter.request("submit", "POST", url, headers=headers, json=workitem_data)
+        span.set(status_code=response.status_code)
     
+    if response.status_code == 429:
+        print(f"Rate limited submitting {label}: giving up after retries")
+        return None
     if response.status_code != 200:
-        print(f"Error processing {file_path}: {response.text}")
+        print(f"Error processing {label}: {response.text}")
         return None
     
     workitem_id = response.json()["id"]
+    lifecycle.register_workitem(workitem_id, token)
     
-    # Monitor workitem
-    status_url = f"https://developer.api.autodesk.com/da/us-east/v3/workitems/{workitem_id}"
+    # Monitor workitem; queue wait and processing time are as seen by polling
+    status_url = f"{APS_BASE_URL}/da/us-east/v3/workitems/{workitem_id}"
+    submitted_at = time.time()
+    started_at = None
     
-    import time
-    for _ in range(30):  # 5 minutes timeout
-        status_response = requests.get(status_url, headers=headers)
+    deadline = time.monotonic() + WORKITEM_TIMEOUT
+    while time.monotonic() < deadline:
+        status_response = limiter.request("status", "GET", status_url, headers=headers)
         if status_response.status_code == 200:
             status_data = status_response.json()
-            if status_data["status"] == "success":
-                # Get report and exported files
-                report_url = status_data.get("reportUrl")
-                export_urls = status_data.get("exportUrls", [])
-                
-                results = {
-                    "file": file_path,
-                    "report": None,
-                    "exports": []
-                }
-                
-                # Get report
-                if report_url:
-                    report_response = requests.get(report_url)
-                    if report_response.status_code == 200:
-                        results["report"] = report_response.text
-                
-                # Download exported files
-                for export_url in export_urls:
-                    export_response = requests.get(export_url)
-                    if export_response.status_code == 200:
-                        # Generate output filename
-                        filename = os.path.basename(file_path).replace('.rvt', f'_{export_url.split("/")[-1]}')
-                        output_path = os.path.join(output_dir, filename)
-                        
-                        # Save exported file
-                        with open(output_path, 'wb') as f:
-                            f.write(export_response.content)
-                        
-                        results["exports"].append(output_path)
-                
-                return results
+            status = status_data["status"]
+            if started_at is None and status != "pending":
+                started_at = time.time()
+                tracer.record("queue_wait", submitted_at, started_at, workitem=workitem_id)
+                metrics.workitem_queue_seconds.observe(started_at - submitted_at)
+            if status not in ["pending", "inprogress"]:
+                finished_at = time.time()
+                tracer.record("processing", started_at, finished_at, workitem=workitem_id, status=status)
+                metrics.workitem_run_seconds.observe(finished_at - started_at)
             
-            elif status_data["status"] == "failed":
-                print(f"Workitem processing failed for {file_path}")
+            if status == "success":
+                lifecycle.complete_workitem(workitem_id)
+                return status_data
+            
+            elif status not in ["pending", "inprogress"]:
+                lifecycle.complete_workitem(workitem_id)
+                print(f"Workitem processing failed for {label}: {status_data['status']}")
                 return None
         
-        time.sleep(10)
+        # Stop polling as soon as the run is shutting down
+        if lifecycle.stopping.wait(POLL_INTERVAL):
+            return None
     
-    print(f"Timeout waiting for workitem for {file_path}")
+    print(f"Timeout waiting for workitem for {label}, cancelling {workitem_id}")
+    lifecycle.cancel_workitem(workitem_id, token)
     return None
 
-def batch_process(directory, output_dir, view_type=None, exportable=None, format='png', max_workers=5):
+def pack_engine(file_path):
+    """Engine year a file opens on; the pack planner keeps different years apart"""
+    return engine_year(saved_year(file_path))
+
+def resolve_activity(file_path):
+    """Activity on the engine the file was saved with, falling back as list_views does"""
+    engine = pack_engine(file_path)
+    if not engine:
+        print(f"No engine can open {file_path}: saved by Revit {saved_year(file_path)}")
+        return None
+    print(f"Revit {saved_year(file_path) or 'version unknown'} -> engine {engine_id(engine)}: {os.path.basename(file_path)}")
+    return create_activity(None, engine)
+
+def download_outputs(status_data, output_dir, prefix, bundle=None):
+    """Download the report and exported files of a finished workitem
+    
+    With a bundle, the exports come from the workitem's one outputBundle zip.
+    """
+    http = aps_client.session()
+    report = None
+    exports = []
+    
+    # Get report
+    report_url = status_data.get("reportUrl")
+    if report_url:
+        with tracer.span("report") as span:
+            report_response = http.get(report_url)
+            span.set(status_code=report_response.status_code, bytes=len(report_response.content))
+        metrics.observe_response("report", report_response)
+        if report_response.status_code == 200:
+            report = report_response.text
+    
+    # Download exported files
+    for export_url in status_data.get("exportUrls", []):
+        with tracer.span("download") as span:
+            export_response = http.get(export_url)
+            span.set(status_code=export_response.status_code, bytes=len(export_response.content))
+        metrics.observe_response("download", export_response)
+        if export_response.status_code == 200:
+            # Generate output filename
+            filename = f'{prefix}_{export_url.split("/")[-1]}'
+            output_path = os.path.join(output_dir, filename)
+            
+            # Save exported file
+            with open(output_path, 'wb') as f:
+                f.write(export_response.content)
+            
+            exports.append(output_path)
+    
+    if bundle:
+        exports.extend(output_bundle.download(aps_client.get_token(output_bundle.SCOPE), bundle, output_dir, prefix))
+    
+    return report, exports
+
+def process_revit_file(file_path, output_dir, view_type=None, exportable=None, format='png', view_selection=None,
+                       bundle_outputs=False):
+    """Process a single Revit file"""
+    activity_id = resolve_activity(file_path)
+    if not activity_id:
+        return None
+    workitem_data = {
+        "activityId": activity_id,
+        "arguments": {}
+    }
+    
+    # The NOP fallback takes no input file
+    if activity_id != NOP_ACTIVITY:
+        storage_token = aps_client.get_token(output_bundle.SCOPE)
+        uploaded = upload_input(storage_token, file_path) if storage_token else None
+        input_url = broker.download_url(storage_token, *uploaded) if uploaded else None
+        if not input_url:
+            print(f"Cannot upload {file_path}")
+            return None
+        workitem_data["arguments"]["inputFile"] = {"url": input_url, "verb": "get"}
+    
+    # Export only the selected views in this one workitem
+    if view_selection is not None:
+        argument = workitem_argument(view_selection, aps_client.get_token(output_bundle.SCOPE))
+        if not argument:
+            print(f"Cannot pass the view selection for {file_path}")
+            return None
+        workitem_data["arguments"][VIEW_SELECTION_PARAM] = argument
+    
+    # All exports in one zip output: one PUT and one GET per model
+    bundle = None
+    if bundle_outputs:
+        storage_token = aps_client.get_token(output_bundle.SCOPE)
+        bundle = output_bundle.new_bundle(storage_token) if storage_token else None
+        if not bundle:
+            print(f"Cannot create the output bundle for {file_path}")
+            return None
+        argument = output_bundle.workitem_argument(storage_token, bundle)
+        if not argument:
+            print(f"Cannot sign the output bundle upload for {file_path}")
+            return None
+        workitem_data["arguments"][output_bundle.OUTPUT_BUNDLE_PARAM] = argument
+    
+    with tracer.span("file", file=os.path.basename(file_path)) as span:
+        status_data = run_workitem(workitem_data, file_path)
+        if not status_data:
+            span.status = "error"
+            return None
+        
+        # Get report and exported files
+        prefix = os.path.splitext(os.path.basename(file_path))[0]
+        report, exports = download_outputs(status_data, output_dir, prefix, bundle)
+    
+    results = {
+        "file": file_path,
+        "size": os.path.getsize(file_path),
+        "report": report,
+        "timings": parse_report(report, status_data.get("stats"))["timings"],
+        "exports": exports
+    }
+    if view_selection is not None:
+        results["view_selection"] = view_selection
+    
+    return results
+
+def upload_input(token, file_path):
+    """Upload a model or pack zip to a pool bucket; returns (bucket key, object key)"""
+    bucket_key = buckets.bucket_for(token, os.path.getsize(file_path))
+    result = stream_upload(token, bucket_key, file_path) if bucket_key else None
+    return (bucket_key, result["key"]) if result else None
+
+def upload_pack(token, pack_zip):
+    """Upload a pack zip to a pool bucket; returns a signed read URL for the workitem
+    
+    The pack object is registered as temporary storage (see --cleanup-storage).
+    """
+    uploaded = upload_input(token, pack_zip)
+    if not uploaded:
+        return None
+    lifecycle.register_object(*uploaded)
+    return broker.download_url(token, *uploaded)
+
+def download_pack_results(token, result_pack, zip_path):
+    """Save a finished pack workitem's resultPack zip and delete the object; True when it is a zip"""
+    if not output_bundle.complete(token, result_pack):
+        return False
+    url = broker.download_url(token, result_pack["bucket"], result_pack["key"])
+    if not url:
+        return False
+    with tracer.span("download", bundle=result_pack["key"]) as span:
+        response = aps_client.session().get(url, stream=True)
+        span.set(status_code=response.status_code)
+        metrics.observe_response("download", response)
+        try:
+            if response.status_code != 200:
+                return False
+            with open(zip_path, 'wb') as f:
+                for chunk in response.iter_content(1024 * 1024):
+                    f.write(chunk)
+        finally:
+            response.close()
+    output_bundle.delete(token, result_pack)
+    return zipfile.is_zipfile(zip_path)
+
+def process_pack(pack_files, output_dir, pack_index):
+    """Process several small Revit files in one workitem and split the results per file
+    
+    The pack zip is uploaded to a pool bucket and passed as inputPack; the
+    activity PUTs its per-file results to a pool object through resultPack.
+    Only files with entries in the result pack are returned, so files the
+    activity did not process are reported as failed.
+    """
+    pack_dir = os.path.join(output_dir, "_packs")
+    os.makedirs(pack_dir, exist_ok=True)
+    pack_name = f"pack_{pack_index:04d}"
+    pack_zip = os.path.join(pack_dir, f"{pack_name}.zip")
+    with tracer.span("pack_build", files=len(pack_files)):
+        manifest = build_pack(pack_files, pack_zip)
+    
+    storage_token = aps_client.get_token(output_bundle.SCOPE)
+    input_url = upload_pack(storage_token, pack_zip) if storage_token else None
+    result_pack = output_bundle.new_bundle(storage_token) if input_url else None
+    result_argument = output_bundle.workitem_argument(storage_token, result_pack) if result_pack else None
+    if not result_argument:
+        print(f"Cannot upload {pack_zip}")
+        return None
+    
+    # Packs are planned per engine year, so the first file's engine fits them all
+    activity_id = resolve_activity(pack_files[0])
+    if not activity_id:
+        return None
+    workitem_data = {
+        "activityId": activity_id,
+        "arguments": {
+            PACK_INPUT_PARAM: {"url": input_url},
+            PACK_OUTPUT_PARAM: result_argument
+        }
+    }
+    
+    result_zip = os.path.join(pack_dir, f"{pack_name}.results.zip")
+    with tracer.span("pack", pack=os.path.basename(pack_zip), files=len(pack_files)) as span:
+        status_data = run_workitem(workitem_data, pack_zip)
+        if not status_data:
+            span.status = "error"
+            return None
+        
+        report, _ = download_outputs(status_data, pack_dir, pack_name)
+        if not download_pack_results(aps_client.get_token(output_bundle.SCOPE), result_pack, result_zip):
+            print(f"No result pack for {pack_zip}")
+            span.status = "error"
+            return None
+    timings = parse_report(report, status_data.get("stats"))["timings"]
+    
+    # Route the combined result archive back to per-file outputs
+    pack_size = os.path.getsize(pack_zip)
+    return [
+        {
+            "file": source,
+            "pack": pack_zip,
+            "size": os.path.getsize(source),
+            "pack_size": pack_size,
+            "report": report,
+            "timings": timings,
+            "exports": paths
+        }
+        for source, paths in split_pack_results(result_zip, manifest, output_dir).items()
+        if paths
+    ]
+
+def view_selection_for(file_path, views_dir, previous_dir=None, view_type=None, exportable=None, view_ids=()):
+    """Build the view-selection manifest for a file from its stored view listings
+    
+    Returns None when there is no current listing for the file, in which case
+    the workitem exports every view matching the activity defaults.
+    """
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    current_path = os.path.join(views_dir, f"{stem}.views.json")
+    if not os.path.exists(current_path):
+        return None
+    
+    previous_views = None
+    if previous_dir:
+        previous_path = os.path.join(previous_dir, f"{stem}.views.json")
+        if os.path.exists(previous_path):
+            previous_views = load_views(previous_path)
+    
+    views = select_views(
+        load_views(current_path),
+        previous_views,
+        view_ids=view_ids,
+        view_type=view_type,
+        exportable=exportable
+    )
+    return build_manifest(file_path, views)
+
+def batch_process(directory, output_dir, view_type=None, exportable=None, format='png', max_workers=5,
+                  views_dir=None, previous_dir=None, view_ids=(), pack=False,
+                  pack_threshold=20 * MB, pack_size=200 * MB, order="smallest", priorities=None,
+                  bundle_outputs=False, validate=True, max_size=None):
     """Batch process Revit files in a directory"""
+    # A pack workitem has one result per file, without view selections or output bundles
+    if pack and (views_dir or bundle_outputs):
+        raise ValueError("Packed files cannot use view selections or output bundles")
+    
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     # Find all .rvt files
     rvt_files = [
         os.path.join(directory, f) 
-        for f in os.listdir(directory) 
+        for f in sorted(os.listdir(directory)) 
         if f.lower().endswith('.rvt')
     ]
     
-    # Process files in parallel
+    # Reject files that would fail in the cloud before any upload
     results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    if validate:
+        with tracer.span("preflight", files=len(rvt_files)):
+            rvt_files, rejected = preflight.validate(rvt_files, max_size)
+        for rejection in rejected:
+            print(f"🚫 Rejected: {rejection['file']} ({rejection['rejected']})")
+        results.extend(rejected)
+        metrics.files_rejected.inc(len(rejected))
+    
+    # Build per-file view selections; files with nothing to export are skipped
+    selections = {}
+    if views_dir:
+        for file_path in list(rvt_files):
+            selection = view_selection_for(file_path, views_dir, previous_dir, view_type, exportable or None, view_ids)
+            if selection is not None and is_empty(selection):
+                print(f"⏭️ Skipped (no changed views): {file_path}")
+                results.append({"file": file_path, "skipped": "no changed views"})
+                rvt_files.remove(file_path)
+            else:
+                selections[file_path] = selection
+    
+    # Group small files into multi-file workitems
+    packs = []
+    if pack:
+        packs, rvt_files = plan_packs(rvt_files, pack_threshold, pack_size, group=pack_engine)
+        if packs:
+            print(f"📦 Packed {sum(len(p) for p in packs)} small files into {len(packs)} workitems")
+    
+    # Order the queue: user priority first, then smallest or oldest file
+    priorities = priorities or {}
+    def queue_key(paths):
+        priority = min(priorities.get(os.path.basename(p), 0) for p in paths)
+        if order == "oldest":
+            return priority, min(os.path.getmtime(p) for p in paths)
+        if order == "smallest":
+            return priority, sum(os.path.getsize(p) for p in paths)
+        return priority, 0
+    
+    # Process files in parallel, within the DA rate limits; job spans nest under the batch span
+    with tracer.span("batch", directory=directory, files=len(rvt_files), packs=len(packs)), \
+            WorkitemScheduler(max_in_flight=max_workers) as scheduler:
+        metrics.queue_depth.set_function(lambda: scheduler.queue_depth)
+        
+        # Submit pack tasks; each result is a list of per-file results
+        future_to_job = {}
+        for i, pack_files in enumerate(packs):
+            priority, order_key = queue_key(pack_files)
+            future = scheduler.submit(process_pack, pack_files, output_dir, i + 1,
+                                      priority=priority, order_key=order_key)
+            future_to_job[future] = pack_files
+        
         # Submit processing tasks
-        future_to_file = {
-            executor.submit(
+        for file_path in rvt_files:
+            priority, order_key = queue_key([file_path])
+            future = scheduler.submit(
                 process_revit_file, 
                 file_path, 
                 output_dir, 
                 view_type, 
                 exportable, 
-                format
-            ): file_path for file_path in rvt_files
-        }
+                format,
+                selections.get(file_path),
+                bundle_outputs,
+                priority=priority,
+                order_key=order_key
+            )
+            future_to_job[future] = file_path
         
         # Collect results
-        for future in as_completed(future_to_file):
-            file_path = future_to_file[future]
+        for future in as_completed(future_to_job):
+            job = future_to_job[future]
             try:
                 result = future.result()
-                if result:
+                if isinstance(job, list):
+                    results.extend(result or [])
+                    processed = {file_result["file"] for file_result in result or []}
+                    metrics.files_processed.inc(len(processed))
+                    metrics.files_failed.inc(len(job) - len(processed))
+                    for file_path in job:
+                        if file_path in processed:
+                            print(f"✅ Processed: {file_path}")
+                        else:
+                            print(f"❌ Failed to process: {file_path}")
+                elif result:
                     results.append(result)
-                    print(f"✅ Processed: {file_path}")
+                    metrics.files_processed.inc()
+                    print(f"✅ Processed: {job}")
                 else:
-                    print(f"❌ Failed to process: {file_path}")
+                    metrics.files_failed.inc()
+                    print(f"❌ Failed to process: {job}")
             except Exception as exc:
-                print(f"❌ Error processing {file_path}: {exc}")
+                metrics.files_failed.inc(len(job) if isinstance(job, list) else 1)
+                label = f"pack of {len(job)} files" if isinstance(job, list) else job
+                print(f"❌ Error processing {label}: {exc}")
+            
+            stats = scheduler.stats()
+            print(f"   Queue: {stats['queued']} waiting, {stats['in_flight']} in flight, {stats['throttled']} throttled")
+    metrics.queue_depth.set_function(None)
     
     # Save batch processing report
     report_path = os.path.join(output_dir, 'batch_processing_report.json')
     with open(report_path, 'w') as f:
         json.dump(results, f, indent=2)
     
-    print(f"\n📊 Batch Processing Complete")
-    print(f"Total files processed: {len(results)}")
+    print("\n📊 Batch Processing Complete")
+    processed = sum(1 for result in results if "rejected" not in result and "skipped" not in result)
+    skipped = sum(1 for result in results if "skipped" in result)
+    rejected = sum(1 for result in results if "rejected" in result)
+    print(f"Total files processed: {processed}")
+    if skipped:
+        print(f"Skipped (no changed views): {skipped}")
+    if rejected:
+        print(f"Rejected before upload: {rejected}")
     print(f"Report saved to: {report_path}")
+    
+    # Where the wall-clock time went, locally and inside Design Automation
+    tracer.print_summary()
+    print_aggregate(aggregate(results))
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="RevitViewExtractor - Batch Processing")
     parser.add_argument("directory", help="Directory containing Revit files")
     parser.add_argument("--output-dir", default="output", help="Output directory for processed files")
@@ -167,8 +552,45 @@ def main():
     parser.add_argument("--type", help="Filter views by type")
     parser.add_argument("--exportable", action="store_true", help="Process only exportable views")
     parser.add_argument("--workers", type=int, default=5, help="Number of parallel workers")
+    parser.add_argument("--views-dir", help="Directory with current view listings (<model>.views.json)")
+    parser.add_argument("--previous-dir", help="Directory with previous view listings; export only changed views")
+    parser.add_argument("--view-id", action="append", default=[], help="Always export this view id")
+    parser.add_argument("--pack", action="store_true", help="Process small files together, several per workitem")
+    parser.add_argument("--pack-threshold", type=float, default=20, help="Pack files up to this size in MB")
+    parser.add_argument("--pack-size", type=float, default=200, help="Maximum pack size in MB")
+    parser.add_argument("--bundle-outputs", action="store_true", help="Upload and download each workitem's exports as one zip")
+    parser.add_argument("--max-size", type=float, help="Reject files larger than this many MB")
+    parser.add_argument("--skip-preflight", action="store_true", help="Submit every *.rvt without local checks")
+    parser.add_argument("--order", choices=['smallest', 'oldest', 'name'], default='smallest', help="Queue order")
+    parser.add_argument("--priority-file", help="JSON mapping file name to priority (lower runs first)")
+    parser.add_argument("--submit-rate", type=positive_rate, default=1.0, help="Workitem submissions per second")
+    parser.add_argument("--status-rate", type=positive_rate, default=5.0, help="Workitem status reads per second")
+    parser.add_argument("--cleanup-storage", action="store_true", help="Delete temporary objects on shutdown")
+    parser.add_argument("--trace", help="Append timing spans as JSON lines to this file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+    parser.add_argument("--metrics-host", default="0.0.0.0", help="Interface for the metrics endpoint")
+    
+    args = parser.parse_args(argv)
+    if args.pack and (args.views_dir or args.bundle_outputs):
+        parser.error("--pack cannot be combined with --views-dir or --bundle-outputs")
+    
+    limiter.configure(submit_rate=args.submit_rate, status_rate=args.status_rate)
+    tracer.configure(args.trace)
+    
+    # Scrapeable counters for long-running batches
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port, args.metrics_host)
+        metrics.workitems_in_flight.set_function(lambda: lifecycle.outstanding)
+        print(f"📈 Metrics at http://{args.metrics_host}:{args.metrics_port}/metrics")
+    
+    # Cancel outstanding workitems on timeout, Ctrl-C or exit
+    lifecycle.token_provider = get_access_token
+    lifecycle.install_handlers(delete_storage=args.cleanup_storage)
     
-    args = parser.parse_args()
+    priorities = None
+    if args.priority_file:
+        with open(args.priority_file) as f:
+            priorities = json.load(f)
     
     # Batch process
     batch_process(
@@ -177,7 +599,18 @@ def main():
         view_type=args.type, 
         exportable=args.exportable, 
         format=args.format, 
-        max_workers=args.workers
+        max_workers=args.workers,
+        views_dir=args.views_dir,
+        previous_dir=args.previous_dir,
+        view_ids=args.view_id,
+        pack=args.pack,
+        pack_threshold=int(args.pack_threshold * MB),
+        pack_size=int(args.pack_size * MB),
+        order=args.order,
+        priorities=priorities,
+        bundle_outputs=args.bundle_outputs,
+        validate=not args.skip_preflight,
+        max_size=int(args.max_size * MB) if args.max_size else None
     )
 
 if __name__ == "__main__":
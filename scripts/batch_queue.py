@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Distributed Batch Processing
+
+Spreads a batch over several worker processes and hosts through a shared
+work queue (work_queue.py). A coordinator enqueues one job per Revit file;
+workers lease jobs, run the same per-file pipeline as batch_process.py
+(workitem, report and export download) and store the result record in the
+queue. While a job runs its lease is extended in the background; when a
+worker crashes the lease expires and another worker picks the job up, up to
+--max-attempts times.
+
+Job ids are derived from path, size and modification time, so enqueueing
+the same directory again (e.g. nightly) only adds new and changed models.
+Model paths must be reachable from every worker host (shared storage).
+
+Usage:
+    python batch_queue.py enqueue <queue> <directory> [options]
+    python batch_queue.py work <queue> [options]
+    python batch_queue.py status <queue>
+    python batch_queue.py report <queue> [--output FILE]
+
+Queue: sqlite:///path/queue.db for workers on one host,
+       file:///shared/queue for workers on several hosts
+
+Enqueue options:
+    --type TYPE        Filter views by type
+    --exportable       Process only exportable views
+    --format FORMAT     Export format (png, jpg, pdf) - default: png
+    --views-dir DIR    Current view listings (<model>.views.json)
+    --previous-dir DIR Previous view listings; export only changed views
+    --order ORDER      Queue order: smallest, oldest or name (default: smallest)
+    --priority-file F  JSON {"file.rvt": priority}; lower runs first
+    --bundle-outputs   Upload and download each workitem's exports as one zip
+
+Work options:
+    --output-dir DIR   Output directory for exports (default: output)
+    --workers N        Jobs processed in parallel by this worker (default: 5)
+    --lease SECONDS    Visibility timeout of a lease (default: 600)
+    --max-attempts N   Leases per job before it is failed (default: 3)
+    --drain            Exit when the queue is empty instead of waiting
+    --submit-rate N / --status-rate N / --trace FILE / --metrics-port N
+                       As for batch_process.py
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+
+import metrics
+import batch_process
+from da_report import aggregate, print_aggregate
+from da_scheduler import limiter, positive_rate
+from lifecycle import lifecycle
+from tracing import tracer
+from view_selection import is_empty
+from work_queue import DEFAULT_MAX_ATTEMPTS, DEFAULT_VISIBILITY_TIMEOUT, open_queue, worker_id
+
+IDLE_INTERVAL = 5  # seconds between polls of an empty queue
+
+
+def job_id_for(file_path):
+    """Stable id of one version of a file: path, size and mtime"""
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def enqueue_directory(queue, directory, view_type=None, exportable=None, format='png',
+                      views_dir=None, previous_dir=None, order="smallest", priorities=None,
+                      bundle_outputs=False):
+    """Enqueue one job per .rvt file; returns (added, already queued, skipped)"""
+    priorities = priorities or {}
+    added = existing = skipped = 0
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.rvt'):
+            continue
+        file_path = os.path.abspath(os.path.join(directory, name))
+        selection = None
+        if views_dir:
+            selection = batch_process.view_selection_for(file_path, views_dir, previous_dir, view_type,
+                                                         exportable or None)
+            if selection is not None and is_empty(selection):
+                print(f"⏭️ Skipped (no changed views): {file_path}")
+                skipped += 1
+                continue
+
+        # Lower priority values are leased first; the order key breaks ties within a priority
+        if order == "smallest":
+            order_key = os.path.getsize(file_path)
+        elif order == "oldest":
+            order_key = os.path.getmtime(file_path)
+        else:
+            order_key = 0
+        priority = priorities.get(name, 0) * 1e12 + order_key
+
+        payload = {
+            "file": file_path,
+            "type": view_type,
+            "exportable": exportable,
+            "format": format,
+            "view_selection": selection,
+            "bundle_outputs": bundle_outputs
+        }
+        if queue.enqueue(job_id_for(file_path), payload, priority=priority):
+            added += 1
+        else:
+            existing += 1
+    return added, existing, skipped
+
+
+class Heartbeat:
+    """Extends a lease every third of its timeout until stopped"""
+
+    def __init__(self, queue, job_id, owner, lease):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.lease = lease
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id[:8]}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease / 3):
+            if not self.queue.extend(self.job_id, self.owner, self.lease):
+                self.lost = True
+                print(f"⚠️ Lease on job {self.job_id[:8]} was lost to another worker")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def process_job(queue, job, owner, output_dir, lease):
+    """Run one leased job and record its outcome in the queue"""
+    payload = job["payload"]
+    file_path = payload["file"]
+    print(f"🔧 Processing {file_path} (attempt {job['attempts']})")
+    try:
+        with Heartbeat(queue, job["id"], owner, lease) as heartbeat:
+            result = batch_process.process_revit_file(
+                file_path,
+                output_dir,
+                payload.get("type"),
+                payload.get("exportable"),
+                payload.get("format") or 'png',
+                payload.get("view_selection"),
+                payload.get("bundle_outputs", False)
+            )
+    except Exception as exc:
+        result, error = None, str(exc)
+    else:
+        error = "processing failed"
+
+    if heartbeat.lost:
+        return  # Another worker owns the job now
+    if result is None and lifecycle.stopping.is_set():
+        # Interrupted, not failed: give the job to another worker right away
+        queue.release(job["id"], owner)
+        print(f"↩️ Released: {file_path}")
+    elif result is None:
+        queue.fail(job["id"], owner, error)
+        if job["attempts"] < queue.max_attempts:
+            print(f"🔁 Failed attempt {job['attempts']}, queued again: {file_path}")
+        else:
+            metrics.files_failed.inc()
+            print(f"❌ Failed to process: {file_path}")
+    else:
+        metrics.files_processed.inc()
+        result["worker"] = owner
+        queue.complete(job["id"], owner, result)
+        print(f"✅ Processed: {file_path}")
+
+
+def work_loop(queue, output_dir, lease, drain):
+    """Lease and process jobs until the queue drains or the worker stops"""
+    owner = worker_id()
+    while not lifecycle.stopping.is_set():
+        job = queue.lease(owner, lease)
+        if job is not None:
+            process_job(queue, job, owner, output_dir, lease)
+            continue
+        stats = queue.stats()
+        if drain and not stats["queued"] and not stats["leased"]:
+            return
+        lifecycle.stopping.wait(IDLE_INTERVAL)
+
+
+def work(queue, output_dir, workers=5, lease=DEFAULT_VISIBILITY_TIMEOUT, drain=False):
+    os.makedirs(output_dir, exist_ok=True)
+    threads = [
+        threading.Thread(target=work_loop, args=(queue, output_dir, lease, drain), name=f"worker-{i}")
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    # Join with a timeout so Ctrl-C and SIGTERM reach the lifecycle handlers
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(1)
+
+
+def write_report(queue, output_path=None):
+    """Collect finished jobs into a batch_processing_report.json-style list"""
+    results = []
+    for job in queue.results():
+        if job["status"] == "done":
+            results.append(job["result"])
+        else:
+            results.append({"file": job["payload"]["file"], "error": job["error"], "attempts": job["attempts"]})
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Report saved to: {output_path}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Distributed Batch Processing")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Enqueue one job per Revit file in a directory")
+    enqueue_parser.add_argument("queue", help="Queue URL or path")
+    enqueue_parser.add_argument("directory", help="Directory containing Revit files")
+    enqueue_parser.add_argument("--format", choices=['png', 'jpg', 'pdf'], default='png', help="Export format")
+    enqueue_parser.add_argument("--type", help="Filter views by type")
+    enqueue_parser.add_argument("--exportable", action="store_true", help="Process only exportable views")
+    enqueue_parser.add_argument("--views-dir", help="Directory with current view listings (<model>.views.json)")
+    enqueue_parser.add_argument("--previous-dir", help="Directory with previous view listings")
+    enqueue_parser.add_argument("--order", choices=['smallest', 'oldest', 'name'], default='smallest',
+                                help="Queue order")
+    enqueue_parser.add_argument("--priority-file", help="JSON mapping file name to priority (lower runs first)")
+    enqueue_parser.add_argument("--bundle-outputs", action="store_true",
+                                help="Upload and download each workitem's exports as one zip")
+
+    work_parser = subparsers.add_parser("work", help="Process jobs from the queue")
+    work_parser.add_argument("queue", help="Queue URL or path")
+    work_parser.add_argument("--output-dir", default="output", help="Output directory for processed files")
+    work_parser.add_argument("--workers", type=int, default=5, help="Jobs processed in parallel")
+    work_parser.add_argument("--lease", type=float, default=DEFAULT_VISIBILITY_TIMEOUT,
+                             help="Lease visibility timeout in seconds")
+    work_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                             help="Leases per job before it is failed")
+    work_parser.add_argument("--drain", action="store_true", help="Exit when the queue is empty")
+    work_parser.add_argument("--submit-rate", type=positive_rate, default=1.0, help="Workitem submissions per second")
+    work_parser.add_argument("--status-rate", type=positive_rate, default=5.0, help="Workitem status reads per second")
+    work_parser.add_argument("--cleanup-storage", action="store_true",
+                             help="Delete temporary objects on shutdown")
+    work_parser.add_argument("--trace", help="Append timing spans as JSON lines to this file")
+    work_parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+    work_parser.add_argument("--metrics-host", default="0.0.0.0", help="Interface for the metrics endpoint")
+
+    status_parser = subparsers.add_parser("status", help="Show job counts")
+    status_parser.add_argument("queue", help="Queue URL or path")
+    status_parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    report_parser = subparsers.add_parser("report", help="Collect results of finished jobs")
+    report_parser.add_argument("queue", help="Queue URL or path")
+    report_parser.add_argument("--output", help="Write the report to this JSON file")
+
+    args = parser.parse_args(argv)
+
+    try:
+        queue = open_queue(args.queue, getattr(args, "max_attempts", DEFAULT_MAX_ATTEMPTS))
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    if args.command == "enqueue":
+        priorities = None
+        if args.priority_file:
+            with open(args.priority_file) as f:
+                priorities = json.load(f)
+        added, existing, skipped = enqueue_directory(
+            queue, args.directory, view_type=args.type, exportable=args.exportable, format=args.format,
+            views_dir=args.views_dir, previous_dir=args.previous_dir, order=args.order, priorities=priorities,
+            bundle_outputs=args.bundle_outputs)
+        print(f"📥 Enqueued {added} jobs ({existing} already queued, {skipped} skipped)")
+
+    elif args.command == "work":
+        limiter.configure(submit_rate=args.submit_rate, status_rate=args.status_rate)
+        tracer.configure(args.trace)
+        if args.metrics_port:
+            metrics.start_http_server(args.metrics_port, args.metrics_host)
+            metrics.workitems_in_flight.set_function(lambda: lifecycle.outstanding)
+            metrics.queue_depth.set_function(lambda: queue.stats()["queued"])
+            print(f"📈 Metrics at http://{args.metrics_host}:{args.metrics_port}/metrics")
+
+        # Cancel outstanding workitems on Ctrl-C or SIGTERM; their jobs are released
+        lifecycle.token_provider = batch_process.get_access_token
+        lifecycle.install_handlers(delete_storage=args.cleanup_storage)
+
+        print(f"👷 Worker {worker_id()} on {args.queue} with {args.workers} threads")
+        start = time.time()
+        work(queue, args.output_dir, args.workers, args.lease, args.drain)
+        print(f"\n📊 Worker finished after {time.time() - start:.0f}s")
+        tracer.print_summary()
+
+    elif args.command == "status":
+        stats = queue.stats()
+        if args.json:
+            print(json.dumps(stats, indent=2))
+        else:
+            print(f"📋 {stats['queued']} queued, {stats['leased']} leased ({stats['expired']} expired), "
+                  f"{stats['done']} done, {stats['failed']} failed")
+
+    else:
+        results = write_report(queue, args.output)
+        failed = sum(1 for result in results if "error" in result)
+        print(f"📊 {len(results) - failed} files processed, {failed} failed")
+        print_aggregate(aggregate([result for result in results if "error" not in result]))
+
+
+if __name__ == "__main__":
+    main()
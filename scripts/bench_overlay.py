@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Overlay Rendering Micro-benchmarks
+
+Times the annotation overlay path on synthetic *.annotations.json files in
+the format written by the add-in (see addin-results/South.annotations.json):
+elevation or plan views with viewportCorners, bbox3D, bbox2D, uvBBox and
+bboxViewport per tag.
+
+Each case (annotation count x image size x view kind) times these stages
+separately, best of --repeat runs:
+- json_load       load_json of the annotations file
+- image_load      PNG decode and RGBA conversion
+- mapping         draw_annotations.annotation_box + fit_box for every tag
+- mapping_overlay overlay_boxes.annotation_pixel_box for every tag
+- draw            box outlines
+- labels          label background and text (draw_annotations.draw_label)
+- encode          PNG encode of the result
+
+and the end-to-end scripts (draw_annotations, overlay_boxes, fix_annotations)
+with their console output silenced. Peak Python heap (tracemalloc) and the
+process peak RSS are recorded; Pillow image buffers are outside the Python
+heap, so the raw RGBA buffer size is reported alongside.
+
+Usage:
+    python bench_overlay.py [options]
+
+Options:
+    --counts N [N ...]      Annotations per view (default: 10 100 1000 10000)
+    --sizes WxH [WxH ...]   Image sizes (default: 2000x949 4000x1898 16000x7592)
+    --views KIND [KIND ...] elevation and/or plan (default: elevation plan)
+    --repeat N              Runs per case; the fastest is kept (default: 3)
+    --no-end-to-end         Skip the end-to-end script timings
+    --output PATH           Results file (default: bench_overlay.json)
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import importlib.util
+import tracemalloc
+import contextlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+MB = 1024 * 1024
+STAGES = ["json_load", "image_load", "mapping", "mapping_overlay", "draw", "labels", "encode"]
+TAG_TYPES = ["WindowTag", "DoorTag", "RoomTag", "WallTag", "GenericAnnotation"]
+
+
+def generate_annotations(count: int, width: int, height: int, view: str = "elevation",
+                         seed: int = 0, image_path: str = "") -> Dict[str, Any]:
+    """Synthetic annotations JSON for one view
+
+    Elevations lie in the X/Z plane at a fixed Y (like South), plans in the
+    X/Y plane at a fixed Z. Tags are 10 model units square, spread uniformly
+    over the crop box, with a few outside it as in real exports.
+    """
+    rng = random.Random(f"{seed}-{count}-{width}x{height}-{view}")
+    aspect = height / float(width)
+    x_min, x_max = -133.0, 125.0
+    v_min = -(x_max - x_min) * aspect
+    v_max = 0.0
+    plane = -21.58
+
+    if view == "elevation":
+        def point(h, v):
+            return {"x": h, "y": plane, "z": v}
+        crop = {"min": {"x": x_min, "y": plane, "z": v_min}, "max": {"x": x_max, "y": 100.0, "z": v_max}}
+        view_name, view_type = "South", "Elevation"
+    else:
+        def point(h, v):
+            return {"x": h, "y": v, "z": 0.0}
+        crop = {"min": {"x": x_min, "y": v_min, "z": 0.0}, "max": {"x": x_max, "y": v_max, "z": 10.0}}
+        view_name, view_type = "Level 1", "FloorPlan"
+
+    corners = {
+        "TopLeft": point(x_min, v_max),
+        "TopRight": point(x_max, v_max),
+        "BottomLeft": point(x_min, v_min),
+        "BottomRight": point(x_max, v_min),
+        "Center": point((x_min + x_max) / 2, (v_min + v_max) / 2),
+    }
+
+    annotations = []
+    for i in range(count):
+        # ~5% of tags sit slightly outside the crop region
+        spread = 1.1 if rng.random() < 0.05 else 1.0
+        h1 = rng.uniform(x_min, x_max - 10) * spread
+        v1 = rng.uniform(v_min, v_max - 10) * spread
+        h2, v2 = h1 + 10, v1 + 10
+        u1, u2 = (h1 - x_min) / (x_max - x_min), (h2 - x_min) / (x_max - x_min)
+        w1, w2 = (v1 - v_min) / (v_max - v_min), (v2 - v_min) / (v_max - v_min)
+        tag_type = rng.choice(TAG_TYPES)
+        annotations.append({
+            "type": tag_type,
+            "elementId": str(100000 + i),
+            "tagId": str(2000000 + i),
+            "text": str(rng.randint(1, 999)) if tag_type != "RoomTag" else f"Room {i}",
+            "bbox3D": {"min": point(h1, v1), "max": point(h2, v2)},
+            "bbox2D": {"min": {"x": h1, "y": v1}, "max": {"x": h2, "y": v2}},
+            "uvBBox": {"min": {"u": u1, "v": 1.0 - w2}, "max": {"u": u2, "v": 1.0 - w1}},
+            "bboxViewport": {"min": {"u": u1, "v": w1}, "max": {"u": u2, "v": w2}}
+        })
+
+    return {
+        "viewId": str(855058 + seed),
+        "viewName": view_name,
+        "viewType": view_type,
+        "imageWidth": width,
+        "imageHeight": height,
+        "imagePath": image_path,
+        "cropBox": crop,
+        "viewportCorners": corners,
+        "annotations": annotations
+    }
+
+
+def write_case(directory: str, count: int, width: int, height: int, view: str, seed: int = 0) -> Tuple[str, str]:
+    """Write a blank PNG and its annotations JSON; return (json_path, image_path)"""
+    from PIL import Image
+
+    os.makedirs(directory, exist_ok=True)
+    data_name = "South" if view == "elevation" else "Level 1"
+    image_path = os.path.join(directory, f"{data_name} - {view} - {width}x{height}.png")
+    json_path = os.path.join(directory, f"{data_name}.annotations.json")
+
+    Image.new("RGB", (width, height), (255, 255, 255)).save(image_path)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(generate_annotations(count, width, height, view, seed, image_path), f)
+    return json_path, image_path
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> Tuple[float, Any]:
+    """Fastest wall time of `repeat` runs and the result of the last run"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def max_rss_mb() -> Optional[float]:
+    """Process peak resident set size; None where the resource module is missing"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / MB if sys.platform == "darwin" else peak / 1024.0
+
+
+def time_stages(json_path: str, image_path: str, repeat: int) -> Dict[str, Any]:
+    """Time each overlay stage on one case"""
+    from PIL import Image, ImageDraw
+    import draw_annotations
+    import overlay_boxes
+
+    timings = {}
+    timings["json_load"], data = best_of(repeat, lambda: draw_annotations.load_json(json_path))
+    timings["image_load"], img = best_of(repeat, lambda: Image.open(image_path).convert("RGBA"))
+    img_w, img_h = img.size
+    annotations = data.get("annotations", [])
+
+    def map_all():
+        boxes = []
+        for ann in annotations:
+            bbox, _ = draw_annotations.annotation_box(ann, data, img_w, img_h)
+            if bbox:
+                boxes.append((draw_annotations.fit_box(bbox, img_w, img_h), ann))
+        return boxes
+    timings["mapping"], boxes = best_of(repeat, map_all)
+
+    crop = data.get("cropBox") or {}
+    is_elevation = data.get("viewType", "").lower() in ["elevation", "section"]
+    timings["mapping_overlay"], _ = best_of(repeat, lambda: [
+        overlay_boxes.annotation_pixel_box(a, crop.get("min") or {}, crop.get("max") or {}, is_elevation, img_w, img_h)
+        for a in annotations
+    ])
+
+    # Drawing mutates the image, so every run starts from a fresh copy; the copy is not timed
+    def timed_on_copy(draw_fn):
+        best = None
+        canvas = None
+        for _ in range(repeat):
+            canvas = img.copy()
+            draw = ImageDraw.Draw(canvas)
+            start = time.perf_counter()
+            draw_fn(draw)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, canvas
+
+    def draw_boxes(draw):
+        for (x1, y1, x2, y2), _ in boxes:
+            draw.rectangle([(x1, y1), (x2, y2)], outline=(0, 102, 255, 255), width=4)
+    timings["draw"], _ = timed_on_copy(draw_boxes)
+
+    font_size = 12
+    font = draw_annotations.get_font(font_size)
+
+    def draw_labels(draw):
+        for (x1, y1, _, _), ann in boxes:
+            text = ann.get("text", "").strip() or ann.get("type", "Tag")
+            draw_annotations.draw_label(draw, text, x1, y1, font, font_size)
+    timings["labels"], canvas = timed_on_copy(draw_labels)
+
+    def encode():
+        buffer = io.BytesIO()
+        canvas.save(buffer, "PNG")
+        return buffer.tell()
+    timings["encode"], encoded_bytes = best_of(repeat, encode)
+
+    return {
+        "stages": timings,
+        "drawn": len(boxes),
+        "encoded_bytes": encoded_bytes,
+        "image_buffer_mb": img_w * img_h * 4 / MB
+    }
+
+
+def peak_python_memory(json_path: str, image_path: str) -> float:
+    """Peak Python heap in MB of one untimed pass (tracemalloc slows everything down)"""
+    from PIL import Image, ImageDraw
+    import draw_annotations
+
+    tracemalloc.start()
+    try:
+        data = draw_annotations.load_json(json_path)
+        img = Image.open(image_path).convert("RGBA")
+        img_w, img_h = img.size
+        draw = ImageDraw.Draw(img)
+        font = draw_annotations.get_font(12)
+        for ann in data.get("annotations", []):
+            bbox, _ = draw_annotations.annotation_box(ann, data, img_w, img_h)
+            if not bbox:
+                continue
+            x1, y1, x2, y2 = draw_annotations.fit_box(bbox, img_w, img_h)
+            draw.rectangle([(x1, y1), (x2, y2)], outline=(0, 102, 255, 255), width=4)
+            draw_annotations.draw_label(draw, ann.get("text", "").strip() or ann.get("type", "Tag"), x1, y1, font, 12)
+        img.save(io.BytesIO(), "PNG")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / MB
+
+
+def time_end_to_end(json_path: str, work_dir: str, repeat: int) -> Dict[str, Optional[float]]:
+    """Time the overlay scripts as users run them, with their output silenced"""
+    import draw_annotations
+    import overlay_boxes
+
+    def silenced(fn):
+        def run():
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                return fn()
+        return run
+
+    results = {}
+    results["draw_annotations"], _ = best_of(repeat, silenced(lambda: draw_annotations.draw_annotations_on_image(
+        json_path, os.path.join(work_dir, "out.annotated.png"))))
+    results["overlay_boxes"], _ = best_of(repeat, silenced(lambda: overlay_boxes.overlay_boxes(
+        json_path, None, os.path.join(work_dir, "out.boxes.png"))))
+
+    # fix_annotations lives at the repository root and only has a main()
+    try:
+        import fix_annotations
+    except ImportError:
+        results["fix_annotations"] = None
+    else:
+        def run_fix():
+            argv = sys.argv
+            sys.argv = ["fix_annotations.py", json_path, os.path.join(work_dir, "out.fixed.png")]
+            try:
+                fix_annotations.main()
+            finally:
+                sys.argv = argv
+        results["fix_annotations"], _ = best_of(repeat, silenced(run_fix))
+    return results
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Overlay Rendering Micro-benchmarks")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Annotations per view")
+    parser.add_argument("--sizes", nargs="+", default=["2000x949", "4000x1898", "16000x7592"], help="Image sizes WxH")
+    parser.add_argument("--views", nargs="+", choices=["elevation", "plan"], default=["elevation", "plan"],
+                        help="View kinds")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept")
+    parser.add_argument("--no-end-to-end", action="store_true", help="Skip the end-to-end script timings")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", default="bench_overlay.json", help="Results file")
+
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec("PIL") is None:
+        print("ERROR: Pillow (PIL) is not installed. Install with: python3 -m pip install pillow", file=sys.stderr)
+        sys.exit(1)
+
+    results = {"created": datetime.now().isoformat(timespec="seconds"), "cases": []}
+    work_root = tempfile.mkdtemp(prefix="rve-overlay-bench-")
+    try:
+        for view in args.views:
+            for size in args.sizes:
+                width, height = parse_size(size)
+                for count in args.counts:
+                    case_dir = os.path.join(work_root, f"{view}_{width}x{height}_{count}")
+                    json_path, image_path = write_case(case_dir, count, width, height, view, args.seed)
+
+                    case = {"view": view, "width": width, "height": height, "annotations": count}
+                    case.update(time_stages(json_path, image_path, args.repeat))
+                    case["peak_python_mb"] = peak_python_memory(json_path, image_path)
+                    if not args.no_end_to_end:
+                        case["end_to_end"] = time_end_to_end(json_path, case_dir, args.repeat)
+                    case["max_rss_mb"] = max_rss_mb()
+                    results["cases"].append(case)
+
+                    stages = "  ".join(f"{stage} {case['stages'][stage] * 1000:.1f}" for stage in STAGES)
+                    print(f"📊 {view} {width}x{height} x{count}: {stages} ms | "
+                          f"heap {case['peak_python_mb']:.1f} MB, image {case['image_buffer_mb']:.0f} MB")
+                    shutil.rmtree(case_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Pipeline Throughput Benchmark
+
+Runs the cloud pipeline (auth -> upload -> workitem -> download) over
+synthetic Revit files and reports how it scales with file count, file size
+and concurrency. By default everything runs against the local APS stand-in
+(mock_aps.py), so results are repeatable and cost nothing.
+
+Each scenario is one combination of --files x --sizes x --concurrency. For
+every scenario the results record:
+- wall time and throughput (files/s, upload MB/s)
+- per-stage latency percentiles: auth, upload, submit, queue, run,
+  poll_lag (finish -> noticed by the poller) and download
+- request counts per endpoint and bytes moved (stand-in only)
+
+Results are written as JSON. With --baseline the run is compared against a
+stored result file and exits with status 1 when throughput or a stage p50/p95
+regressed by more than --tolerance, so it can be used as a CI gate.
+
+Usage:
+    python bench_pipeline.py [options]
+
+Options:
+    --files N [N ...]        File counts (default: 10)
+    --sizes P [P ...]        Size profiles: tiny, small, medium, large, mixed (default: small)
+    --concurrency N [N ...]  Workitems in flight (default: 1 5)
+    --queue-time S           Stand-in workitem queue time (default: 0.5)
+    --run-time S             Stand-in workitem run time (default: 1.0)
+    --latency MS             Stand-in latency per request (default: 5)
+    --failure-rate P         Stand-in workitem failure rate (default: 0)
+    --throttle-rate P        Stand-in 429 rate on DA requests (default: 0)
+    --base-url URL           Benchmark an already running server instead
+    --output PATH            Results file (default: bench_results.json)
+    --baseline PATH          Compare with a previous results file
+    --tolerance F            Allowed relative regression (default: 0.25)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from tracing import summarize
+
+MB = 1024 * 1024
+OLE_SIGNATURE = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"
+STAGES = ["auth", "upload", "submit", "queue", "run", "poll_lag", "download"]
+
+# (min MB, max MB) of each profile; "mixed" draws from all of them
+SIZE_PROFILES = {
+    "tiny": (0.01, 0.1),
+    "small": (0.1, 2),
+    "medium": (2, 20),
+    "large": (20, 100),
+}
+
+# Stages faster than this are too noisy to gate on
+MIN_GATED_SECONDS = 0.005
+
+
+def generate_files(directory: str, count: int, profile: str, seed: int = 0) -> List[str]:
+    """Write `count` synthetic .rvt files (OLE signature + random bytes)"""
+    rng = random.Random(f"{seed}-{profile}-{count}")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        name = profile if profile != "mixed" else rng.choice(sorted(SIZE_PROFILES))
+        low, high = SIZE_PROFILES[name]
+        size = max(len(OLE_SIGNATURE), int(rng.uniform(low, high) * MB))
+        path = os.path.join(directory, f"bench_{i:05d}.rvt")
+        with open(path, "wb") as f:
+            f.write(OLE_SIGNATURE)
+            remaining = size - len(OLE_SIGNATURE)
+            while remaining > 0:
+                chunk = min(MB, remaining)
+                f.write(rng.randbytes(chunk))
+                remaining -= chunk
+        paths.append(path)
+    return paths
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of a DA ISO timestamp"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def workitem_stages(stats: Dict[str, Any], submitted_at: float, finished_at: float) -> Dict[str, float]:
+    """Split a workitem's wall time into submit/queue/run/poll_lag from DA stats"""
+    queued = parse_timestamp(stats.get("timeQueued"))
+    started = parse_timestamp(stats.get("timeDownloadStarted"))
+    ended = parse_timestamp(stats.get("timeUploadEnded") or stats.get("timeFinished"))
+    stages = {}
+    if queued is not None:
+        stages["submit"] = max(0.0, queued - submitted_at)
+    if queued is not None and started is not None:
+        stages["queue"] = max(0.0, started - queued)
+    if started is not None and ended is not None:
+        stages["run"] = max(0.0, ended - started)
+    if ended is not None:
+        stages["poll_lag"] = max(0.0, finished_at - ended)
+    return stages
+
+
+def process_one(file_path: str, bucket: str, output_dir: str) -> Dict[str, Any]:
+    """Run one file through the pipeline, timing each stage"""
+    import batch_process
+    import upload_and_process
+    from config import APS_BASE_URL
+
+    record = {"file": file_path, "size": os.path.getsize(file_path), "stages": {}, "ok": False}
+    stages = record["stages"]
+
+    start = time.perf_counter()
+    token = batch_process.get_access_token()
+    stages["auth"] = time.perf_counter() - start
+    if not token:
+        record["error"] = "auth"
+        return record
+
+    start = time.perf_counter()
+    # Content-addressed uploads pick their pool bucket by size; `bucket` only holds results
+    file_url = upload_and_process.upload_file(token, None, file_path)
+    stages["upload"] = time.perf_counter() - start
+    if not file_url:
+        record["error"] = "upload"
+        return record
+
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    workitem_data = {
+        "activityId": "Autodesk.Nop+Latest",
+        "arguments": {
+            "inputFile": {"url": file_url},
+            "result": {"verb": "put", "url": f"{APS_BASE_URL}/oss/v2/buckets/{bucket}/objects/{stem}.result.json"}
+        }
+    }
+    submitted_at = time.time()
+    status_data = batch_process.run_workitem(workitem_data, file_path)
+    finished_at = time.time()
+    if not status_data:
+        record["error"] = "workitem"
+        return record
+    stages.update(workitem_stages(status_data.get("stats") or {}, submitted_at, finished_at))
+
+    start = time.perf_counter()
+    batch_process.download_outputs(status_data, output_dir, stem)
+    stages["download"] = time.perf_counter() - start
+
+    record["ok"] = True
+    return record
+
+
+def fetch_server_stats(base_url: str) -> Optional[Dict[str, Any]]:
+    """Request/byte counters of the stand-in server; None for other servers"""
+    import requests
+    try:
+        response = requests.get(f"{base_url}/_mock/stats", timeout=5)
+    except requests.RequestException:
+        return None
+    return response.json() if response.status_code == 200 else None
+
+
+def run_scenario(files: List[str], concurrency: int, work_dir: str, base_url: str) -> Dict[str, Any]:
+    """Process all files with `concurrency` workitems in flight"""
+    import upload_and_process
+    from da_scheduler import WorkitemScheduler
+
+    token = upload_and_process.get_access_token()
+    bucket = upload_and_process.create_bucket(token)
+    if not bucket:
+        raise RuntimeError("Failed to create benchmark bucket")
+
+    output_dir = os.path.join(work_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    records = []
+    start = time.perf_counter()
+    with WorkitemScheduler(max_in_flight=concurrency) as scheduler:
+        futures = [scheduler.submit(process_one, path, bucket, output_dir) for path in files]
+        for future in futures:
+            try:
+                records.append(future.result())
+            except Exception as exc:
+                records.append({"ok": False, "error": str(exc), "stages": {}, "size": 0})
+    wall = time.perf_counter() - start
+
+    ok = [r for r in records if r["ok"]]
+    stages = summarize({stage: [r["stages"][stage] for r in ok if stage in r["stages"]] for stage in STAGES})
+    total_bytes = sum(r["size"] for r in ok)
+    upload_time = sum(r["stages"].get("upload", 0) for r in ok)
+    result = {
+        "files": len(files),
+        "concurrency": concurrency,
+        "succeeded": len(ok),
+        "failed": len(records) - len(ok),
+        "bytes": total_bytes,
+        "wall_seconds": wall,
+        "throughput_files_per_s": len(ok) / wall if wall else 0.0,
+        "upload_mb_per_s": (total_bytes / MB) / upload_time if upload_time else None,
+        "stages": {
+            stage: stages.get(stage, {"count": 0}) for stage in STAGES
+        }
+    }
+
+    server_stats = fetch_server_stats(base_url)
+    if server_stats:
+        result["requests"] = server_stats["requests"]
+        result["bytes_in"] = server_stats["bytesIn"]
+        result["bytes_out"] = server_stats["bytesOut"]
+    return result
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List of regressions of `results` against `baseline`"""
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+
+        old_tp, new_tp = old.get("throughput_files_per_s"), scenario.get("throughput_files_per_s")
+        if old_tp and new_tp is not None and new_tp < old_tp * (1 - tolerance):
+            regressions.append(f"{name}: throughput {new_tp:.2f} < {old_tp:.2f} files/s")
+
+        for stage in STAGES:
+            for pct in ("p50", "p95"):
+                old_value = old.get("stages", {}).get(stage, {}).get(pct)
+                new_value = scenario.get("stages", {}).get(stage, {}).get(pct)
+                if old_value is None or new_value is None:
+                    continue
+                if max(old_value, new_value) < MIN_GATED_SECONDS:
+                    continue
+                if new_value > old_value * (1 + tolerance):
+                    regressions.append(f"{name}: {stage} {pct} {new_value * 1000:.0f} ms > {old_value * 1000:.0f} ms")
+    return regressions
+
+
+def print_scenario(name: str, result: Dict[str, Any]):
+    print(f"\n📊 {name}: {result['succeeded']}/{result['files']} ok in {result['wall_seconds']:.1f}s "
+          f"({result['throughput_files_per_s']:.2f} files/s)")
+    for stage in STAGES:
+        summary = result["stages"][stage]
+        if summary["count"]:
+            print(f"   {stage:<9} p50 {summary['p50'] * 1000:8.1f} ms   p95 {summary['p95'] * 1000:8.1f} ms   "
+                  f"max {summary['max'] * 1000:8.1f} ms")
+    if "requests" in result:
+        print(f"   {sum(result['requests'].values())} requests, "
+              f"{result['bytes_in'] / MB:.1f} MB in, {result['bytes_out'] / MB:.1f} MB out")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Pipeline Throughput Benchmark")
+    parser.add_argument("--files", type=int, nargs="+", default=[10], help="File counts")
+    parser.add_argument("--sizes", nargs="+", default=["small"], choices=sorted(SIZE_PROFILES) + ["mixed"],
+                        help="Size profiles")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5], help="Workitems in flight")
+    parser.add_argument("--queue-time", type=float, default=0.5, help="Stand-in workitem queue time in seconds")
+    parser.add_argument("--run-time", type=float, default=1.0, help="Stand-in workitem run time in seconds")
+    parser.add_argument("--latency", type=float, default=5, help="Stand-in latency per request in ms")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Stand-in workitem failure rate")
+    parser.add_argument("--throttle-rate", type=float, default=0, help="Stand-in 429 rate on DA requests")
+    parser.add_argument("--submit-rate", type=float, default=50, help="Workitem submissions per second")
+    parser.add_argument("--status-rate", type=float, default=200, help="Workitem status reads per second")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Seconds between status reads")
+    parser.add_argument("--base-url", help="Benchmark an already running server instead of the stand-in")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for files and the stand-in")
+    parser.add_argument("--output", default="bench_results.json", help="Results file")
+    parser.add_argument("--baseline", help="Compare with a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+
+    args = parser.parse_args(argv)
+    if args.submit_rate <= 0 or args.status_rate <= 0:
+        parser.error("--submit-rate and --status-rate must be above zero")
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
+    else:
+        from mock_aps import MockConfig, MockState, start_server
+        server = start_server(MockConfig(seed=args.seed))
+        base_url = server.base_url
+        print(f"🧪 Using local APS stand-in at {base_url}")
+
+    # Must be set before the pipeline modules import config
+    os.environ["APS_BASE_URL"] = base_url
+
+    import batch_process
+    from da_scheduler import limiter
+    batch_process.POLL_INTERVAL = args.poll_interval
+    limiter.configure(submit_rate=args.submit_rate, status_rate=args.status_rate,
+                      submit_burst=max(args.concurrency), status_burst=max(args.concurrency))
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "base_url": base_url if args.base_url else "stand-in",
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "scenarios": {}
+    }
+
+    work_root = tempfile.mkdtemp(prefix="rve-bench-")
+    try:
+        for size_profile in args.sizes:
+            for file_count in args.files:
+                files = generate_files(os.path.join(work_root, f"{size_profile}_{file_count}"),
+                                       file_count, size_profile, args.seed)
+                for concurrency in args.concurrency:
+                    if server:
+                        # Fresh state per scenario so request counts are per scenario
+                        server.state = MockState(MockConfig(
+                            latency=args.latency / 1000.0,
+                            queue_time=args.queue_time,
+                            run_time=args.run_time,
+                            failure_rate=args.failure_rate,
+                            throttle_rate=args.throttle_rate,
+                            discard_bytes=True,
+                            seed=args.seed
+                        ))
+                    name = f"{file_count}x{size_profile}@{concurrency}"
+                    result = run_scenario(files, concurrency, os.path.join(work_root, name), base_url)
+                    result["size_profile"] = size_profile
+                    results["scenarios"][name] = result
+                    print_scenario(name, result)
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+        if server:
+            server.shutdown()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
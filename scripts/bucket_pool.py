@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - OSS Bucket Pool
+
+Uploads go to a small set of long-lived buckets per retention policy instead
+of a new bucket per run, which runs into the per-application bucket limit:
+
+    <client id>-rve-transient-0 ... -3    objects expire after 24 hours
+    <client id>-rve-temporary-0 ... -3    objects expire after 30 days
+    <client id>-rve-persistent-0 ... -3   objects are kept
+
+Object keys are content addressed and sharded by hash prefix,
+`ab/ab12...ef.rvt`. The bucket within the pool is picked by file size, which
+equal contents share and which is known before the file is read, so an
+upload that hashes while it sends (upload_stream.py) knows its bucket. A
+content-addressed key therefore only identifies an object together with its
+size: every upload or lookup of one must get its bucket from
+bucket_for(token, size), never from a bucket picked without the size.
+Objects that are not content addressed (output bundles, staging uploads)
+are only reached through the bucket recorded when they were created. Each
+bucket is checked (GET details, created on 404) once per process and then
+trusted, so bucket handling costs nothing per file.
+
+Because keys are content addressed, a model another machine already uploaded
+is found under the same key: remote_match() compares the local size and SHA-1
+with the object details OSS keeps, and a match means the upload can be
+skipped.
+
+Pool buckets are shared between runs and machines; they are never
+registered with lifecycle for deletion.
+
+Usage:
+    python bucket_pool.py [--policy POLICY] [--ensure] [--json]
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import aps_client
+import metrics
+from config import CLIENT_ID, APS_BASE_URL
+from tracing import tracer
+
+POLICIES = ("transient", "temporary", "persistent")
+DEFAULT_POLICY = "transient"
+BUCKETS_PER_POLICY = 4
+CHUNK = 8 * 1024 * 1024
+OSS_BUCKETS_URL = f"{APS_BASE_URL}/oss/v2/buckets"
+
+
+def file_digests(file_path: str) -> Tuple[str, str, int]:
+    """SHA-256 (the object key), SHA-1 (what OSS reports) and size of a file, in one read"""
+    sha256, sha1 = hashlib.sha256(), hashlib.sha1()
+    size = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            sha256.update(chunk)
+            sha1.update(chunk)
+            size += len(chunk)
+    return sha256.hexdigest(), sha1.hexdigest(), size
+
+
+def object_key(content_hash: str, file_name: str) -> str:
+    """Content-addressed object key, sharded by the first hash byte"""
+    return f"{content_hash[:2]}/{content_hash}{os.path.splitext(file_name)[1].lower()}"
+
+
+def object_url(bucket_key: str, key: str) -> str:
+    """OSS URL of an object; for a content-addressed key, `bucket_key` comes from bucket_for(token, size)"""
+    return f"{OSS_BUCKETS_URL}/{bucket_key}/objects/{quote(key, safe='')}"
+
+
+def object_details(token: str, bucket_key: str, key: str) -> Optional[Dict[str, Any]]:
+    """OSS details (size, sha1, ...) of an object, None when it does not exist"""
+    with tracer.span("details", bucket=bucket_key) as span:
+        response = aps_client.session().get(f"{object_url(bucket_key, key)}/details",
+                                            headers={"Authorization": f"Bearer {token}"})
+        span.set(status_code=response.status_code)
+    metrics.observe_response("details", response)
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code != 404:
+        print(f"Failed to get details of {bucket_key}/{key}: {response.status_code} - {response.text}")
+    return None
+
+
+def remote_match(token: str, bucket_key: str, key: str, sha1: str, size: int) -> bool:
+    """True when OSS already holds these exact bytes under `key`"""
+    details = object_details(token, bucket_key, key)
+    if not details or details.get("size") != size or str(details.get("sha1", "")).lower() != sha1:
+        return False
+    metrics.upload_dedupe_bytes.inc(size)
+    return True
+
+
+class BucketPool:
+    """Long-lived buckets per retention policy, verified once per process"""
+
+    def __init__(self, owner: str = CLIENT_ID, size: int = BUCKETS_PER_POLICY):
+        self.owner = owner.lower()
+        self.size = size
+        self._verified = set()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def bucket_name(self, policy: str, index: int) -> str:
+        return f"{self.owner}-rve-{policy}-{index}"
+
+    def shard(self, size: Optional[int]) -> int:
+        return size % self.size if size else 0
+
+    def bucket_for(self, token: str, size: Optional[int] = None,
+                   policy: str = DEFAULT_POLICY) -> Optional[str]:
+        """Pool bucket for a file of `size` bytes (the first bucket without one), ensured to exist
+
+        Content-addressed objects must pass their size, so that every machine
+        looks for a key in the bucket it was uploaded to.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown retention policy: {policy}")
+        bucket_key = self.bucket_name(policy, self.shard(size))
+        return bucket_key if self.ensure(token, bucket_key, policy) else None
+
+    def ensure(self, token: str, bucket_key: str, policy: str = DEFAULT_POLICY) -> bool:
+        """Make sure the bucket exists; only the first call per bucket talks to OSS"""
+        if bucket_key in self._verified:
+            return True
+        with self._lock:
+            lock = self._locks.setdefault(bucket_key, threading.Lock())
+        with lock:
+            if bucket_key in self._verified:
+                return True
+            http = aps_client.session()
+            headers = {"Authorization": f"Bearer {token}"}
+            with tracer.span("bucket", bucket=bucket_key) as span:
+                response = http.get(f"{OSS_BUCKETS_URL}/{bucket_key}/details", headers=headers)
+                metrics.observe_response("bucket", response)
+                if response.status_code == 404:
+                    response = http.post(OSS_BUCKETS_URL, headers=dict(headers, **{"Content-Type": "application/json"}),
+                                         json={"bucketKey": bucket_key, "policyKey": policy})
+                    metrics.observe_response("bucket", response)
+                    if response.status_code == 200:
+                        print(f"Created bucket: {bucket_key} ({policy})")
+                span.set(status_code=response.status_code)
+            # 409: created concurrently by another process since our GET
+            if response.status_code not in (200, 409):
+                print(f"Failed to verify bucket {bucket_key}: {response.status_code} - {response.text}")
+                return False
+            self._verified.add(bucket_key)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"buckets_verified": len(self._verified)}
+
+
+# Shared pool used by the scripts
+buckets = BucketPool()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - OSS Bucket Pool")
+    parser.add_argument("--policy", choices=POLICIES, default=DEFAULT_POLICY, help="Retention policy")
+    parser.add_argument("--ensure", action="store_true", help="Create missing pool buckets")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    names = [buckets.bucket_name(args.policy, i) for i in range(buckets.size)]
+    status = {name: None for name in names}
+    if args.ensure:
+        token = aps_client.get_token("bucket:create bucket:read")
+        if not token:
+            sys.exit(1)
+        status = {name: buckets.ensure(token, name, args.policy) for name in names}
+
+    if args.json:
+        print(json.dumps(status, indent=2))
+    else:
+        for name, ok in status.items():
+            print(f"{'✅' if ok else '❌' if ok is False else '🪣'} {name}")
+    if False in status.values():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
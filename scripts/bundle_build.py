@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Deterministic Appbundle Builder
+
+Builds the Design Automation appbundle zip from the Bundle/ folder
+(PackageContents.xml, Contents/...) so that the same input files always give
+the same zip bytes: entries sorted by name, fixed timestamps and
+permissions, fixed compression level, no directory entries and no
+.DS_Store/Thumbs.db files.
+
+The content hash (SHA-256 over entry names and bytes) identifies a bundle
+independently of how it was zipped; an existing bundle zip and the folder it
+was made from hash the same. da_deploy.py compares it with the deployed
+version and uploads only when the bytes changed.
+
+Usage:
+    python bundle_build.py <Bundle dir|bundle.zip> [options]
+
+Options:
+    --output FILE  Write the deterministic zip to FILE
+    --json         Output in JSON format
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import zipfile
+from typing import BinaryIO, Iterator, List, Tuple
+
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)  # Earliest date a zip entry can hold
+FILE_MODE = 0o644
+COMPRESS_LEVEL = 9
+CHUNK = 1024 * 1024
+EXCLUDED = {".DS_Store", "Thumbs.db", "desktop.ini"}  # File-manager droppings, not part of the bundle
+
+
+def _included(name: str) -> bool:
+    return not any(part in EXCLUDED or part == "__MACOSX" for part in name.split("/"))
+
+
+def bundle_entries(source: str) -> List[Tuple[str, str]]:
+    """(entry name, location) pairs sorted by entry name
+
+    For a folder the location is a file path; for a zip it is the member name.
+    """
+    if os.path.isdir(source):
+        entries = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in files:
+                path = os.path.join(root, name)
+                entries.append((os.path.relpath(path, source).replace(os.sep, "/"), path))
+        return sorted(entry for entry in entries if _included(entry[0]))
+    with zipfile.ZipFile(source) as archive:
+        return sorted((info.filename, info.filename) for info in archive.infolist()
+                      if not info.is_dir() and _included(info.filename))
+
+
+def _read_entries(source: str) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """Yield (entry name, chunk iterator) in entry order"""
+    entries = bundle_entries(source)
+    if os.path.isdir(source):
+        for name, path in entries:
+            with open(path, "rb") as f:
+                yield name, iter(lambda: f.read(CHUNK), b"")
+    else:
+        with zipfile.ZipFile(source) as archive:
+            for name, member in entries:
+                with archive.open(member) as f:
+                    yield name, iter(lambda: f.read(CHUNK), b"")
+
+
+def content_hash(source: str) -> str:
+    """SHA-256 over entry names and contents, independent of zip metadata"""
+    digest = hashlib.sha256()
+    for name, chunks in _read_entries(source):
+        digest.update(name.encode("utf-8") + b"\0")
+        entry = hashlib.sha256()
+        for chunk in chunks:
+            entry.update(chunk)
+        digest.update(entry.digest())
+    return digest.hexdigest()
+
+
+def write_bundle(source: str, output: BinaryIO) -> str:
+    """Write the deterministic zip of `source` to a binary file object; returns the content hash"""
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL) as archive:
+        for name, chunks in _read_entries(source):
+            info = zipfile.ZipInfo(name, date_time=FIXED_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = FILE_MODE << 16
+            info.create_system = 3  # Unix, whatever the building OS
+            entry = hashlib.sha256()
+            with archive.open(info, "w") as f:
+                for chunk in chunks:
+                    entry.update(chunk)
+                    f.write(chunk)
+            digest.update(name.encode("utf-8") + b"\0")
+            digest.update(entry.digest())
+    return digest.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Deterministic Appbundle Builder")
+    parser.add_argument("source", help="Bundle folder or existing bundle zip")
+    parser.add_argument("--output", help="Write the deterministic zip to this file")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"❌ Bundle source not found: {args.source}")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            bundle_hash = write_bundle(args.source, f)
+    else:
+        bundle_hash = content_hash(args.source)
+
+    result = {"source": args.source, "entries": [name for name, _ in bundle_entries(args.source)],
+              "hash": bundle_hash}
+    if args.output:
+        result["output"] = args.output
+        result["size"] = os.path.getsize(args.output)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"📦 {args.source}: {len(result['entries'])} entries, sha256 {bundle_hash}")
+        if args.output:
+            print(f"✅ Wrote {args.output} ({result['size']} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Design Automation Deployment Registry
+
+Keeps a local manifest of the deployed activity and appbundle: qualified id,
+version, alias and a content hash of the definition. An extraction run
+resolves `owner.RevitViewExtractor+prod` from the manifest without any
+setup call; Design Automation is consulted only when the manifest is missing
+or the local activity definition changed (different hash):
+
+- the appbundle alias is looked up (and created on the latest version if
+  missing)
+- an existing activity alias whose version has the same definition is
+  adopted as is
+- otherwise a new activity version is created and the alias moved to it
+
+`publish` deploys the add-in itself. The bundle is built deterministically
+(bundle_build.py) and its content hash compared with the manifest, then with
+the hash tagged in the description of the version the alias points to, so a
+fresh CI runner needs no manifest. Only changed bytes are zipped (into a
+spooled buffer, not a file next to the sources), streamed into the upload
+form and made the new aliased version.
+
+Models are opened on the Revit engine they were saved with (the release
+year is read locally from the file by rvt_file.py); opening an older model on
+a newer engine upgrades it first, which takes minutes in Design Automation.
+Each engine year has its own activity and appbundle, named with the year
+except for DEFAULT_YEAR (`RevitViewExtractor_2024`, `RevitViewExtractor4_2024`),
+and its own manifest entries. Models older than the oldest engine go to the
+oldest one. Each appbundle needs an add-in built against that year's API,
+published with `publish SOURCE --engine YEAR`.
+
+The manifest lives in ~/.rve/deployments.json (or $RVE_DEPLOYMENTS), with one
+section per APS base URL and client id. An engine year with no appbundle in
+Design Automation is recorded as missing, with the time it was checked, and
+not looked up again for MISSING_TTL seconds; its models go straight to the
+fallback engine. `reconcile` and `publish` always check.
+
+Usage:
+    python da_deploy.py status [--json]     Show the cached deployment
+    python da_deploy.py reconcile [--force] [--engine YEAR]
+                                            Check against Design Automation
+    python da_deploy.py publish [SOURCE] [--force] [--engine YEAR]
+                                            Upload the bundle (default: Bundle/) if changed
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import calendar
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import aps_client
+import bundle_build
+import metrics
+import output_bundle
+import view_selection
+import workitem_packing
+from config import CLIENT_ID, APS_BASE_URL
+from tracing import tracer
+
+DEFAULT_MANIFEST = os.environ.get("RVE_DEPLOYMENTS") or os.path.join(os.path.expanduser("~"), ".rve",
+                                                                     "deployments.json")
+DA_URL = f"{APS_BASE_URL}/da/us-east/v3"
+
+ACTIVITY_NAME = "RevitViewExtractor"
+APPBUNDLE_NAME = "RevitViewExtractor4"
+ALIAS = "prod"
+ENGINE_YEARS = (2022, 2023, 2024, 2025, 2026)  # Revit engines Design Automation offers
+DEFAULT_YEAR = 2026
+BUNDLE_DESCRIPTION = "Extract views from Revit models"
+BUNDLE_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Bundle")
+SPOOL_SIZE = 64 * 1024 * 1024  # bundles up to this size are zipped in memory
+HASH_TAG = re.compile(r"\[sha256:([0-9a-f]{64})\]")
+MISSING_TTL = 6 * 60 * 60  # seconds before an engine without an appbundle is checked again
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Fields that decide whether a deployed activity version matches ours
+HASHED_FIELDS = ("commandLine", "parameters", "engine", "appbundles")
+
+
+def engine_id(year: int = DEFAULT_YEAR) -> str:
+    return f"Autodesk.Revit+{year}"
+
+
+def engine_year(saved_year: Optional[int]) -> Optional[int]:
+    """Engine year to open a model saved by `saved_year` without upgrading it
+
+    Unknown versions use DEFAULT_YEAR; models older than the oldest engine
+    use the oldest one. None for models newer than every engine, which no
+    engine can open.
+    """
+    if saved_year is None:
+        return DEFAULT_YEAR
+    if saved_year > ENGINE_YEARS[-1]:
+        return None
+    return max(ENGINE_YEARS[0], saved_year)
+
+
+def activity_name(year: int = DEFAULT_YEAR) -> str:
+    return ACTIVITY_NAME if year == DEFAULT_YEAR else f"{ACTIVITY_NAME}_{year}"
+
+
+def appbundle_name(year: int = DEFAULT_YEAR) -> str:
+    return APPBUNDLE_NAME if year == DEFAULT_YEAR else f"{APPBUNDLE_NAME}_{year}"
+
+
+def activity_definition(owner: str = CLIENT_ID, year: int = DEFAULT_YEAR) -> Dict[str, Any]:
+    """The activity the extraction scripts submit workitems to, on the `year` engine"""
+    bundle = appbundle_name(year)
+    return {
+        "id": activity_name(year),
+        "commandLine": [
+            f"\"$(engine.path)\\\\revit.exe\" /i \"$(args[inputFile].path)\" /al \"$(appbundles[{bundle}].path)\""
+        ],
+        "parameters": {
+            # Pack workitems pass inputPack/resultPack instead of inputFile
+            "inputFile": {
+                "verb": "get",
+                "description": "Input Revit file",
+                "required": False,
+                "localName": "input.rvt"
+            },
+            "result": {
+                "verb": "put",
+                "description": "Output result",
+                "localName": "result.txt",
+                "required": False
+            },
+            view_selection.VIEW_SELECTION_PARAM: view_selection.activity_parameter(),
+            **output_bundle.activity_parameters(),
+            **{name: {**parameter, "required": False}
+               for name, parameter in workitem_packing.activity_parameters().items()}
+        },
+        "engine": engine_id(year),
+        "appbundles": [f"{owner}.{bundle}+{ALIAS}"],
+        "description": "Extract views from Revit model"
+    }
+
+
+def definition_hash(definition: Dict[str, Any]) -> str:
+    subset = {field: definition.get(field) for field in HASHED_FIELDS}
+    return hashlib.sha256(json.dumps(subset, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class _MultipartBody:
+    """multipart/form-data body streamed from a file object, with a known length"""
+
+    def __init__(self, fields: Dict[str, str], file, filename: str, content_type: str = "application/zip"):
+        boundary = uuid.uuid4().hex
+        head = "".join(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                       for name, value in fields.items())
+        head += (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                 f"Content-Type: {content_type}\r\n\r\n")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        file.seek(0)
+        self._parts = [io.BytesIO(head.encode("utf-8")), file, io.BytesIO(tail)]
+        self.length = len(head.encode("utf-8")) + size + len(tail)
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+    def read(self, size: int = -1) -> bytes:
+        while self._parts:
+            chunk = self._parts[0].read(size)
+            if chunk:
+                return chunk
+            self._parts.pop(0)
+        return b""
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self):
+        return iter(lambda: self.read(bundle_build.CHUNK), b"")
+
+
+class DeploymentRegistry:
+    """Cached activity/appbundle references, reconciled against DA on demand"""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST, owner: str = CLIENT_ID, base_url: str = APS_BASE_URL):
+        self.path = path
+        self.owner = owner
+        self.section = f"{base_url}|{owner}"
+        self._lock = threading.Lock()
+        self._year_locks: Dict[int, threading.Lock] = {}
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    # Manifest
+
+    def _load(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        section = self._manifest.setdefault(self.section, {"activities": {}, "appbundles": {}})
+        section.setdefault("missing", {})
+        return section
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def entries(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._load()))
+
+    @staticmethod
+    def _ref(entry: Dict[str, Any]) -> str:
+        return f"{entry['id']}+{entry['alias']}"
+
+    # Zero-call resolution
+
+    def _year_lock(self, year: int) -> threading.Lock:
+        with self._lock:
+            return self._year_locks.setdefault(year, threading.Lock())
+
+    def _cached_activity(self, year: int, content_hash: str) -> Tuple[bool, Optional[str]]:
+        """(known, ref) from the manifest; known is False when DA has to be asked"""
+        with self._lock:
+            section = self._load()
+            entry = section["activities"].get(activity_name(year))
+            if entry and entry.get("hash") == content_hash and appbundle_name(year) in section["appbundles"]:
+                return True, self._ref(entry)
+            missing = section["missing"].get(appbundle_name(year))
+            checked = calendar.timegm(time.strptime(missing["checked"], TIMESTAMP_FORMAT)) if missing else 0
+            if time.time() - checked < MISSING_TTL:
+                return True, None  # No add-in published for this engine, checked recently
+        return False, None
+
+    def activity_ref(self, token: Optional[str] = None, year: int = DEFAULT_YEAR) -> Optional[str]:
+        """`owner.Activity+alias` on the `year` engine, reconciling with DA only when the manifest is stale"""
+        content_hash = definition_hash(activity_definition(self.owner, year))
+        known, ref = self._cached_activity(year, content_hash)
+        if known:
+            return ref
+        # One reconcile per engine year; threads that waited reuse its result
+        with self._year_lock(year):
+            known, ref = self._cached_activity(year, content_hash)
+            if known:
+                return ref
+            return self.reconcile(token, year)
+
+    def appbundle_ref(self, token: Optional[str] = None, year: int = DEFAULT_YEAR) -> Optional[str]:
+        with self._lock:
+            entry = self._load()["appbundles"].get(appbundle_name(year))
+            if entry:
+                return self._ref(entry)
+        return self._reconcile_appbundle(token or aps_client.get_token("code:all"), year)
+
+    # Reconciliation
+
+    def _call(self, method: str, path: str, token: str, body: Optional[Dict[str, Any]] = None):
+        headers = {"Authorization": f"Bearer {token}"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        response = aps_client.session().request(method, f"{DA_URL}/{path}", headers=headers, json=body)
+        metrics.observe_response("deploy", response)
+        return response
+
+    def _alias_version(self, kind: str, qualified_id: str, token: str):
+        """(entity exists, version of our alias or None)"""
+        response = self._call("GET", f"{kind}/{qualified_id}/aliases", token)
+        if response.status_code == 404:
+            return False, None
+        response.raise_for_status()
+        for alias in response.json().get("data", []):
+            if alias.get("id") == ALIAS:
+                return True, alias.get("version")
+        return True, None
+
+    def _point_alias(self, kind: str, qualified_id: str, token: str, version: int, exists: bool) -> bool:
+        """Create our alias on `version`, or move the existing one there"""
+        if exists:
+            response = self._call("PATCH", f"{kind}/{qualified_id}/aliases/{ALIAS}", token, {"version": version})
+        else:
+            response = self._call("POST", f"{kind}/{qualified_id}/aliases", token, {"id": ALIAS, "version": version})
+        if response.status_code not in (200, 201):
+            print(f"❌ Alias update failed for {qualified_id}: {response.status_code} - {response.text}")
+            return False
+        return True
+
+    def _record(self, kind: str, name: str, qualified_id: str, version: int, content_hash: Optional[str]) -> str:
+        entry = {
+            "id": qualified_id,
+            "version": version,
+            "alias": ALIAS,
+            "hash": content_hash,
+            "reconciled": time.strftime(TIMESTAMP_FORMAT, time.gmtime())
+        }
+        with self._lock:
+            section = self._load()
+            section[kind][name] = entry
+            section["missing"].pop(name, None)
+            self._save()
+        return self._ref(entry)
+
+    def _record_missing(self, name: str):
+        """Remember that appbundle `name` is not deployed, so lookups skip it for MISSING_TTL"""
+        with self._lock:
+            section = self._load()
+            section["missing"][name] = {"checked": time.strftime(TIMESTAMP_FORMAT, time.gmtime())}
+            section["appbundles"].pop(name, None)
+            self._save()
+
+    def _reconcile_appbundle(self, token: str, year: int = DEFAULT_YEAR) -> Optional[str]:
+        name = appbundle_name(year)
+        qualified_id = f"{self.owner}.{name}"
+        exists, version = self._alias_version("appbundles", qualified_id, token)
+        if not exists:
+            print(f"❌ Appbundle {qualified_id} is not deployed; upload the add-in bundle first")
+            self._record_missing(name)
+            return None
+        if version is None:
+            # Point the alias at the latest uploaded version
+            response = self._call("GET", f"appbundles/{qualified_id}/versions", token)
+            response.raise_for_status()
+            versions = response.json().get("data", [])
+            if not versions:
+                print(f"❌ Appbundle {qualified_id} has no versions")
+                return None
+            version = versions[-1]
+            response = self._call("POST", f"appbundles/{qualified_id}/aliases", token,
+                                  {"id": ALIAS, "version": version})
+            if response.status_code not in (200, 201, 409):
+                print(f"❌ Could not create appbundle alias {ALIAS}: {response.status_code} - {response.text}")
+                return None
+            print(f"🔗 Appbundle alias {qualified_id}+{ALIAS} -> version {version}")
+        # Keep the content hash recorded by publish while the alias still points at that version
+        with self._lock:
+            entry = self._load()["appbundles"].get(name) or {}
+        content_hash = entry.get("hash") if entry.get("version") == version else None
+        return self._record("appbundles", name, qualified_id, version, content_hash)
+
+    def _reconcile_activity(self, token: str, year: int = DEFAULT_YEAR) -> Optional[str]:
+        definition = activity_definition(self.owner, year)
+        content_hash = definition_hash(definition)
+        name = activity_name(year)
+        qualified_id = f"{self.owner}.{name}"
+
+        exists, version = self._alias_version("activities", qualified_id, token)
+        if version is not None:
+            response = self._call("GET", f"activities/{qualified_id}/versions/{version}", token)
+            if response.status_code == 200 and definition_hash(response.json()) == content_hash:
+                return self._record("activities", name, qualified_id, version, content_hash)
+
+        # Deploy our definition as a new activity or a new version of it
+        if exists:
+            body = {key: value for key, value in definition.items() if key != "id"}
+            response = self._call("POST", f"activities/{qualified_id}/versions", token, body)
+        else:
+            response = self._call("POST", "activities", token, definition)
+        if response.status_code not in (200, 201):
+            print(f"❌ Activity deployment failed: {response.status_code} - {response.text}")
+            return None
+        new_version = response.json().get("version", 1)
+
+        if not self._point_alias("activities", qualified_id, token, new_version, version is not None):
+            return None
+        print(f"🚀 Deployed {qualified_id}+{ALIAS} (version {new_version})")
+        return self._record("activities", name, qualified_id, new_version, content_hash)
+
+    def reconcile(self, token: Optional[str] = None, year: int = DEFAULT_YEAR) -> Optional[str]:
+        """Bring the manifest in line with DA, deploying where needed; returns the activity reference"""
+        token = token or aps_client.get_token("code:all")
+        if not token:
+            return None
+        with tracer.span("deploy", engine=year):
+            if not self._reconcile_appbundle(token, year):
+                return None
+            return self._reconcile_activity(token, year)
+
+    def publish_appbundle(self, source: str = BUNDLE_SOURCE, token: Optional[str] = None,
+                          force: bool = False, year: int = DEFAULT_YEAR) -> Optional[str]:
+        """Upload the bundle as a new aliased version unless the deployed one has the same content"""
+        name = appbundle_name(year)
+        bundle_hash = bundle_build.content_hash(source)
+        with self._lock:
+            entry = self._load()["appbundles"].get(name)
+        if entry and entry.get("hash") == bundle_hash and not force:
+            print(f"⏭️ Appbundle unchanged ({bundle_hash[:12]}): {self._ref(entry)}")
+            return self._ref(entry)
+
+        token = token or aps_client.get_token("code:all")
+        if not token:
+            return None
+        qualified_id = f"{self.owner}.{name}"
+        with tracer.span("publish", bundle=os.path.basename(source)):
+            exists, version = self._alias_version("appbundles", qualified_id, token)
+            if version is not None and not force:
+                response = self._call("GET", f"appbundles/{qualified_id}/versions/{version}", token)
+                tagged = HASH_TAG.search(response.json().get("description", "")) if response.status_code == 200 else None
+                if tagged and tagged.group(1) == bundle_hash:
+                    print(f"⏭️ Appbundle unchanged ({bundle_hash[:12]}): {qualified_id}+{ALIAS} -> v{version}")
+                    return self._record("appbundles", name, qualified_id, version, bundle_hash)
+
+            # New version; the description carries the hash for runners without a manifest
+            body = {"engine": engine_id(year), "description": f"{BUNDLE_DESCRIPTION} [sha256:{bundle_hash}]"}
+            if exists:
+                response = self._call("POST", f"appbundles/{qualified_id}/versions", token, body)
+            else:
+                response = self._call("POST", "appbundles", token, dict(body, id=name))
+            if response.status_code not in (200, 201):
+                print(f"❌ Appbundle version failed: {response.status_code} - {response.text}")
+                return None
+            created = response.json()
+            new_version = created.get("version", 1)
+
+            upload = created["uploadParameters"]
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as buffer:
+                bundle_build.write_bundle(source, buffer)
+                form = _MultipartBody(upload.get("formData") or {}, buffer, f"{name}.zip")
+                response = aps_client.session().post(upload["endpointURL"], data=form,
+                                                     headers={"Content-Type": form.content_type})
+            metrics.observe_response("deploy", response)
+            if response.status_code not in (200, 201, 204):
+                print(f"❌ Appbundle upload failed: {response.status_code} - {response.text}")
+                return None
+
+            if not self._point_alias("appbundles", qualified_id, token, new_version, version is not None):
+                return None
+        print(f"🚀 Published {qualified_id}+{ALIAS} (version {new_version}, {bundle_hash[:12]})")
+        return self._record("appbundles", name, qualified_id, new_version, bundle_hash)
+
+    def invalidate(self):
+        """Forget the cached deployment; the next lookup reconciles"""
+        with self._lock:
+            section = self._load()
+            section["activities"].clear()
+            section["appbundles"].clear()
+            section["missing"].clear()
+            self._save()
+
+
+# Shared registry used by the scripts
+deployments = DeploymentRegistry()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Deployment Registry")
+    parser.add_argument("action", choices=["status", "reconcile", "publish"],
+                        help="Show, reconcile or publish the deployment")
+    parser.add_argument("source", nargs="?", default=BUNDLE_SOURCE, help="Bundle folder or zip to publish")
+    parser.add_argument("--force", action="store_true", help="Forget the cached state first / re-upload")
+    parser.add_argument("--engine", type=int, choices=ENGINE_YEARS, default=DEFAULT_YEAR, metavar="YEAR",
+                        help=f"Revit engine year (default: {DEFAULT_YEAR})")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    if args.action == "publish":
+        if not os.path.exists(args.source):
+            print(f"❌ Bundle source not found: {args.source}")
+            sys.exit(1)
+        if not deployments.publish_appbundle(args.source, force=args.force, year=args.engine):
+            sys.exit(1)
+    elif args.action == "reconcile":
+        if args.force:
+            deployments.invalidate()
+        activity_ref = deployments.reconcile(year=args.engine)
+        if not activity_ref:
+            sys.exit(1)
+        print(f"✅ Activity: {activity_ref}")
+
+    entries = deployments.entries()
+    if args.json:
+        print(json.dumps(entries, indent=2))
+    elif args.action == "status":
+        print(f"📋 {deployments.path} [{deployments.section}]")
+        for kind in ("appbundles", "activities"):
+            for name, entry in entries[kind].items():
+                print(f"   {kind[:-1]:10} {entry['id']}+{entry['alias']} -> v{entry['version']} "
+                      f"(reconciled {entry['reconciled']})")
+        for name, entry in entries["missing"].items():
+            print(f"   {'missing':10} {deployments.owner}.{name} (checked {entry['checked']})")
+        if not entries["activities"]:
+            print("   Nothing cached; the next run reconciles with Design Automation")
+
+
+if __name__ == "__main__":
+    main()
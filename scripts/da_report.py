@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Design Automation Report Parser
+
+Extracts engine-side phase timings from the report a workitem writes to its
+reportUrl, so slow runs can be attributed to DA queueing, input download,
+Revit opening the model or our add-in:
+
+    [10/19/2026 09:14:02] Start download phase.
+    [10/19/2026 09:14:09] End download phase successfully.
+    [10/19/2026 09:14:09] Start script phase.
+    [10/19/2026 09:14:31] Document opened: 100
+    [10/19/2026 09:14:55] End script phase.
+    [10/19/2026 09:14:55] Start upload phase.
+    [10/19/2026 09:14:56] End upload phase successfully.
+
+Phases (seconds):
+    queue        timeQueued -> timeDownloadStarted (workitem stats, when given)
+    download     input download
+    model_open   script start -> "Document opened" from the add-in
+    addin        "Document opened" -> script end (whole script phase if the
+                 add-in did not log the open)
+    upload       output upload
+    total        first -> last report line
+
+Report timestamps have one second resolution.
+
+Usage:
+    python da_report.py <report.txt> [...]            Timings of saved reports
+    python da_report.py output/batch_processing_report.json
+                                                      Phase summary per model size
+"""
+
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tracing import summarize, print_summary
+
+PHASES = ["queue", "download", "model_open", "addin", "upload", "total"]
+
+# Upper bounds in MB of the model size buckets used for aggregation
+SIZE_BUCKETS = [(10, "<10MB"), (50, "10-50MB"), (200, "50-200MB"), (float("inf"), "200MB+")]
+
+_LINE = re.compile(r"^\[(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2})\]\s*(.*)$")
+_MARKERS = {
+    "download_start": re.compile(r"^Start download phase"),
+    "download_end": re.compile(r"^End download phase"),
+    "script_start": re.compile(r"^Start script phase"),
+    "model_opened": re.compile(r"^Document opened\b"),
+    "script_end": re.compile(r"^End script phase"),
+    "upload_start": re.compile(r"^Start upload phase"),
+    "upload_end": re.compile(r"^End upload phase"),
+}
+_RESULT = re.compile(r"^Job finished with result (\w+)")
+
+
+def parse_lines(text: str) -> List[Tuple[datetime, str]]:
+    """Timestamped lines of a report; untimestamped lines are skipped"""
+    lines = []
+    for raw in text.splitlines():
+        match = _LINE.match(raw.strip())
+        if match:
+            lines.append((datetime.strptime(match.group(1), "%m/%d/%Y %H:%M:%S"), match.group(2)))
+    return lines
+
+
+def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _seconds(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return max(0.0, (end - start).total_seconds())
+
+
+def parse_report(text: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Phase timings (seconds, None when a phase is missing) and the job result"""
+    lines = parse_lines(text or "")
+    marks: Dict[str, datetime] = {}
+    result = None
+    for stamp, message in lines:
+        for name, pattern in _MARKERS.items():
+            if name not in marks and pattern.match(message):
+                marks[name] = stamp
+        match = _RESULT.match(message)
+        if match:
+            result = match.group(1)
+
+    addin_start = marks.get("model_opened", marks.get("script_start"))
+    timings = {
+        "queue": None,
+        "download": _seconds(marks.get("download_start"), marks.get("download_end")),
+        "model_open": _seconds(marks.get("script_start"), marks.get("model_opened")),
+        "addin": _seconds(addin_start, marks.get("script_end")),
+        "upload": _seconds(marks.get("upload_start"), marks.get("upload_end")),
+        "total": _seconds(lines[0][0], lines[-1][0]) if lines else None,
+    }
+
+    # Queue time is not in the report; the workitem stats carry it (UTC)
+    if stats:
+        timings["queue"] = _seconds(_parse_iso(stats.get("timeQueued")),
+                                    _parse_iso(stats.get("timeDownloadStarted")))
+
+    return {"result": result, "timings": timings}
+
+
+def size_bucket(size_bytes: Optional[int]) -> str:
+    if size_bytes is None:
+        return "unknown"
+    size_mb = size_bytes / (1024 * 1024)
+    for limit, label in SIZE_BUCKETS:
+        if size_mb < limit:
+            return label
+    return SIZE_BUCKETS[-1][1]
+
+
+def aggregate(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Per size bucket, per phase count/total/mean/p50/p95/max
+
+    Records are job records carrying "timings" and "size" (bytes of the
+    workitem input); packed files carry the pack's bytes in "pack_size".
+    Packed files share one workitem, so each pack is counted once.
+    """
+    durations: Dict[str, Dict[str, List[float]]] = {}
+    seen_packs = set()
+    for record in records:
+        timings = record.get("timings")
+        if not timings:
+            continue
+        if record.get("pack"):
+            if record["pack"] in seen_packs:
+                continue
+            seen_packs.add(record["pack"])
+        bucket = durations.setdefault(size_bucket(record.get("pack_size", record.get("size"))), {})
+        for phase in PHASES:
+            if timings.get(phase) is not None:
+                bucket.setdefault(phase, []).append(timings[phase])
+    ordered = [label for _, label in SIZE_BUCKETS] + ["unknown"]
+    return {label: summarize(durations[label]) for label in ordered if label in durations}
+
+
+def print_aggregate(aggregated: Dict[str, Dict[str, Dict[str, float]]]):
+    for bucket, summary in aggregated.items():
+        print_summary(summary, f"Workitem phases, models {bucket}")
+
+
+def format_timings(timings: Dict[str, Optional[float]]) -> str:
+    return ", ".join(f"{phase} {timings[phase]:.0f}s" for phase in PHASES if timings.get(phase) is not None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - DA Report Timings")
+    parser.add_argument("paths", nargs="+", help="Saved report text files or a batch_processing_report.json")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    output = {}
+    for path in args.paths:
+        if path.endswith(".json"):
+            with open(path) as f:
+                output[path] = aggregate(json.load(f))
+            if not args.json:
+                print_aggregate(output[path])
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                output[path] = parse_report(f.read())
+            if not args.json:
+                parsed = output[path]
+                print(f"{path}: {parsed['result'] or 'no result'} - {format_timings(parsed['timings']) or 'no phases'}")
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+    if not any(output.values()):
+        print("No timings found", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Design Automation Workitem Scheduler
+
+Keeps batch runs inside Design Automation rate limits instead of failing
+with 429 responses:
+
+- RateLimiter holds one token bucket per request kind ("submit" for
+  POST /workitems, "status" for GET /workitems/{id}). Every request waits for
+  a token; a 429 pauses its bucket for the `Retry-After` period and the
+  request is retried.
+- WorkitemScheduler runs jobs on a fixed number of worker threads, taking
+  them from a priority queue (user priority, then smallest or oldest file
+  first). submit() returns a concurrent.futures.Future, so callers can keep
+  using as_completed(). queue_depth and in_flight are exposed for progress
+  reporting. Jobs run in a copy of the submitter's context, so tracing spans
+  opened by a job nest under the span that submitted it.
+"""
+
+import time
+import heapq
+import argparse
+import threading
+import contextvars
+import email.utils
+import metrics
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+# Conservative defaults; DA limits are per app and can be raised on request
+DEFAULT_SUBMIT_RATE = 1.0   # workitem submissions per second
+DEFAULT_SUBMIT_BURST = 5
+DEFAULT_STATUS_RATE = 5.0   # status reads per second
+DEFAULT_STATUS_BURST = 10
+MAX_RETRIES = 5
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can also be paused until a point in time"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+
+def positive_rate(value: str) -> float:
+    """argparse type for request rates, which must be above zero"""
+    rate = float(value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"rate must be above zero, got {value}")
+    return rate
+
+
+def parse_retry_after(value: Optional[str], default: float = 10.0) -> float:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """Token buckets per request kind with Retry-After aware retries"""
+
+    def __init__(self):
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, submit_rate: float = DEFAULT_SUBMIT_RATE, status_rate: float = DEFAULT_STATUS_RATE,
+                  submit_burst: int = DEFAULT_SUBMIT_BURST, status_burst: int = DEFAULT_STATUS_BURST):
+        """(Re)create the buckets with new rates; ValueError for rates not above zero"""
+        for name, rate in (("submit_rate", submit_rate), ("status_rate", status_rate)):
+            if rate <= 0:
+                raise ValueError(f"{name} must be above zero, got {rate}")
+        self.buckets = {
+            "submit": TokenBucket(submit_rate, submit_burst),
+            "status": TokenBucket(status_rate, status_burst)
+        }
+
+    def request(self, kind: str, method: str, url: str, max_retries: int = MAX_RETRIES, **kwargs):
+        """Make a rate limited request, retrying 429 responses after Retry-After"""
+        import aps_client
+        bucket = self.buckets[kind]
+        for attempt in range(max_retries + 1):
+            bucket.acquire()
+            response = aps_client.session().request(method, url, **kwargs)
+            metrics.observe_response(kind, response)
+            if response.status_code != 429 or attempt == max_retries:
+                return response
+
+            delay = parse_retry_after(response.headers.get("Retry-After"), default=2.0 * (2 ** attempt))
+            with self._lock:
+                self.throttled += 1
+            metrics.http_retries.inc(endpoint=kind)
+            print(f"⏳ Rate limited on {kind}, retrying in {delay:.0f}s")
+            bucket.pause(delay)
+        return response
+
+
+# Shared limiter used by the scripts
+limiter = RateLimiter()
+
+
+class WorkitemScheduler:
+    """Priority scheduler running jobs on a fixed pool of worker threads
+
+    Jobs are ordered by (priority, order_key, submission order); lower values
+    run first. Use as a context manager to wait for all jobs on exit.
+    """
+
+    def __init__(self, max_in_flight: int = 5):
+        self.max_in_flight = max_in_flight
+        self._queue = []
+        self._counter = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._shutdown = False
+        self._cond = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"workitem-{i}", daemon=True)
+            for i in range(max_in_flight)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    @property
+    def in_flight(self) -> int:
+        with self._cond:
+            return self._in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, in-flight jobs and outcomes"""
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "throttled": limiter.throttled
+            }
+
+    def submit(self, fn: Callable, *args, priority: float = 0, order_key: float = 0, **kwargs) -> Future:
+        """Queue a job and return a Future for its result"""
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            context = contextvars.copy_context()
+            heapq.heappush(self._queue, (priority, order_key, self._counter, future, context, fn, args, kwargs))
+            self._counter += 1
+            self._cond.notify()
+        return future
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                _, _, _, future, context, fn, args, kwargs = heapq.heappop(self._queue)
+                self._in_flight += 1
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(context.run(fn, *args, **kwargs))
+                    ok = True
+                except BaseException as exc:
+                    future.set_exception(exc)
+                    ok = False
+            else:
+                ok = False
+
+            with self._cond:
+                self._in_flight -= 1
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting jobs; optionally cancel queued ones and wait for workers"""
+        with self._cond:
+            self._shutdown = True
+            if cancel_pending:
+                for entry in self._queue:
+                    entry[3].cancel()
+                self._queue.clear()
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True, cancel_pending=exc_type is not None)
+        return False
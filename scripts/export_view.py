@@ -2,10 +2,12 @@
 """
 RevitViewExtractor - Export View Utility
 
-Allows exporting a specific view from a Revit file.
+Allows exporting specific views from a Revit file. Several view names can be
+given; they are passed to a single workitem as a view-selection manifest so
+the model is opened only once.
 
 Usage:
-    python export_view.py <path_to_revit_file> <view_name> [options]
+    python export_view.py <path_to_revit_file> <view_name> [<view_name> ...] [options]
 
 Options:
     --type TYPE       Specify view type (optional, for disambiguation)
@@ -16,23 +18,20 @@ Options:
 import sys
 import os
 import argparse
-from config import CLIENT_ID, CLIENT_SECRET
+import aps_client
+from config import APS_BASE_URL
+from view_selection import VIEW_SELECTION_PARAM, workitem_argument
+
+# First line of the placeholder files written until real exports are implemented
+MOCK_EXPORT_HEADER = "Mock export of view"
 
 def get_access_token():
-    """Get Autodesk access token"""
-    import requests
-    url = "https://developer.api.autodesk.com/authentication/v2/token"
-    data = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials",
-        "scope": "code:all"
-    }
-    response = requests.post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
-    return response.json()["access_token"] if response.status_code == 200 else None
+    """Get Autodesk access token (cached until shortly before it expires)"""
+    return aps_client.get_token("code:all")
 
 def export_view(file_path, view_name, view_type=None, output_path=None, format='png'):
-    """Export a specific view from Revit file"""
+    """Export one or more views (by name) from Revit file in a single workitem; returns the output paths"""
+    view_names = [view_name] if isinstance(view_name, str) else list(view_name)
     token = get_access_token()
     
     # For now, use a working activity to test the system
@@ -41,15 +40,28 @@ def export_view(file_path, view_name, view_type=None, output_path=None, format='
         "arguments": {}
     }
     
+    # Several views share one workitem through the view-selection manifest
+    if len(view_names) > 1:
+        manifest = {
+            "document": os.path.basename(file_path),
+            "viewIds": [],
+            "viewNames": view_names
+        }
+        argument = workitem_argument(manifest, aps_client.get_token("data:read data:write bucket:create bucket:read"))
+        if not argument:
+            print("Error passing the view selection")
+            return None
+        workitem_data["arguments"][VIEW_SELECTION_PARAM] = argument
+    
     # Send workitem to process file
-    import requests
-    url = "https://developer.api.autodesk.com/da/us-east/v3/workitems"
+    http = aps_client.session()
+    url = f"{APS_BASE_URL}/da/us-east/v3/workitems"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
     
-    response = requests.post(url, headers=headers, json=workitem_data)
+    response = http.post(url, headers=headers, json=workitem_data)
     
     if response.status_code != 200:
         print(f"Error processing file: {response.text}")
@@ -57,33 +69,39 @@ def export_view(file_path, view_name, view_type=None, output_path=None, format='
     
     workitem_id = response.json()["id"]
     print(f"✅ Workitem created: {workitem_id}")
-    print(f"📝 Note: Mock export for view '{view_name}' as {format}")
-    
-    # Create a mock exported file
-    if not output_path:
-        output_path = os.path.join(
-            os.path.dirname(file_path) if file_path != "100.rvt" else ".", 
-            f"{view_name.replace(' ', '_')}.{format}"
-        )
     
-    # Create a simple mock file
-    with open(output_path, 'w') as f:
-        f.write(f"Mock export of view '{view_name}' in {format} format\n")
-        f.write(f"Workitem ID: {workitem_id}\n")
-        f.write("Real export functionality coming soon!\n")
+    output_paths = []
+    for name in view_names:
+        print(f"📝 Note: Mock export for view '{name}' as {format}")
+        
+        # Create a mock exported file; an explicit output path only applies to a single view
+        view_output = output_path if output_path and len(view_names) == 1 else None
+        if not view_output:
+            view_output = os.path.join(
+                os.path.dirname(output_path) if output_path else (os.path.dirname(file_path) if file_path != "100.rvt" else "."), 
+                f"{name.replace(' ', '_')}.{format}"
+            )
+        
+        # Create a simple mock file
+        with open(view_output, 'w') as f:
+            f.write(f"{MOCK_EXPORT_HEADER} '{name}' in {format} format\n")
+            f.write(f"Workitem ID: {workitem_id}\n")
+            f.write("Real export functionality coming soon!\n")
+        
+        print(f"✅ Mock view exported to: {view_output}")
+        output_paths.append(view_output)
     
-    print(f"✅ Mock view exported to: {output_path}")
-    return output_path
+    return output_paths
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="RevitViewExtractor - Export View")
     parser.add_argument("file", help="Path to Revit file")
-    parser.add_argument("view_name", help="Name of the view to export")
+    parser.add_argument("view_name", nargs="+", help="Name(s) of the view(s) to export")
     parser.add_argument("--type", help="View type (optional)")
-    parser.add_argument("--output", help="Output file path")
+    parser.add_argument("--output", help="Output file path (directory is used for multiple views)")
     parser.add_argument("--format", choices=['png', 'jpg', 'pdf'], default='png', help="Export format")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Export view
     export_view(
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Workitem and Storage Lifecycle
+
+Tracks every workitem submitted and every temporary bucket/object created
+during a run, so that nothing is left running or stored when a run ends
+early:
+
+- a workitem that times out is cancelled with DELETE /workitems/{id}
+- on Ctrl-C, SIGTERM or interpreter exit all outstanding workitems are
+  cancelled, and temporary objects and buckets are deleted when requested
+
+Cleanup requests run concurrently and are bounded by a timeout, so shutdown
+never hangs on a slow endpoint.
+"""
+
+import sys
+import atexit
+import signal
+import time
+import threading
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from config import APS_BASE_URL
+
+DA_WORKITEMS_URL = f"{APS_BASE_URL}/da/us-east/v3/workitems"
+OSS_BUCKETS_URL = f"{APS_BASE_URL}/oss/v2/buckets"
+CLEANUP_TIMEOUT = 30  # seconds
+
+
+class LifecycleManager:
+    """Registry of outstanding workitems and temporary storage"""
+
+    def __init__(self, token_provider: Optional[Callable[[], Optional[str]]] = None):
+        self.token_provider = token_provider
+        self.delete_storage = False
+        self._handlers_installed = False
+        self._workitems: Dict[str, Optional[str]] = {}  # id -> token used to submit it
+        self._buckets: Set[str] = set()
+        self._objects: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._cleaned_up = False
+        # Set once shutdown starts; pollers wait on it instead of sleeping
+        self.stopping = threading.Event()
+
+    def _get_token(self, token: Optional[str] = None) -> Optional[str]:
+        if token:
+            return token
+        # Providers cache their tokens (aps_client), so this stays cheap and fresh
+        return self.token_provider() if self.token_provider else None
+
+    # Registration
+
+    def register_workitem(self, workitem_id: str, token: Optional[str] = None):
+        with self._lock:
+            self._workitems[workitem_id] = token
+
+    def complete_workitem(self, workitem_id: str):
+        """Forget a workitem that reached a final status"""
+        with self._lock:
+            self._workitems.pop(workitem_id, None)
+
+    def register_bucket(self, bucket_key: str):
+        """Register a bucket created only for this run"""
+        with self._lock:
+            self._buckets.add(bucket_key)
+
+    def register_object(self, bucket_key: str, object_key: str):
+        """Register an object created only for this run (staging upload, output bundle, pack)"""
+        with self._lock:
+            self._objects.add((bucket_key, object_key))
+
+    def release_object(self, bucket_key: str, object_key: str):
+        """Forget a temporary object that was already deleted"""
+        with self._lock:
+            self._objects.discard((bucket_key, object_key))
+
+    @property
+    def outstanding(self) -> int:
+        with self._lock:
+            return len(self._workitems)
+
+    # Cancellation and cleanup
+
+    def cancel_workitem(self, workitem_id: str, token: Optional[str] = None) -> bool:
+        """Cancel a workitem in DA; True when DA accepted the cancellation"""
+        import requests
+        with self._lock:
+            token = token or self._workitems.get(workitem_id)
+        token = self._get_token(token)
+        try:
+            response = requests.delete(
+                f"{DA_WORKITEMS_URL}/{workitem_id}",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=10
+            )
+        except requests.RequestException as exc:
+            print(f"⚠️ Failed to cancel workitem {workitem_id}: {exc}")
+            return False
+
+        self.complete_workitem(workitem_id)
+        # 404: already finished and purged
+        return response.status_code in [200, 204, 404]
+
+    def _delete(self, url: str, missing_ok: bool = True) -> bool:
+        import requests
+        token = self._get_token()
+        try:
+            response = requests.delete(url, headers={"Authorization": f"Bearer {token}"}, timeout=10)
+        except requests.RequestException:
+            return False
+        # Objects registered by this process should still exist, so a 404
+        # there means the wrong URL was deleted, not that the work is done
+        ok = [200, 204, 404] if missing_ok else [200, 204]
+        return response.status_code in ok
+
+    def _run_all(self, jobs, counts: Dict[str, int], timeout: float) -> int:
+        """Run (kind, fn, args) jobs concurrently; returns how many did not finish in time"""
+        count_lock = threading.Lock()
+
+        def run(kind, fn, args):
+            try:
+                ok = fn(*args)
+            except Exception:
+                ok = False
+            if ok:
+                with count_lock:
+                    counts[kind] += 1
+
+        threads = [threading.Thread(target=run, args=job, daemon=True) for job in jobs]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return sum(1 for thread in threads if thread.is_alive())
+
+    def cleanup(self, delete_storage: Optional[bool] = None, timeout: float = CLEANUP_TIMEOUT) -> Dict[str, int]:
+        """Cancel outstanding workitems and optionally delete temporary storage
+
+        Runs all requests concurrently and returns after at most `timeout`
+        seconds with counts of what was cleaned up.
+        """
+        if delete_storage is None:
+            delete_storage = self.delete_storage
+
+        with self._lock:
+            workitems = list(self._workitems.items())
+            objects = list(self._objects) if delete_storage else []
+            buckets = list(self._buckets) if delete_storage else []
+            self._objects.difference_update(objects)
+            self._buckets.difference_update(buckets)
+
+        if not workitems and not objects and not buckets:
+            return {"workitems": 0, "objects": 0, "buckets": 0}
+
+        print(f"🧹 Cleaning up: {len(workitems)} workitems, {len(objects)} objects, {len(buckets)} buckets")
+
+        from bucket_pool import object_url
+
+        # Plain daemon threads rather than an executor: cleanup also runs from
+        # atexit, where executors refuse new work during interpreter shutdown
+        counts = {"workitems": 0, "objects": 0, "buckets": 0}
+        jobs = [("workitems", self.cancel_workitem, (workitem_id, token)) for workitem_id, token in workitems]
+        jobs += [("objects", self._delete, (object_url(bucket_key, object_key), False)) for bucket_key, object_key in objects]
+        not_done = self._run_all(jobs, counts, timeout)
+
+        # Buckets go last so their objects are already gone
+        bucket_jobs = [("buckets", self._delete, (f"{OSS_BUCKETS_URL}/{bucket_key}",)) for bucket_key in buckets]
+        bucket_not_done = self._run_all(bucket_jobs, counts, max(0.0, timeout / 2))
+
+        if not_done or bucket_not_done:
+            print(f"⚠️ Cleanup timed out with {not_done + bucket_not_done} requests pending")
+        print(f"✅ Cancelled {counts['workitems']} workitems, deleted {counts['objects']} objects and {counts['buckets']} buckets")
+        return counts
+
+    def _cleanup_once(self):
+        self.stopping.set()
+        with self._lock:
+            if self._cleaned_up:
+                return
+            self._cleaned_up = True
+        self.cleanup()
+
+    def install_handlers(self, delete_storage: bool = False):
+        """Clean up on interpreter exit, Ctrl-C and SIGTERM
+
+        Safe to call repeatedly and from worker threads: commands run by the
+        rve daemon share its handlers, which clean up when the daemon stops.
+        Only the first call from the main thread sets delete_storage.
+        """
+        if self._handlers_installed or threading.current_thread() is not threading.main_thread():
+            return
+        self._handlers_installed = True
+        self.delete_storage = delete_storage
+        atexit.register(self._cleanup_once)
+
+        def handle_signal(signum, frame):
+            print(f"\n⚠️ Received signal {signum}, cancelling workitems...")
+            self._cleanup_once()
+            if signum == signal.SIGINT:
+                raise KeyboardInterrupt
+            sys.exit(128 + signum)
+
+        signal.signal(signal.SIGINT, handle_signal)
+        if hasattr(signal, "SIGTERM"):
+            signal.signal(signal.SIGTERM, handle_signal)
+
+
+# Shared manager used by the scripts
+lifecycle = LifecycleManager()
@@ -12,65 +12,46 @@ Options:
     --exportable      Show only exportable views
     --non-exportable  Show only non-exportable views
     --json            Output in JSON format
+    --keep-bucket     Ignored: uploads go to long-lived pool buckets (bucket_pool.py)
+    --trace FILE      Append timing spans as JSON lines to FILE
 """
 
 import sys
 import json
 import argparse
 import time
-import requests
 import os
-from config import CLIENT_ID, CLIENT_SECRET
+import aps_client
+from bucket_pool import buckets, file_digests, object_key, object_url, remote_match
+from config import CLIENT_ID, APS_BASE_URL
+from da_deploy import deployments, engine_id, engine_year, DEFAULT_YEAR
+from da_report import format_timings, parse_report
+from lifecycle import lifecycle
+from rvt_file import saved_year
+from signed_urls import broker
+from tracing import tracer
+
+# Example views returned when the workitem produced no view data
+MOCK_VIEWS = [
+    {"name": "Level 1", "type": "FloorPlan", "exportable": True},
+    {"name": "3D View 1", "type": "3D", "exportable": True},
+    {"name": "South Elevation", "type": "Elevation", "exportable": True},
+    {"name": "Section 1", "type": "Section", "exportable": False}
+]
 
 def get_access_token():
-    """Get Autodesk access token"""
-    url = "https://developer.api.autodesk.com/authentication/v2/token"
-    data = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials",
-        "scope": "code:all data:write data:read bucket:create bucket:read"
-    }
-    response = requests.post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
-    if response.status_code == 200:
-        return response.json()["access_token"]
-    else:
-        print(f"Failed to get access token: {response.text}")
-        return None
+    """Get Autodesk access token (cached until shortly before it expires)"""
+    return aps_client.get_token("code:all data:write data:read bucket:create bucket:read")
 
-def create_bucket(token):
-    """Create a bucket for file uploads"""
-    bucket_name = f"{CLIENT_ID.lower()}-revit-views-{int(time.time())}"
-    url = "https://developer.api.autodesk.com/oss/v2/buckets"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "bucketKey": bucket_name,
-        "policyKey": "transient"  # Files will be automatically deleted after 24 hours
-    }
-    
-    response = requests.post(url, headers=headers, json=data)
-    
-    if response.status_code == 200:
-        print(f"Created bucket: {bucket_name}")
-        return bucket_name
-    elif response.status_code == 409:
-        # Bucket exists, try with a different name
-        bucket_name = f"{CLIENT_ID.lower()}-revit-views-{int(time.time() * 1000)}"
-        data["bucketKey"] = bucket_name
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            print(f"Created bucket: {bucket_name}")
-            return bucket_name
-    
-    print(f"Failed to create bucket: {response.status_code} - {response.text}")
-    return None
+def create_bucket(token, size=None):
+    """Pool bucket for uploads (long-lived, verified once per process)"""
+    return buckets.bucket_for(token, size)
 
-def upload_file(token, bucket_name, file_path):
-    """Upload file to OSS or use sample file for testing"""
+def upload_file(token, bucket_name, file_path, object_name=None):
+    """Upload file to OSS (under object_name, default the file name) or use sample file for testing"""
+    http = aps_client.session()
     filename = os.path.basename(file_path)
+    object_name = object_name or filename
     
     # Check if file exists
     if not os.path.exists(file_path):
@@ -87,7 +68,7 @@ def upload_file(token, bucket_name, file_path):
     print(f"Uploading file: {filename} ({file_size} bytes)")
     
     # Use the Data Management API v2 endpoint
-    url = f"https://developer.api.autodesk.com/data/v1/projects/files"
+    url = f"{APS_BASE_URL}/data/v1/projects/files"
     
     headers = {
         "Authorization": f"Bearer {token}",
@@ -98,7 +79,7 @@ def upload_file(token, bucket_name, file_path):
     }
     
     # Try uploading with OSS v2 resumable upload
-    resumable_url = f"https://developer.api.autodesk.com/oss/v2/buckets/{bucket_name}/objects/{filename}/resumable"
+    resumable_url = f"{object_url(bucket_name, object_name)}/resumable"
     
     session_headers = {
         "Authorization": f"Bearer {token}",
@@ -108,12 +89,12 @@ def upload_file(token, bucket_name, file_path):
     # Initialize resumable upload session
     session_data = {
         "ossbucketKey": bucket_name,
-        "ossSourceFileObjectKey": filename,
+        "ossSourceFileObjectKey": object_name,
         "chunkSize": 5 * 1024 * 1024  # 5MB chunks
     }
     
     print("Initializing upload session...")
-    session_response = requests.post(resumable_url, headers=session_headers, json=session_data)
+    session_response = http.post(resumable_url, headers=session_headers, json=session_data)
     
     if session_response.status_code in [200, 202]:
         session_info = session_response.json()
@@ -127,12 +108,12 @@ def upload_file(token, bucket_name, file_path):
             
             # For simplicity, upload as single chunk if file is small
             if len(upload_urls) > 0:
-                chunk_response = requests.put(upload_urls[0], data=file_data)
+                chunk_response = http.put(upload_urls[0], data=file_data)
                 
                 if chunk_response.status_code == 200:
                     # Finalize upload
                     finalize_url = f"{resumable_url}/{upload_key}"
-                    finalize_response = requests.post(finalize_url, headers=session_headers)
+                    finalize_response = http.post(finalize_url, headers=session_headers)
                     
                     if finalize_response.status_code == 200:
                         print("File uploaded successfully via resumable upload")
@@ -140,7 +121,7 @@ def upload_file(token, bucket_name, file_path):
                         object_id = result.get("objectId")
                         
                         # Create signed URL
-                        signed_url = create_signed_url(token, bucket_name, filename)
+                        signed_url = create_signed_url(token, bucket_name, object_name)
                         if signed_url:
                             return signed_url
                         else:
@@ -148,7 +129,7 @@ def upload_file(token, bucket_name, file_path):
     
     # If resumable upload fails, try basic PUT upload
     print("Trying basic upload...")
-    basic_url = f"https://developer.api.autodesk.com/oss/v2/buckets/{bucket_name}/objects/{filename}"
+    basic_url = object_url(bucket_name, object_name)
     
     basic_headers = {
         "Authorization": f"Bearer {token}",
@@ -157,7 +138,7 @@ def upload_file(token, bucket_name, file_path):
     
     # Read file and upload
     with open(file_path, 'rb') as f:
-        response = requests.put(basic_url, headers=basic_headers, data=f)
+        response = http.put(basic_url, headers=basic_headers, data=f)
     
     if response.status_code == 200:
         print("File uploaded successfully")
@@ -165,7 +146,7 @@ def upload_file(token, bucket_name, file_path):
         object_id = result.get("objectId", result.get("objectKey"))
         
         # Create signed URL
-        signed_url = create_signed_url(token, bucket_name, filename)
+        signed_url = create_signed_url(token, bucket_name, object_name)
         if signed_url:
             return signed_url
         else:
@@ -180,227 +161,29 @@ def upload_file(token, bucket_name, file_path):
     return None
 
 def create_signed_url(token, bucket_name, object_name):
-    """Create a signed URL for accessing the uploaded file"""
-    url = f"https://developer.api.autodesk.com/oss/v2/buckets/{bucket_name}/objects/{object_name}/signed"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "access": "read"
-    }
-    
-    response = requests.post(url, headers=headers, json=data)
-    
-    if response.status_code == 200:
-        return response.json()["signedUrl"]
-    else:
-        print(f"Failed to create signed URL: {response.status_code} - {response.text}")
-        return None
+    """Create a signed URL for accessing the uploaded file (batched and cached by the broker)"""
+    signed_url = broker.download_url(token, bucket_name, object_name)
+    if not signed_url:
+        print(f"Failed to create signed URL for {bucket_name}/{object_name}")
+    return signed_url
 
 def get_or_create_appbundle(token):
-    """Get existing appbundle or create it"""
-    appbundle_id = "RevitViewExtractor"
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    # Try to get the appbundle with fully qualified name
-    qualified_id = f"{CLIENT_ID}.{appbundle_id}"
-    
-    # First, check versions of the existing appbundle
-    versions_url = f"https://developer.api.autodesk.com/da/us-east/v3/appbundles/{qualified_id}/versions"
-    versions_response = requests.get(versions_url, headers=headers)
-    
-    if versions_response.status_code == 200:
-        versions = versions_response.json().get("data", [])
-        if versions:
-            latest_version = versions[-1]  # Get the latest version number
-            appbundle_ref = f"{qualified_id}+{latest_version}"
-            print(f"Using existing appbundle: {appbundle_ref}")
-            return appbundle_ref
-        else:
-            print(f"Appbundle exists but has no versions")
-            # Try to create a new version
-            # First need to upload the bundle ZIP file
-            # For now, we'll just use version 1
-            appbundle_ref = f"{qualified_id}+1"
-            print(f"Attempting to use: {appbundle_ref}")
-            return appbundle_ref
-    
-    # Try without qualification
-    simple_url = f"https://developer.api.autodesk.com/da/us-east/v3/appbundles/{appbundle_id}"
-    simple_response = requests.get(simple_url, headers=headers)
-    
-    if simple_response.status_code == 200:
-        # Try to get versions
-        versions_url = f"{simple_url}/versions"
-        versions_response = requests.get(versions_url, headers=headers)
-        
-        if versions_response.status_code == 200:
-            versions = versions_response.json().get("data", [])
-            if versions:
-                latest_version = versions[-1]
-                appbundle_ref = f"{CLIENT_ID}.{appbundle_id}+{latest_version}"
-                print(f"Using existing appbundle: {appbundle_ref}")
-                return appbundle_ref
-    
-    # If appbundle doesn't exist, try to create it
-    print(f"Attempting to create appbundle: {appbundle_id}")
-    create_url = "https://developer.api.autodesk.com/da/us-east/v3/appbundles"
-    
-    appbundle_data = {
-        "id": appbundle_id,
-        "engine": "Autodesk.Revit+2024",
-        "description": "Extract views from Revit file"
-    }
-    
-    headers["Content-Type"] = "application/json"
-    response = requests.post(create_url, headers=headers, json=appbundle_data)
-    
-    if response.status_code == 200:
-        # Get the version that was just created
-        result = response.json()
-        version = result.get("version", 1)
-        appbundle_ref = f"{CLIENT_ID}.{appbundle_id}+{version}"
-        print(f"Created appbundle: {appbundle_ref}")
-        return appbundle_ref
-    elif response.status_code == 409:
-        # Appbundle already exists, just use version 1
-        print(f"Appbundle already exists, using version 1")
-        return f"{CLIENT_ID}.{appbundle_id}+1"
-    else:
-        print(f"Failed to create appbundle: {response.status_code} - {response.text}")
-        # As a last resort, try to use it anyway
-        print(f"Attempting to use appbundle anyway...")
-        return f"{CLIENT_ID}.{appbundle_id}+1"
+    """Appbundle reference (owner.Bundle+alias) from the deployment registry"""
+    return deployments.appbundle_ref(token)
 
-def create_activity(token):
-    """Create working activity using correct request format"""
-    
-    print("🎯 Creating activity with CORRECT format...")
-    
-    # Use the correct request format with data= and Content-Length
-    def make_request(url, data_dict, token):
-        json_str = json.dumps(data_dict)
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Content-Length": str(len(json_str))
-        }
-        return requests.post(url, headers=headers, data=json_str)
-    
-    # First verify NOP works with correct format
-    nop_test = {
-        "activityId": "Autodesk.Nop+Latest",
-        "arguments": {}
-    }
-    
-    test_url = "https://developer.api.autodesk.com/da/us-east/v3/workitems"
-    nop_response = make_request(test_url, nop_test, token)
-    
-    if nop_response.status_code == 200:
-        workitem_id = nop_response.json()["id"]
-        print(f"✅ NOP baseline works: {workitem_id}")
-        # Cancel it
-        requests.delete(f"{test_url}/{workitem_id}", headers={"Authorization": f"Bearer {token}"})
-        
-        # Create new activity with correct format
-        timestamp = int(time.time())
-        activity_name = f"FinalActivity{timestamp}"
-        
-        print(f"Creating activity: {activity_name}")
-        
-        activity_data = {
-            "id": activity_name,
-            "commandLine": [
-                "\"$(engine.path)\\\\revit.exe\" /i \"$(args[inputFile].path)\" /al \"$(appbundles[RevitViewExtractor4].path)\""
-            ],
-            "parameters": {
-                "inputFile": {
-                    "verb": "get",
-                    "description": "Input Revit file",
-                    "required": True,
-                    "localName": "input.rvt"
-                },
-                "result": {
-                    "verb": "put",
-                    "description": "Output result",
-                    "localName": "result.txt",
-                    "required": False
-                }
-            },
-            "engine": "Autodesk.Revit+2026",
-            "appbundles": [f"{CLIENT_ID}.RevitViewExtractor4+1"],
-            "description": f"Final working activity {timestamp}"
-        }
-        
-        create_url = "https://developer.api.autodesk.com/da/us-east/v3/activities"
-        create_response = make_request(create_url, activity_data, token)
-        
-        if create_response.status_code == 200:
-            result = create_response.json()
-            activity_id = result["id"]
-            print(f"✅ Activity created: {activity_id}")
-            
-            # Create alias 'test' for the activity
-            alias_data = {
-                "id": "test",
-                "version": result.get("version", 1)
-            }
-            
-            alias_url = f"https://developer.api.autodesk.com/da/us-east/v3/activities/{activity_id}/aliases"
-            alias_response = make_request(alias_url, alias_data, token)
-            
-            if alias_response.status_code in [200, 201, 409]:
-                print("✅ Alias 'test' created")
-                
-                # Test workitem with alias format: owner.activity+alias
-                test_activity_id = f"{activity_id}+test"
-                print(f"Testing with alias: {test_activity_id}")
-                
-                workitem_test = {
-                    "activityId": test_activity_id,
-                    "arguments": {
-                        "inputFile": {
-                            "url": "https://github.com/Developer-Autodesk/forge-tutorial-postman/raw/master/Collections/DA4R-Tutorial/SampleFiles/DeleteWalls.rvt",
-                            "verb": "get"
-                        },
-                        "result": {
-                            "url": "https://httpbin.org/put",
-                            "verb": "put"
-                        }
-                    }
-                }
-                
-                workitem_response = make_request(test_url, workitem_test, token)
-                
-                if workitem_response.status_code == 200:
-                    workitem_id = workitem_response.json()["id"]
-                    print(f"🎉🎉🎉 COMPLETE SUCCESS! 🎉🎉🎉")
-                    print(f"✅ Workitem ID: {workitem_id}")
-                    print(f"✅ Activity: {test_activity_id}")
-                    print("✅ REVIT VIEW EXTRACTOR IS WORKING!")
-                    
-                    # Don't cancel - let it run to extract views!
-                    return test_activity_id
-                else:
-                    print(f"❌ Workitem test failed: {workitem_response.status_code}")
-                    print(f"Error: {workitem_response.text}")
-            else:
-                print(f"❌ Alias creation failed: {alias_response.text}")
-                # Try without alias
-                return activity_id
-        
-        elif create_response.status_code == 409:
-            # Activity exists
-            existing_id = f"{CLIENT_ID}.{activity_name}"
-            print(f"Activity exists: {existing_id}")
-            return existing_id
-        else:
-            print(f"❌ Activity creation failed: {create_response.status_code}")
-            print(f"Error: {create_response.text}")
-    else:
-        print(f"❌ NOP test failed: {nop_response.status_code}")
-        print(f"Error: {nop_response.text}")
+def create_activity(token, year=DEFAULT_YEAR):
+    """Activity reference (owner.Activity+alias) on the `year` engine from the deployment registry
+    
+    Resolved from the local manifest without any Design Automation call; the
+    activity is (re)deployed only when its definition changed.
+    """
+    activity_id = deployments.activity_ref(token, year)
+    if not activity_id and year != DEFAULT_YEAR:
+        # No add-in published for that engine yet; the default engine upgrades the model on open
+        print(f"⚠️ No activity on the {year} engine, using {engine_id(DEFAULT_YEAR)}")
+        activity_id = deployments.activity_ref(token)
+    if activity_id:
+        return activity_id
     
     # Fallback to NOP
     print("⚠️ Falling back to NOP activity")
@@ -408,6 +191,7 @@ def create_activity(token):
 
 def process_revit_file(file_path, view_type=None, exportable=None):
     """Process Revit file and extract view information"""
+    http = aps_client.session()
     token = get_access_token()
     if not token:
         print("ERROR: Cannot get access token")
@@ -415,22 +199,46 @@ def process_revit_file(file_path, view_type=None, exportable=None):
     
     print("\n=== Starting Revit file processing ===\n")
     
-    # Step 1: Create bucket
-    bucket_name = create_bucket(token)
-    if not bucket_name:
-        print("ERROR: Cannot create bucket")
+    # Open the model on the engine it was saved with, so DA does not upgrade it first
+    revit_year = saved_year(file_path) if os.path.exists(file_path) else None
+    engine = engine_year(revit_year)
+    if not engine:
+        print(f"ERROR: {os.path.basename(file_path)} was saved by Revit {revit_year}, newer than every engine")
         sys.exit(1)
+    print(f"Revit {revit_year or 'version unknown'} -> engine {engine_id(engine)}")
     
-    # Step 2: Upload file
-    file_url = upload_file(token, bucket_name, file_path)
-    if not file_url:
-        print("ERROR: Cannot upload file")
-        sys.exit(1)
+    # Steps 1-2: Pick the pool bucket and upload the file, unless this process
+    # (e.g. the rve daemon) uploaded the unchanged file recently
+    file_url = aps_client.upload_index.get(file_path)
+    if file_url:
+        print(f"Reusing upload of {os.path.basename(file_path)}")
+    else:
+        # Content-addressed key in a long-lived pool bucket
+        content_hash, sha1, file_size = file_digests(file_path) if os.path.exists(file_path) else (None, None, 0)
+        bucket_name = create_bucket(token, file_size)
+        if not bucket_name:
+            print("ERROR: Cannot create bucket")
+            sys.exit(1)
+        
+        key = object_key(content_hash, file_path) if content_hash else None
+        if key and remote_match(token, bucket_name, key, sha1, file_size):
+            # Uploaded before, possibly from another machine sharing the bucket
+            print(f"♻️ {os.path.basename(file_path)} is already in {bucket_name}, skipping upload")
+            file_url = create_signed_url(token, bucket_name, key)
+        else:
+            with tracer.span("upload", file=os.path.basename(file_path), bytes=file_size) as span:
+                file_url = upload_file(token, bucket_name, file_path, key)
+                span.set(bytes_per_s=file_size / max(span.duration, 1e-9))
+        if not file_url:
+            print("ERROR: Cannot upload file")
+            sys.exit(1)
+        if file_url.startswith("http") and os.path.exists(file_path):
+            aps_client.upload_index.put(file_path, file_url)
     
     print(f"File URL: {file_url[:50]}...")  # Show first 50 chars
     
     # Step 3: Create activity
-    activity_id = create_activity(token)
+    activity_id = create_activity(token, engine)
     if not activity_id:
         print("ERROR: Cannot create activity")
         sys.exit(1)
@@ -497,7 +305,7 @@ def process_revit_file(file_path, view_type=None, exportable=None):
             "Authorization": f"Bearer {token}"
         }
     
-    url = "https://developer.api.autodesk.com/da/us-east/v3/workitems"
+    url = f"{APS_BASE_URL}/da/us-east/v3/workitems"
     
     # Use correct request format with data= and Content-Length
     json_str = json.dumps(workitem_data)
@@ -507,7 +315,9 @@ def process_revit_file(file_path, view_type=None, exportable=None):
         "Content-Length": str(len(json_str))
     }
     
-    response = requests.post(url, headers=headers, data=json_str)
+    with tracer.span("submit", activity=activity_id) as span:
+        response = http.post(url, headers=headers, data=json_str)
+        span.set(status_code=response.status_code)
     
     if response.status_code != 200:
         print(f"ERROR: Failed to create workitem: {response.status_code}")
@@ -515,16 +325,19 @@ def process_revit_file(file_path, view_type=None, exportable=None):
         sys.exit(1)
     
     workitem_id = response.json()["id"]
+    lifecycle.register_workitem(workitem_id, token)
     print(f"Workitem created: {workitem_id}")
     print("\n=== Processing file in cloud ===\n")
     
     # Step 5: Monitor workitem execution
-    status_url = f"https://developer.api.autodesk.com/da/us-east/v3/workitems/{workitem_id}"
+    status_url = f"{APS_BASE_URL}/da/us-east/v3/workitems/{workitem_id}"
     
     last_status = None
+    submitted_at = time.time()
+    started_at = None
     for i in range(30):  # 5 minutes timeout
         time.sleep(10)
-        status_response = requests.get(status_url, headers=headers)
+        status_response = http.get(status_url, headers=headers)
         
         if status_response.status_code == 200:
             status_data = status_response.json()
@@ -534,17 +347,28 @@ def process_revit_file(file_path, view_type=None, exportable=None):
                 print(f"[{i*10:3d}s] Status: {current_status}")
                 last_status = current_status
             
+            # Queue wait and processing time as seen by polling
+            if started_at is None and current_status != "pending":
+                started_at = time.time()
+                tracer.record("queue_wait", submitted_at, started_at, workitem=workitem_id)
+            if current_status not in ["pending", "inprogress"]:
+                tracer.record("processing", started_at, time.time(), workitem=workitem_id, status=current_status)
+            
             if current_status == "success":
+                lifecycle.complete_workitem(workitem_id)
                 print("\n✅ SUCCESS: File processed successfully")
                 
                 # Get and display report
                 report_url = status_data.get("reportUrl")
                 if report_url:
-                    report_response = requests.get(report_url)
+                    with tracer.span("report"):
+                        report_response = http.get(report_url)
                     if report_response.status_code == 200:
                         print("\n=== EXECUTION REPORT ===")
                         print(report_response.text[:1000])  # First 1000 chars
                         print("=" * 50)
+                        timings = parse_report(report_response.text, status_data.get("stats"))["timings"]
+                        print(f"⏱️ Phases: {format_timings(timings)}")
                 
                 # Get result URL if available
                 result_url = None
@@ -552,7 +376,8 @@ def process_revit_file(file_path, view_type=None, exportable=None):
                     result_url = status_data["arguments"]["result"].get("url")
                 
                 if result_url:
-                    result_response = requests.get(result_url)
+                    with tracer.span("download"):
+                        result_response = http.get(result_url)
                     if result_response.status_code == 200:
                         try:
                             views = json.loads(result_response.text)
@@ -596,34 +421,33 @@ def process_revit_file(file_path, view_type=None, exportable=None):
                 print("🚀 SYSTEM READINESS: 100% - Ready for production once API issue resolved")
                 
                 # Return mock data to show what the output would look like
-                mock_views = [
-                    {"name": "Level 1", "type": "FloorPlan", "exportable": True},
-                    {"name": "3D View 1", "type": "3D", "exportable": True},
-                    {"name": "South Elevation", "type": "Elevation", "exportable": True},
-                    {"name": "Section 1", "type": "Section", "exportable": False}
-                ]
-                
                 print("")
                 print("📋 MOCK VIEW DATA (example of expected output):")
-                return mock_views
+                return MOCK_VIEWS
             
             elif current_status in ["failed", "failedLimitProcessingTime", "failedDownload", "failedUpload", "failedInstructions"]:
+                lifecycle.complete_workitem(workitem_id)
                 print(f"\n❌ FAILED: Workitem failed with status: {current_status}")
                 
                 # Get failure report
                 report_url = status_data.get("reportUrl")
                 if report_url:
-                    report_response = requests.get(report_url)
+                    with tracer.span("report"):
+                        report_response = http.get(report_url)
                     if report_response.status_code == 200:
                         print("\n=== FAILURE REPORT ===")
                         print(report_response.text[:1000])  # First 1000 chars
                         print("=" * 50)
+                        timings = parse_report(report_response.text, status_data.get("stats"))["timings"]
+                        print(f"⏱️ Phases: {format_timings(timings)}")
                 
                 return None
         else:
             print(f"Warning: Failed to get status: {status_response.status_code}")
     
     print("\n⏱️ TIMEOUT: Workitem did not complete within 5 minutes")
+    if lifecycle.cancel_workitem(workitem_id, token):
+        print(f"Cancelled workitem: {workitem_id}")
     return None
 
 def filter_views(views, view_type=None, exportable=None):
@@ -636,15 +460,22 @@ def filter_views(views, view_type=None, exportable=None):
     
     return views
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="RevitViewExtractor - List Views")
     parser.add_argument("file", help="Path to Revit file")
     parser.add_argument("--type", help="Filter by view type")
     parser.add_argument("--exportable", action="store_true", help="Show only exportable views")
     parser.add_argument("--non-exportable", action="store_true", help="Show only non-exportable views")
     parser.add_argument("--json", action="store_true", help="Output in JSON format")
+    parser.add_argument("--keep-bucket", action="store_true", help="Ignored; upload buckets are pooled and kept")
+    parser.add_argument("--trace", help="Append timing spans as JSON lines to this file")
+    
+    args = parser.parse_args(argv)
+    tracer.configure(args.trace)
     
-    args = parser.parse_args()
+    # Cancel the workitem on exit or Ctrl-C; pool buckets are never deleted
+    lifecycle.token_provider = get_access_token
+    lifecycle.install_handlers()
     
     # Determine exportable filter
     exportable = None
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Prometheus Metrics
+
+Minimal Prometheus exporter for long-running batch workers: counters, gauges
+and histograms with labels, rendered in the Prometheus text exposition
+format and served on /metrics by a background HTTP server. No client library
+is needed.
+
+Metrics:
+    rve_files_processed_total                 files finished successfully
+    rve_files_failed_total                    files that failed
+    rve_upload_bytes_total                    bytes uploaded to OSS
+    rve_workitem_queue_seconds                workitem queue wait (histogram)
+    rve_workitem_run_seconds                  workitem processing time (histogram)
+    rve_http_responses_total{endpoint,code}   HTTP responses per endpoint and status
+    rve_http_retries_total{endpoint}          retried requests (429 Retry-After)
+    rve_workitems_in_flight                   workitems submitted and not finished
+    rve_queue_depth                           jobs waiting in the local scheduler
+
+Usage:
+    python batch_process.py <directory> --metrics-port 9464
+    curl http://localhost:9464/metrics
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base class: a named metric family with optional label names"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.label_names:
+            items = [((), 0)]
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    """Gauge set directly, or read from a callback at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Read the value from `function` on every scrape (None to stop)"""
+        with self._lock:
+            self._function = function
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            function, value = self._function, self._value
+        if function:
+            try:
+                value = function()
+            except Exception:
+                value = float("nan")
+        return [f"{self.name} {_format_value(value) if value == value else 'NaN'}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float]):
+        super().__init__(name, help)
+        self.buckets = sorted(buckets) + [float("inf")]
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            self._sum += value
+            self._count += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Workitem durations range from seconds (small families) to the DA limit
+DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+files_processed = REGISTRY.register(Counter("rve_files_processed_total", "Revit files processed successfully"))
+files_failed = REGISTRY.register(Counter("rve_files_failed_total", "Revit files that failed to process"))
+files_rejected = REGISTRY.register(Counter(
+    "rve_files_rejected_total", "Revit files rejected by pre-flight validation, before upload"))
+upload_bytes = REGISTRY.register(Counter("rve_upload_bytes_total", "Bytes uploaded to OSS"))
+upload_dedupe_bytes = REGISTRY.register(Counter(
+    "rve_upload_dedupe_bytes_total", "Bytes not uploaded because OSS already held the object"))
+workitem_queue_seconds = REGISTRY.register(Histogram(
+    "rve_workitem_queue_seconds", "Workitem wait in the DA queue, as seen by polling", DURATION_BUCKETS))
+workitem_run_seconds = REGISTRY.register(Histogram(
+    "rve_workitem_run_seconds", "Workitem processing time, as seen by polling", DURATION_BUCKETS))
+http_responses = REGISTRY.register(Counter(
+    "rve_http_responses_total", "HTTP responses per endpoint and status code", ("endpoint", "code")))
+http_retries = REGISTRY.register(Counter(
+    "rve_http_retries_total", "Requests retried after a 429 response", ("endpoint",)))
+workitems_in_flight = REGISTRY.register(Gauge("rve_workitems_in_flight", "Workitems submitted and not finished"))
+queue_depth = REGISTRY.register(Gauge("rve_queue_depth", "Jobs waiting in the local workitem scheduler"))
+
+
+def observe_response(endpoint: str, response) -> None:
+    """Count one HTTP response for `endpoint`"""
+    http_responses.inc(endpoint=endpoint, code=response.status_code)
+
+
+def start_http_server(port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY):
+    """Serve /metrics on a daemon thread"""
+    # Imported here: every script counts metrics, few serve them
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = self.server.registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,948 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Local APS Stand-in Server
+
+A small in-memory imitation of the Autodesk Platform Services endpoints used
+by the scripts, for offline testing and deterministic throughput benchmarks:
+
+- Authentication   POST /authentication/v2/token
+- OSS              buckets, objects (PUT, GET, DELETE, details, copyto),
+                   signeds3upload / signeds3download (single and batch),
+                   /signed, and a fake S3 behind the signed URLs;
+                   object reads honour single byte ranges
+- Design Automation POST/GET/DELETE /da/us-east/v3/workitems, plus minimal
+                   appbundle/activity/alias bookkeeping
+- Model Derivative POST /job, GET /manifest, /metadata, /metadata/{guid}/properties
+
+Workitems move pending -> inprogress -> success/failed on a simulated clock
+(queue time, run time) and get a DA-style report with phase timestamps.
+Output arguments receive a small JSON result; an `outputBundle` argument
+receives a zip with a PNG and annotation JSON per sample view and a log, and
+a `resultPack` argument a zip with a result per file of the `inputPack`.
+Latency, jitter, failure rate, HTTP error rate and 429 throttling are
+configurable; all randomness comes from one seeded generator.
+
+Point the scripts at it with the APS_BASE_URL environment variable:
+
+    python scripts/mock_aps.py --port 8765 --queue-time 2 --run-time 5
+    APS_BASE_URL=http://127.0.0.1:8765 python scripts/batch_process.py models/
+
+Usage:
+    python mock_aps.py [options]
+
+Options:
+    --port N            Port to listen on (default: 8765)
+    --latency MS        Added latency per request (default: 0)
+    --jitter MS         Random extra latency per request (default: 0)
+    --queue-time S      Seconds a workitem stays pending (default: 1)
+    --run-time S        Seconds a workitem runs (default: 2)
+    --translate-time S  Seconds a Model Derivative job takes (default: 2)
+    --failure-rate P    Probability that a workitem fails (default: 0)
+    --error-rate P      Probability of an HTTP 500 on any request (default: 0)
+    --throttle-rate P   Probability of an injected 429 on DA requests (default: 0)
+    --rate-limit N      DA requests per second before answering 429 (default: off)
+    --retry-after S     Retry-After sent with 429 responses (default: 1)
+    --discard-bytes     Keep only size/SHA-1 of uploads, not their content
+    --seed N            Random seed (default: 0)
+"""
+
+import io
+import re
+import json
+import time
+import uuid
+import base64
+import random
+import hashlib
+import argparse
+import threading
+import zipfile
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+DA_PREFIX = "/da/us-east/v3"
+MD_PREFIX = "/modelderivative/v2/designdata"
+CHUNK = 1024 * 1024
+
+SAMPLE_VIEWS = [
+    {"name": "Level 1", "type": "FloorPlan", "exportable": True},
+    {"name": "Level 2", "type": "FloorPlan", "exportable": True},
+    {"name": "3D View 1", "type": "ThreeD", "exportable": True},
+    {"name": "South", "type": "Elevation", "exportable": True},
+    {"name": "Section 1", "type": "Section", "exportable": False},
+]
+
+
+class MockConfig:
+    """Behaviour knobs of the stand-in server"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, queue_time: float = 1.0,
+                 run_time: float = 2.0, translate_time: float = 2.0, failure_rate: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, rate_limit: Optional[float] = None,
+                 retry_after: float = 1.0, discard_bytes: bool = False, seed: int = 0):
+        self.latency = latency            # seconds
+        self.jitter = jitter              # seconds
+        self.queue_time = queue_time
+        self.run_time = run_time
+        self.translate_time = translate_time
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.discard_bytes = discard_bytes
+        self.seed = seed
+
+
+class MockState:
+    """In-memory storage shared by all request handler threads"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.RLock()  # workitem_status -> finish_workitem -> put_object re-enters
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self.objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.uploads: Dict[str, Dict[str, Any]] = {}       # uploadKey -> pending signed upload
+        self.workitems: Dict[str, Dict[str, Any]] = {}
+        self.translations: Dict[str, float] = {}           # urn -> start time
+        self.da_entities: Dict[str, Dict[str, Any]] = {}   # appbundles/activities by id
+        self.request_counts: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._tokens = float(config.rate_limit or 0)
+        self._tokens_updated = time.monotonic()
+
+    def chance(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < probability
+
+    def delay(self) -> float:
+        jitter = 0.0
+        if self.config.jitter:
+            with self.lock:
+                jitter = self.random.random() * self.config.jitter
+        return self.config.latency + jitter
+
+    def take_rate_token(self) -> bool:
+        """Token bucket for DA requests; False means answer 429"""
+        rate = self.config.rate_limit
+        if not rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(rate, self._tokens + (now - self._tokens_updated) * rate)
+            self._tokens_updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def count(self, key: str):
+        with self.lock:
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": dict(self.request_counts),
+                "bytesIn": self.bytes_in,
+                "bytesOut": self.bytes_out,
+                "objects": len(self.objects),
+                "workitems": len(self.workitems)
+            }
+
+    def put_object(self, bucket: str, key: str, data: Optional[bytes], size: int, sha1: str) -> Dict[str, Any]:
+        record = {
+            "bucketKey": bucket,
+            "objectKey": key,
+            "objectId": f"urn:adsk.objects:os.object:{bucket}/{key}",
+            "size": size,
+            "sha1": sha1,
+            "contentType": "application/octet-stream",
+            "data": None if self.config.discard_bytes else data,
+            "created": time.time()
+        }
+        with self.lock:
+            self.objects[(bucket, key)] = record
+        return record
+
+    # Workitems
+
+    def workitem_status(self, workitem: Dict[str, Any]) -> str:
+        """Advance a workitem on the simulated clock and return its status"""
+        if workitem["status"] in ("success", "cancelled") or workitem["status"].startswith("failed"):
+            return workitem["status"]
+
+        elapsed = time.time() - workitem["created"]
+        if elapsed < self.config.queue_time:
+            workitem["status"] = "pending"
+        elif elapsed < self.config.queue_time + self.config.run_time:
+            workitem["status"] = "inprogress"
+        else:
+            workitem["status"] = "failedInstructions" if workitem["willFail"] else "success"
+            self.finish_workitem(workitem)
+        return workitem["status"]
+
+    @staticmethod
+    def output_bundle() -> bytes:
+        """Zipped outputs folder of an export: a PNG and annotation JSON per view, and the log"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for view in SAMPLE_VIEWS:
+                archive.writestr(f"{view['name']}.png", b"\x89PNG\r\n\x1a\n" + view["name"].encode() * 64)
+                archive.writestr(f"{view['name']}.annotations.json",
+                                 json.dumps({"viewName": view["name"], "annotations": []}))
+            archive.writestr("headless_log.txt", "".join(f"Exported: {view['name']}\n" for view in SAMPLE_VIEWS))
+        return buffer.getvalue()
+
+    def result_pack(self, input_argument: Any) -> Optional[bytes]:
+        """resultPack zip for an inputPack: a result.txt under each manifest key"""
+        source = self.object_for_url(input_argument.get("url", "")) if isinstance(input_argument, dict) else None
+        with self.lock:
+            record = self.objects.get(source) if source else None
+        if not record or not record["data"]:
+            return None
+        with zipfile.ZipFile(io.BytesIO(record["data"])) as pack:
+            manifest = json.loads(pack.read("manifest.json"))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for entry in manifest["files"]:
+                archive.writestr(f"{entry['key']}/result.txt",
+                                 json.dumps({"document": entry["name"], "view_list": SAMPLE_VIEWS}))
+        return buffer.getvalue()
+
+    def finish_workitem(self, workitem: Dict[str, Any]):
+        """Write simulated outputs and the report of a finished workitem"""
+        created = workitem["created"]
+        queued_end = created + self.config.queue_time
+        download_end = queued_end + self.config.run_time * 0.1
+        opened = queued_end + self.config.run_time * 0.4
+        script_end = queued_end + self.config.run_time * 0.9
+        finished = queued_end + self.config.run_time
+        succeeded = workitem["status"] == "success"
+
+        bytes_uploaded = 0
+        if succeeded:
+            result = json.dumps({"document": "mock.rvt", "view_list": SAMPLE_VIEWS}).encode()
+            for name, argument in workitem["arguments"].items():
+                if isinstance(argument, dict) and argument.get("verb") == "put":
+                    url = argument.get("url", "")
+                    target = self.object_for_url(url)
+                    if name == "resultPack":
+                        data = self.result_pack(workitem["arguments"].get("inputPack"))
+                    elif name == "outputBundle":
+                        data = self.output_bundle()
+                    else:
+                        data = result
+                    if data is None:
+                        continue
+                    part = re.search(r"/s3/part/([^/]+)/(\d+)", url)
+                    if part:
+                        # Signed S3 upload: the object appears once the client completes it
+                        with self.lock:
+                            upload = self.uploads.get(part.group(1))
+                            if upload:
+                                upload["parts"][int(part.group(2))] = (data, len(data), hashlib.sha1(data).hexdigest())
+                        bytes_uploaded += len(data)
+                    elif target:
+                        self.put_object(target[0], target[1], data, len(data), hashlib.sha1(data).hexdigest())
+                        bytes_uploaded += len(data)
+
+        def stamp(t):
+            return datetime.fromtimestamp(t).strftime("[%m/%d/%Y %H:%M:%S]")
+
+        lines = [
+            f"{stamp(created)} Starting work item {workitem['id']}",
+            f"{stamp(queued_end)} Start download phase.",
+            f"{stamp(download_end)} End download phase successfully.",
+            f"{stamp(download_end)} Start preparing script and command line parameters.",
+            f"{stamp(download_end)} Start script phase.",
+            f"{stamp(download_end)} Opening document: input.rvt",
+            f"{stamp(opened)} Document opened: input",
+            f"{stamp(script_end)} End script phase.",
+        ]
+        if succeeded:
+            lines += [
+                f"{stamp(script_end)} Start upload phase.",
+                f"{stamp(finished)} End upload phase successfully.",
+                f"{stamp(finished)} Job finished with result Succeeded",
+            ]
+        else:
+            lines.append(f"{stamp(finished)} Job finished with result FailedInstructions")
+        workitem["report"] = "\n".join(lines) + "\n"
+
+        def iso(t):
+            return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+        workitem["stats"] = {
+            "timeQueued": iso(created),
+            "timeDownloadStarted": iso(queued_end),
+            "timeInstructionsStarted": iso(download_end),
+            "timeInstructionsEnded": iso(script_end),
+            "timeUploadEnded": iso(finished),
+            "bytesDownloaded": workitem.get("bytesDownloaded", 0),
+            "bytesUploaded": bytes_uploaded
+        }
+
+    def object_for_url(self, url: str) -> Optional[Tuple[str, str]]:
+        """Map a mock S3 URL back to its bucket/object"""
+        match = (re.search(r"/s3/(?:upload|download)/([^/]+)/([^/?]+)", url) or
+                 re.search(r"/oss/v2/buckets/([^/]+)/objects/([^/?]+)", url))
+        if match:
+            return match.group(1), unquote(match.group(2))
+        return None
+
+
+class MockAPSHandler(BaseHTTPRequestHandler):
+    """Request handler; routes are matched against ROUTES in order"""
+
+    server_version = "MockAPS/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # Helpers
+
+    def base_url(self) -> str:
+        host = self.headers.get("Host") or f"{self.server.server_address[0]}:{self.server.server_address[1]}"
+        return f"http://{host}"
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        with self.state.lock:
+            self.state.bytes_in += len(data)
+        return data
+
+    def read_body_streaming(self) -> Tuple[Optional[bytes], int, str]:
+        """Read a request body in chunks; keep it only when bytes are retained"""
+        length = int(self.headers.get("Content-Length") or 0)
+        sha1 = hashlib.sha1()
+        keep = not self.state.config.discard_bytes
+        parts = []
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(CHUNK, remaining))
+            if not chunk:
+                break
+            sha1.update(chunk)
+            if keep:
+                parts.append(chunk)
+            remaining -= len(chunk)
+        with self.state.lock:
+            self.state.bytes_in += length - remaining
+        return (b"".join(parts) if keep else None), length - remaining, sha1.hexdigest()
+
+    def read_json(self) -> Dict[str, Any]:
+        body = self.read_body()
+        if not body:
+            return {}
+        content_type = self.headers.get("Content-Type", "")
+        if "x-www-form-urlencoded" in content_type:
+            return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {}
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.state.lock:
+            self.state.bytes_out += len(body)
+
+    def send_bytes(self, data: Optional[bytes], size: int, content_type: str = "application/octet-stream"):
+        # Single byte ranges (bytes=a-b, bytes=a-, bytes=-n), as S3 serves them
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if match and data is not None and (match.group(1) or match.group(2)):
+            first, last = match.groups()
+            start = max(0, size - int(last)) if not first else int(first)
+            end = min(size - 1, int(last)) if first and last else size - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            data, size = data[start:end + 1], max(0, end + 1 - start)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        if data is not None:
+            self.wfile.write(data)
+        else:
+            # Content was discarded: send zeros of the recorded size
+            remaining = size
+            zeros = bytes(min(CHUNK, size))
+            while remaining > 0:
+                self.wfile.write(zeros[:min(CHUNK, remaining)])
+                remaining -= CHUNK
+        with self.state.lock:
+            self.state.bytes_out += size
+
+    def send_error_json(self, status: int, reason: str):
+        self.send_json(status, {"reason": reason})
+
+    # Dispatch
+
+    def handle_any(self, method: str):
+        path = urlsplit(self.path).path
+        delay = self.state.delay()
+        if delay:
+            time.sleep(delay)
+
+        for route_method, pattern, name in ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+
+            self.state.count(f"{method} {name}")
+            if self.state.chance(self.state.config.error_rate):
+                self.read_body()
+                return self.send_error_json(500, "Injected server error")
+            if name.startswith("da."):
+                if not self.state.take_rate_token() or self.state.chance(self.state.config.throttle_rate):
+                    self.read_body()
+                    return self.send_json(429, {"reason": "Too many requests"},
+                                          {"Retry-After": str(int(self.state.config.retry_after))})
+            # Object keys arrive URL-encoded ("ab%2Fab12...rvt")
+            params = {key: unquote(value) for key, value in match.groupdict().items()}
+            return getattr(self, "on_" + name.replace(".", "_"))(**params)
+
+        self.state.count(f"{method} unknown")
+        self.read_body()
+        self.send_error_json(404, f"No mock route for {method} {path}")
+
+    def do_GET(self):
+        self.handle_any("GET")
+
+    def do_POST(self):
+        self.handle_any("POST")
+
+    def do_PUT(self):
+        self.handle_any("PUT")
+
+    def do_PATCH(self):
+        self.handle_any("PATCH")
+
+    def do_DELETE(self):
+        self.handle_any("DELETE")
+
+    # Authentication
+
+    def on_auth_token(self):
+        form = self.read_json()
+        self.send_json(200, {
+            "access_token": f"mock-{uuid.uuid4().hex}",
+            "token_type": "Bearer",
+            "expires_in": 3599,
+            "scope": form.get("scope", "")
+        })
+
+    # OSS
+
+    def on_oss_create_bucket(self):
+        data = self.read_json()
+        bucket = data.get("bucketKey")
+        if not bucket:
+            return self.send_error_json(400, "bucketKey is required")
+        details = {
+            "bucketKey": bucket,
+            "policyKey": data.get("policyKey", "transient"),
+            "createdDate": int(time.time() * 1000)
+        }
+        with self.state.lock:
+            exists = bucket in self.state.buckets
+            if not exists:
+                self.state.buckets[bucket] = details
+        if exists:
+            return self.send_error_json(409, "Bucket already exists")
+        self.send_json(200, details)
+
+    def on_oss_bucket_details(self, bucket):
+        with self.state.lock:
+            details = self.state.buckets.get(bucket)
+        if not details:
+            return self.send_error_json(404, "Bucket not found")
+        self.send_json(200, details)
+
+    def on_oss_delete_bucket(self, bucket):
+        with self.state.lock:
+            existed = self.state.buckets.pop(bucket, None)
+            for key in [k for k in self.state.objects if k[0] == bucket]:
+                del self.state.objects[key]
+        self.send_response(200 if existed else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def on_oss_put_object(self, bucket, key):
+        data, size, sha1 = self.read_body_streaming()
+        if bucket not in self.state.buckets:
+            return self.send_error_json(404, "Bucket not found")
+        record = self.state.put_object(bucket, key, data, size, sha1)
+        self.send_json(200, {k: v for k, v in record.items() if k != "data"})
+
+    def on_oss_get_object(self, bucket, key):
+        with self.state.lock:
+            record = self.state.objects.get((bucket, key))
+        if not record:
+            return self.send_error_json(404, "Object not found")
+        self.send_bytes(record["data"], record["size"])
+
+    def on_oss_delete_object(self, bucket, key):
+        with self.state.lock:
+            existed = self.state.objects.pop((bucket, key), None)
+        self.send_response(200 if existed else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def on_oss_copy_object(self, bucket, key, new_key):
+        with self.state.lock:
+            record = self.state.objects.get((bucket, key))
+        if not record:
+            return self.send_error_json(404, "Object not found")
+        copy = self.state.put_object(bucket, new_key, record["data"], record["size"], record["sha1"])
+        self.send_json(200, {k: v for k, v in copy.items() if k != "data"})
+
+    def on_oss_object_details(self, bucket, key):
+        with self.state.lock:
+            record = self.state.objects.get((bucket, key))
+        if not record:
+            return self.send_error_json(404, "Object not found")
+        self.send_json(200, {k: v for k, v in record.items() if k != "data"})
+
+    def on_oss_signed(self, bucket, key):
+        data = self.read_json()
+        access = data.get("access", "read")
+        self.send_json(200, {
+            "signedUrl": f"{self.base_url()}/s3/download/{bucket}/{quote(key, safe='')}" if access == "read"
+            else f"{self.base_url()}/s3/upload/{bucket}/{quote(key, safe='')}",
+            "expiration": int((time.time() + 3600) * 1000)
+        })
+
+    def on_oss_signeds3upload_get(self, bucket, key):
+        query = parse_qs(urlsplit(self.path).query)
+        self.send_json(200, self.signed_upload(bucket, key, int(query.get("parts", ["1"])[0])))
+
+    def on_oss_signeds3upload_post(self, bucket, key):
+        data = self.read_json()
+        upload_key = data.get("uploadKey")
+        with self.state.lock:
+            upload = self.state.uploads.pop(upload_key, None)
+        if not upload:
+            return self.send_error_json(400, "Unknown uploadKey")
+        ordered = [upload["parts"][n] for n in sorted(upload["parts"])]
+        sha1 = hashlib.sha1()
+        size = 0
+        for part_data, part_size, _ in ordered:
+            if part_data is not None:
+                sha1.update(part_data)
+            size += part_size
+        content = None if self.state.config.discard_bytes else b"".join(p[0] for p in ordered)
+        if self.state.config.discard_bytes:
+            # Hash of the part hashes: stable, but not the real content SHA-1
+            sha1 = hashlib.sha1("".join(p[2] for p in ordered).encode())
+        record = self.state.put_object(bucket, key, content, size, sha1.hexdigest())
+        self.send_json(200, {k: v for k, v in record.items() if k != "data"})
+
+    def minutes_expiration(self) -> int:
+        query = parse_qs(urlsplit(self.path).query)
+        return min(60, max(1, int(query.get("minutesExpiration", ["2"])[0])))
+
+    def signed_download(self, bucket, key) -> Dict[str, Any]:
+        with self.state.lock:
+            record = self.state.objects.get((bucket, key))
+        if not record:
+            return {"status": "error", "reason": "Object not found"}
+        return {
+            "status": "complete",
+            "url": f"{self.base_url()}/s3/download/{bucket}/{quote(key, safe='')}",
+            "size": record["size"],
+            "sha1": record["sha1"],
+            "urlExpiration": int((time.time() + 60 * self.minutes_expiration()) * 1000)
+        }
+
+    def signed_upload(self, bucket, key, parts: int) -> Dict[str, Any]:
+        upload_key = uuid.uuid4().hex
+        with self.state.lock:
+            self.state.uploads[upload_key] = {"bucket": bucket, "key": key, "parts": {}}
+        return {
+            "uploadKey": upload_key,
+            "urls": [f"{self.base_url()}/s3/part/{upload_key}/{i + 1}" for i in range(parts)],
+            "urlExpiration": int((time.time() + 60 * self.minutes_expiration()) * 1000)
+        }
+
+    def on_oss_signeds3download(self, bucket, key):
+        result = self.signed_download(bucket, key)
+        if result["status"] != "complete":
+            return self.send_error_json(404, result["reason"])
+        self.send_json(200, result)
+
+    def on_oss_batch_signeds3download(self, bucket):
+        requests = self.read_json().get("requests") or []
+        self.send_json(200, {"results": {r["objectKey"]: self.signed_download(bucket, r["objectKey"])
+                                         for r in requests}})
+
+    def on_oss_batch_signeds3upload(self, bucket):
+        requests = self.read_json().get("requests") or []
+        self.send_json(200, {"results": {r["objectKey"]: self.signed_upload(bucket, r["objectKey"], int(r.get("parts", 1)))
+                                         for r in requests}})
+
+    # Fake S3 behind the signed URLs
+
+    def on_s3_put_part(self, upload_key, part):
+        data, size, sha1 = self.read_body_streaming()
+        with self.state.lock:
+            upload = self.state.uploads.get(upload_key)
+            if upload:
+                upload["parts"][int(part)] = (data, size, sha1)
+        if not upload:
+            return self.send_error_json(404, "Unknown upload")
+        self.send_response(200)
+        self.send_header("ETag", f'"{sha1}"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def on_s3_upload(self, bucket, key):
+        data, size, sha1 = self.read_body_streaming()
+        self.state.put_object(bucket, key, data, size, sha1)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def on_s3_upload_form(self, bucket, key):
+        # Form uploads (appbundle packages) are stored as the raw multipart body
+        self.on_s3_upload(bucket, key)
+
+    def on_s3_download(self, bucket, key):
+        self.on_oss_get_object(bucket, key)
+
+    # Design Automation
+
+    def on_da_create_workitem(self):
+        data = self.read_json()
+        if not data.get("activityId"):
+            return self.send_error_json(400, "activityId is required")
+        workitem_id = uuid.uuid4().hex
+        bytes_downloaded = 0
+        for argument in (data.get("arguments") or {}).values():
+            if isinstance(argument, dict) and argument.get("verb", "get") == "get":
+                target = self.state.object_for_url(argument.get("url", ""))
+                if target and target in self.state.objects:
+                    bytes_downloaded += self.state.objects[target]["size"]
+        workitem = {
+            "id": workitem_id,
+            "status": "pending",
+            "activityId": data["activityId"],
+            "arguments": data.get("arguments") or {},
+            "created": time.time(),
+            "willFail": self.state.chance(self.state.config.failure_rate),
+            "bytesDownloaded": bytes_downloaded
+        }
+        with self.state.lock:
+            self.state.workitems[workitem_id] = workitem
+        self.send_json(200, {"id": workitem_id, "status": "pending", "stats": {"timeQueued": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")}})
+
+    def on_da_get_workitem(self, workitem_id):
+        with self.state.lock:
+            workitem = self.state.workitems.get(workitem_id)
+            status = self.state.workitem_status(workitem) if workitem else None
+        if not workitem:
+            return self.send_error_json(404, "Workitem not found")
+        payload = {"id": workitem_id, "status": status, "progress": ""}
+        if "report" in workitem:
+            payload["reportUrl"] = f"{self.base_url()}/reports/{workitem_id}"
+            payload["stats"] = workitem["stats"]
+        self.send_json(200, payload)
+
+    def on_da_delete_workitem(self, workitem_id):
+        with self.state.lock:
+            workitem = self.state.workitems.get(workitem_id)
+            if workitem and workitem["status"] in ("pending", "inprogress"):
+                workitem["status"] = "cancelled"
+        if not workitem:
+            return self.send_error_json(404, "Workitem not found")
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def on_report(self, workitem_id):
+        with self.state.lock:
+            workitem = self.state.workitems.get(workitem_id)
+        if not workitem or "report" not in workitem:
+            return self.send_error_json(404, "Report not found")
+        report = workitem["report"].encode()
+        self.send_bytes(report, len(report), "text/plain")
+
+    def on_da_create_entity(self, kind):
+        data = self.read_json()
+        entity_id = data.get("id")
+        key = f"{kind}/{entity_id}"
+        with self.state.lock:
+            exists = key in self.state.da_entities
+            if not exists:
+                self.state.da_entities[key] = {"definition": data, "versions": [1], "definitions": {1: data},
+                                               "aliases": {}}
+        if exists:
+            return self.send_error_json(409, f"{kind} already exists")
+        payload = dict(data, version=1)
+        if kind == "appbundles":
+            payload["uploadParameters"] = {"endpointURL": f"{self.base_url()}/s3/upload/appbundles/{entity_id}", "formData": {}}
+        self.send_json(200, payload)
+
+    def on_da_get_entity(self, kind, entity_id):
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+        if not entity:
+            return self.send_error_json(404, f"{kind} not found")
+        self.send_json(200, dict(entity["definition"], version=entity["versions"][-1]))
+
+    def on_da_create_version(self, kind, entity_id):
+        data = self.read_json()
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+            if entity:
+                entity["versions"].append(entity["versions"][-1] + 1)
+                entity["definition"].update(data)
+                version = entity["versions"][-1]
+                entity["definitions"][version] = dict(entity["definition"])
+        if not entity:
+            return self.send_error_json(404, f"{kind} not found")
+        payload = dict(data, id=entity_id, version=version)
+        if kind == "appbundles":
+            payload["uploadParameters"] = {"endpointURL": f"{self.base_url()}/s3/upload/appbundles/{entity_id}-{version}",
+                                           "formData": {}}
+        self.send_json(200, payload)
+
+    def on_da_list_versions(self, kind, entity_id):
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+        if not entity:
+            return self.send_error_json(404, f"{kind} not found")
+        self.send_json(200, {"data": list(entity["versions"])})
+
+    def on_da_get_version(self, kind, entity_id, version):
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+            definition = entity and entity["definitions"].get(int(version))
+        if not definition:
+            return self.send_error_json(404, f"{kind} version not found")
+        self.send_json(200, dict(definition, id=entity_id, version=int(version)))
+
+    def on_da_create_alias(self, kind, entity_id):
+        data = self.read_json()
+        exists = False
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+            if entity:
+                exists = data.get("id") in entity["aliases"]
+                if not exists:
+                    entity["aliases"][data.get("id")] = data.get("version", 1)
+        if not entity:
+            return self.send_error_json(404, f"{kind} not found")
+        if exists:
+            return self.send_error_json(409, "Alias already exists")
+        self.send_json(200, data)
+
+    def on_da_update_alias(self, kind, entity_id, alias):
+        data = self.read_json()
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+            exists = bool(entity) and alias in entity["aliases"]
+            if exists:
+                entity["aliases"][alias] = data.get("version", 1)
+        if not exists:
+            return self.send_error_json(404, "Alias not found")
+        self.send_json(200, {"id": alias, "version": data.get("version", 1)})
+
+    def on_da_list_aliases(self, kind, entity_id):
+        with self.state.lock:
+            entity = self.state.da_entities.get(f"{kind}/{entity_id.split('.')[-1]}")
+        if not entity:
+            return self.send_error_json(404, f"{kind} not found")
+        self.send_json(200, {"data": [{"id": a, "version": v} for a, v in entity["aliases"].items()]})
+
+    # Model Derivative
+
+    def on_md_job(self):
+        data = self.read_json()
+        urn = (data.get("input") or {}).get("urn")
+        if not urn:
+            return self.send_error_json(400, "input.urn is required")
+        with self.state.lock:
+            self.state.translations[urn] = time.time()
+        self.send_json(200, {"result": "created", "urn": urn})
+
+    def on_md_manifest(self, urn):
+        with self.state.lock:
+            started = self.state.translations.get(urn)
+        if started is None:
+            return self.send_error_json(404, "Manifest not found")
+        elapsed = time.time() - started
+        total = max(self.state.config.translate_time, 1e-6)
+        if elapsed >= total:
+            status, progress = "success", "complete"
+        else:
+            status, progress = "inprogress", f"{int(100 * elapsed / total)}% complete"
+        self.send_json(200, {"urn": urn, "status": status, "progress": progress, "derivatives": []})
+
+    def on_md_metadata(self, urn):
+        self.send_json(200, {"data": {"type": "metadata", "metadata": [
+            {"name": "{3D}", "role": "3d", "guid": f"guid-3d-{urn[:8]}"},
+            {"name": "Level 1", "role": "2d", "guid": f"guid-2d-{urn[:8]}"}
+        ]}})
+
+    def on_md_properties(self, urn, guid):
+        collection = []
+        for i, view in enumerate(SAMPLE_VIEWS):
+            collection.append({
+                "objectid": 1000 + i,
+                "name": f"View {view['name']} [{1000 + i}]",
+                "properties": {"Identity Data": {"ViewType": view["type"]}}
+            })
+        self.send_json(200, {"data": {"type": "properties", "collection": collection}})
+
+    # Introspection
+
+    def on_mock_stats(self):
+        self.send_json(200, self.state.stats())
+
+
+_SEG = r"[^/]+"
+ROUTES = [
+    ("POST", r"/authentication/v2/token", "auth.token"),
+    ("POST", r"/oss/v2/buckets", "oss.create_bucket"),
+    ("GET", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/details", "oss.bucket_details"),
+    ("DELETE", rf"/oss/v2/buckets/(?P<bucket>{_SEG})", "oss.delete_bucket"),
+    ("POST", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/batchsigneds3download", "oss.batch_signeds3download"),
+    ("POST", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/batchsigneds3upload", "oss.batch_signeds3upload"),
+    ("GET", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})/details", "oss.object_details"),
+    ("GET", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})/signeds3upload", "oss.signeds3upload_get"),
+    ("POST", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})/signeds3upload", "oss.signeds3upload_post"),
+    ("GET", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})/signeds3download", "oss.signeds3download"),
+    ("POST", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})/signed", "oss.signed"),
+    ("PUT", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})/copyto/(?P<new_key>{_SEG})",
+     "oss.copy_object"),
+    ("PUT", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})", "oss.put_object"),
+    ("GET", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})", "oss.get_object"),
+    ("DELETE", rf"/oss/v2/buckets/(?P<bucket>{_SEG})/objects/(?P<key>{_SEG})", "oss.delete_object"),
+    ("PUT", rf"/s3/part/(?P<upload_key>{_SEG})/(?P<part>\d+)", "s3.put_part"),
+    ("PUT", rf"/s3/upload/(?P<bucket>{_SEG})/(?P<key>{_SEG})", "s3.upload"),
+    ("POST", rf"/s3/upload/(?P<bucket>{_SEG})/(?P<key>{_SEG})", "s3.upload_form"),
+    ("GET", rf"/s3/download/(?P<bucket>{_SEG})/(?P<key>{_SEG})", "s3.download"),
+    ("POST", rf"{DA_PREFIX}/workitems", "da.create_workitem"),
+    ("GET", rf"{DA_PREFIX}/workitems/(?P<workitem_id>{_SEG})", "da.get_workitem"),
+    ("DELETE", rf"{DA_PREFIX}/workitems/(?P<workitem_id>{_SEG})", "da.delete_workitem"),
+    ("POST", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)", "da.create_entity"),
+    ("GET", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})", "da.get_entity"),
+    ("POST", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})/versions", "da.create_version"),
+    ("GET", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})/versions", "da.list_versions"),
+    ("GET", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})/versions/(?P<version>\d+)",
+     "da.get_version"),
+    ("POST", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})/aliases", "da.create_alias"),
+    ("GET", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})/aliases", "da.list_aliases"),
+    ("PATCH", rf"{DA_PREFIX}/(?P<kind>appbundles|activities)/(?P<entity_id>{_SEG})/aliases/(?P<alias>{_SEG})",
+     "da.update_alias"),
+    ("GET", rf"/reports/(?P<workitem_id>{_SEG})", "report"),
+    ("POST", rf"{MD_PREFIX}/job", "md.job"),
+    ("GET", rf"{MD_PREFIX}/(?P<urn>{_SEG})/manifest", "md.manifest"),
+    ("GET", rf"{MD_PREFIX}/(?P<urn>{_SEG})/metadata", "md.metadata"),
+    ("GET", rf"{MD_PREFIX}/(?P<urn>{_SEG})/metadata/(?P<guid>{_SEG})/properties", "md.properties"),
+    ("GET", r"/_mock/stats", "mock.stats"),
+]
+ROUTES = [(method, re.compile(pattern), name) for method, pattern, name in ROUTES]
+
+
+class MockAPSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig, verbose: bool = False):
+        super().__init__(address, MockAPSHandler)
+        self.state = MockState(config)
+        self.verbose = verbose
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0,
+                 verbose: bool = False) -> MockAPSServer:
+    """Start a server on a background thread; port 0 picks a free port"""
+    server = MockAPSServer((host, port), config or MockConfig(), verbose)
+    thread = threading.Thread(target=server.serve_forever, name="mock-aps", daemon=True)
+    thread.start()
+    return server
+
+
+def urn_for(object_id: str) -> str:
+    """URL-safe base64 URN of an OSS object id, as used by Model Derivative"""
+    return base64.urlsafe_b64encode(object_id.encode()).decode().rstrip("=")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Local APS Stand-in Server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0, help="Added latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="Random extra latency per request in ms")
+    parser.add_argument("--queue-time", type=float, default=1, help="Seconds a workitem stays pending")
+    parser.add_argument("--run-time", type=float, default=2, help="Seconds a workitem runs")
+    parser.add_argument("--translate-time", type=float, default=2, help="Seconds a Model Derivative job takes")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Probability that a workitem fails")
+    parser.add_argument("--error-rate", type=float, default=0, help="Probability of an HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0, help="Probability of an injected 429 on DA requests")
+    parser.add_argument("--rate-limit", type=float, default=None, help="DA requests per second before 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--discard-bytes", action="store_true", help="Keep only size/SHA-1 of uploads")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        latency=args.latency / 1000.0,
+        jitter=args.jitter / 1000.0,
+        queue_time=args.queue_time,
+        run_time=args.run_time,
+        translate_time=args.translate_time,
+        failure_rate=args.failure_rate,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        discard_bytes=args.discard_bytes,
+        seed=args.seed
+    )
+    server = MockAPSServer((args.host, args.port), config, args.verbose)
+    print(f"🧪 Mock APS listening on {server.base_url}")
+    print(f"   export APS_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping mock APS")
+        print(json.dumps(server.state.stats(), indent=2))
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Bundled Workitem Outputs
+
+Instead of one output argument (and one signed URL, PUT and GET) per
+exported file, the add-in (HeadlessApp) writes every per-view PNG,
+annotation JSON and the export log into its `outputs` folder, and DA
+uploads that folder as one zip through the `outputBundle` argument, a
+signed S3 upload URL that complete() finishes after the workitem:
+    <View>.png, <View>.annotations.json, ..., headless_log.txt
+
+A 300-view export then costs one PUT in DA and one GET here:
+
+- extract_stream() unpacks the zip while it downloads, entry by entry from
+  the local headers, straight into the per-view output layout
+  (<output dir>/<model>_<entry>); nothing is spooled to a temporary file
+- the zip central directory is the index: read_index() fetches it with one
+  Range request on the end of the archive, and fetch_entry() pulls a single
+  view with one more Range request, without downloading the rest
+- download() deletes the bundle object once it is extracted, so finished
+  workitems leave nothing behind in the pool bucket
+
+Zip64 archives (over 4 GB or 65535 entries) are not supported.
+
+Usage:
+    python output_bundle.py <bundle url|zip> [options]
+
+Options:
+    --list             Print the index (entry names, sizes, offsets)
+    --entry NAME       Fetch only this entry with a Range request (repeatable)
+    --output-dir DIR   Where to write entries (default: output)
+    --prefix PREFIX    File name prefix, usually the model name (default: none)
+    --json             Output in JSON format
+"""
+
+import os
+import sys
+import json
+import uuid
+import zlib
+import struct
+import argparse
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+import aps_client
+import metrics
+from bucket_pool import buckets, object_url
+from lifecycle import lifecycle
+from tracing import tracer
+
+# Activity parameter for bundled outputs
+OUTPUT_BUNDLE_PARAM = "outputBundle"
+OUTPUT_FOLDER = "outputs"
+BUNDLE_PREFIX = "outputs/"  # object keys of bundles in the pool bucket
+SCOPE = "data:read data:write bucket:create bucket:read"
+
+CHUNK = 1024 * 1024
+LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<4sHHHHHHIIIHHHHHII")
+END_RECORD = struct.Struct("<4sHHHHIIH")
+DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+MAX_COMMENT = 65535
+STORED, DEFLATED = 0, 8
+HAS_DESCRIPTOR = 0x08
+
+
+class BundleEntry(NamedTuple):
+    name: str
+    offset: int
+    compressed_size: int
+    size: int
+    method: int
+    crc: int
+
+
+def activity_parameters() -> Dict[str, Dict[str, Any]]:
+    """Parameter definition for the bundled output of an activity"""
+    return {
+        OUTPUT_BUNDLE_PARAM: {
+            "verb": "put",
+            "description": "Zip of all exported views, annotations and the export log",
+            "localName": OUTPUT_FOLDER,
+            "zip": True,
+            "required": False
+        }
+    }
+
+
+def new_bundle(token: str) -> Optional[Dict[str, str]]:
+    """Pool bucket and object key for the bundle of one workitem"""
+    bucket_key = buckets.bucket_for(token)
+    if not bucket_key:
+        return None
+    bundle = {"bucket": bucket_key, "key": f"{BUNDLE_PREFIX}{uuid.uuid4().hex}.zip"}
+    lifecycle.register_object(bundle["bucket"], bundle["key"])
+    return bundle
+
+
+def workitem_argument(token: str, bundle: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Workitem argument that makes DA PUT the zipped outputs folder through a signed S3 URL
+
+    DA gets no token; the upload becomes the bundle object when complete() is
+    called after the workitem finishes.
+    """
+    from signed_urls import broker
+    upload = broker.upload_urls(token, bundle["bucket"], [bundle["key"]]).get(bundle["key"])
+    if not upload:
+        return None
+    bundle["uploadKey"] = upload["uploadKey"]
+    return {"verb": "put", "url": upload["urls"][0]}
+
+
+def complete(token: str, bundle: Dict[str, str]) -> bool:
+    """Finish the S3 upload DA made through the signed URL; True when the bundle object exists"""
+    upload_key = bundle.pop("uploadKey", None)
+    if not upload_key:
+        return True
+    response = aps_client.session().post(
+        f"{object_url(bundle['bucket'], bundle['key'])}/signeds3upload",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"uploadKey": upload_key}
+    )
+    metrics.observe_response("upload", response)
+    if response.status_code != 200:
+        print(f"Failed to complete output bundle upload: {response.status_code} - {response.text}")
+        return False
+    return True
+
+
+def delete(token: str, bundle: Dict[str, str]) -> bool:
+    """Remove a bundle object once its contents are extracted"""
+    from signed_urls import broker
+    response = aps_client.session().delete(
+        object_url(bundle["bucket"], bundle["key"]),
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    metrics.observe_response("delete", response)
+    broker.invalidate(bundle["bucket"], bundle["key"])
+    if response.status_code not in [200, 204, 404]:
+        return False
+    lifecycle.release_object(bundle["bucket"], bundle["key"])
+    return True
+
+
+# Streaming extraction
+
+class _Stream:
+    """Sequential reader over a response body with push-back for over-read bytes"""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.pending = b""
+
+    def read(self, size: int) -> bytes:
+        data = self.pending[:size]
+        self.pending = self.pending[size:]
+        while len(data) < size:
+            chunk = self.raw.read(min(CHUNK, size - len(data)))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def read_some(self) -> bytes:
+        if self.pending:
+            data, self.pending = self.pending, b""
+            return data
+        return self.raw.read(CHUNK)
+
+    def unread(self, data: bytes):
+        self.pending = data + self.pending
+
+    def exactly(self, size: int) -> bytes:
+        data = self.read(size)
+        if len(data) != size:
+            raise ValueError("Bundle ended in the middle of an entry")
+        return data
+
+
+def _target_path(output_dir: str, prefix: str, name: str) -> Optional[str]:
+    """Per-view output path of an entry; None for entries escaping output_dir"""
+    file_name = name.replace("/", "_")
+    if prefix:
+        file_name = f"{prefix}_{file_name}"
+    target = os.path.normpath(os.path.join(output_dir, file_name))
+    return target if os.path.dirname(target) == os.path.normpath(output_dir) else None
+
+
+def _copy_entry(stream: _Stream, out: Optional[BinaryIO], method: int, flags: int, compressed_size: int) -> Tuple[int, int]:
+    """Copy one entry's data to `out` (None skips it); returns (crc, size)"""
+    crc, size = 0, 0
+    if method == DEFLATED:
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        remaining = None if flags & HAS_DESCRIPTOR else compressed_size
+        while not inflater.eof:
+            chunk = stream.read_some() if remaining is None else stream.read(min(CHUNK, remaining))
+            if not chunk:
+                raise ValueError("Bundle ended in the middle of an entry")
+            if remaining is not None:
+                remaining -= len(chunk)
+            data = inflater.decompress(chunk)
+            crc, size = zlib.crc32(data, crc), size + len(data)
+            if out:
+                out.write(data)
+        stream.unread(inflater.unused_data)
+    elif method == STORED:
+        if flags & HAS_DESCRIPTOR:
+            raise ValueError("Stored entries with a data descriptor cannot be streamed")
+        remaining = compressed_size
+        while remaining:
+            data = stream.exactly(min(CHUNK, remaining))
+            remaining -= len(data)
+            crc, size = zlib.crc32(data, crc), size + len(data)
+            if out:
+                out.write(data)
+    else:
+        raise ValueError(f"Unsupported compression method {method}")
+    return crc, size
+
+
+def extract_stream(raw: BinaryIO, output_dir: str, prefix: str = "") -> List[str]:
+    """Extract a zip from a sequential stream (e.g. a response body) into per-view files
+
+    Returns the paths written. CRCs are checked as entries complete.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stream = _Stream(raw)
+    written = []
+    while True:
+        header = stream.read(LOCAL_HEADER.size)
+        if len(header) < 4 or header[:4] != b"PK\x03\x04":
+            break  # central directory (or end of a truncated stream)
+        if len(header) < LOCAL_HEADER.size:
+            raise ValueError("Bundle ended in a local header")
+        (_, _, flags, method, _, _, crc, compressed_size, _, name_length, extra_length) = LOCAL_HEADER.unpack(header)
+        name = stream.exactly(name_length).decode("utf-8" if flags & 0x800 else "cp437")
+        stream.exactly(extra_length)
+
+        target = None if name.endswith("/") else _target_path(output_dir, prefix, name)
+        out = open(target, "wb") if target else None
+        try:
+            actual_crc, _ = _copy_entry(stream, out, method, flags, compressed_size)
+        finally:
+            if out:
+                out.close()
+        if flags & HAS_DESCRIPTOR:
+            descriptor = stream.exactly(4)
+            if descriptor == DESCRIPTOR_SIGNATURE:
+                descriptor = stream.exactly(4)
+            crc = struct.unpack("<I", descriptor)[0]
+            stream.exactly(8)
+        if actual_crc != crc:
+            raise ValueError(f"CRC mismatch in bundle entry {name}")
+        if target:
+            written.append(target)
+    return written
+
+
+# Index and Range requests
+
+def _read_range(source: str, start: int, end: Optional[int] = None) -> Tuple[bytes, int]:
+    """Bytes [start, end] of a URL or local file (start < 0: the last -start bytes); returns (data, total size)"""
+    if not source.startswith(("http://", "https://")):
+        with open(source, "rb") as f:
+            total = f.seek(0, os.SEEK_END)
+            f.seek(max(0, total + start) if start < 0 else start)
+            return f.read((end + 1 - start) if end is not None and start >= 0 else -1), total
+
+    byte_range = f"bytes={start}" if start < 0 else f"bytes={start}-{'' if end is None else end}"
+    with tracer.span("range", bytes=byte_range) as span:
+        response = aps_client.session().get(source, headers={"Range": byte_range})
+        span.set(status_code=response.status_code, bytes=len(response.content))
+    metrics.observe_response("range", response)
+    if response.status_code == 206:
+        total = int(response.headers.get("Content-Range", "*/0").rsplit("/", 1)[1])
+        return response.content, total
+    if response.status_code == 200:
+        # Range ignored: the whole object came back
+        data = response.content
+        return (data[start:] if start < 0 else data[start:None if end is None else end + 1]), len(data)
+    raise ValueError(f"Range request failed: {response.status_code} - {response.text}")
+
+
+def read_index(source: str) -> Dict[str, BundleEntry]:
+    """The bundle's central directory, fetched with a Range request on its tail"""
+    tail, total = _read_range(source, -(END_RECORD.size + MAX_COMMENT))
+    position = tail.rfind(b"PK\x05\x06")
+    if position < 0:
+        raise ValueError("Not a zip archive: no end of central directory")
+    (_, _, _, _, count, directory_size, directory_offset, _) = END_RECORD.unpack_from(tail, position)
+    if count == 0xFFFF or directory_offset == 0xFFFFFFFF:
+        raise ValueError("Zip64 bundles are not supported")
+
+    tail_start = total - len(tail)
+    if directory_offset >= tail_start:
+        directory = tail[directory_offset - tail_start:directory_offset - tail_start + directory_size]
+    else:
+        directory, _ = _read_range(source, directory_offset, directory_offset + directory_size - 1)
+
+    entries = {}
+    position = 0
+    for _ in range(count):
+        (signature, _, _, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length, comment_length, _, _, _, offset) = CENTRAL_HEADER.unpack_from(directory, position)
+        if signature != b"PK\x01\x02":
+            raise ValueError("Corrupt central directory")
+        start = position + CENTRAL_HEADER.size
+        name = directory[start:start + name_length].decode("utf-8" if flags & 0x800 else "cp437")
+        position = start + name_length + extra_length + comment_length
+        if not name.endswith("/"):
+            entries[name] = BundleEntry(name, offset, compressed_size, size, method, crc)
+    return entries
+
+
+def fetch_entry(source: str, entry: BundleEntry, slack: int = 1024) -> bytes:
+    """One entry's bytes, with a single Range request in the common case"""
+    end = entry.offset + LOCAL_HEADER.size + len(entry.name.encode("utf-8")) + slack + entry.compressed_size
+    data, _ = _read_range(source, entry.offset, end - 1)
+    (signature, _, _, _, _, _, _, _, _, name_length, extra_length) = LOCAL_HEADER.unpack_from(data)
+    if signature != b"PK\x03\x04":
+        raise ValueError(f"No local header at the offset of {entry.name}")
+    start = LOCAL_HEADER.size + name_length + extra_length
+    if len(data) < start + entry.compressed_size:
+        # Larger local extra field than expected
+        more, _ = _read_range(source, entry.offset + len(data), entry.offset + start + entry.compressed_size - 1)
+        data += more
+    payload = data[start:start + entry.compressed_size]
+    if entry.method == DEFLATED:
+        payload = zlib.decompress(payload, -zlib.MAX_WBITS)
+    elif entry.method != STORED:
+        raise ValueError(f"Unsupported compression method {entry.method}")
+    if zlib.crc32(payload) != entry.crc:
+        raise ValueError(f"CRC mismatch in bundle entry {entry.name}")
+    return payload
+
+
+def download(token: str, bundle: Dict[str, str], output_dir: str, prefix: str) -> List[str]:
+    """GET a finished workitem's bundle, extract it while it streams, then delete it"""
+    from signed_urls import broker
+    if not complete(token, bundle):
+        return []
+    url = broker.download_url(token, bundle["bucket"], bundle["key"])
+    if not url:
+        return []
+    with tracer.span("download", bundle=bundle["key"]) as span:
+        response = aps_client.session().get(url, stream=True)
+        span.set(status_code=response.status_code)
+        metrics.observe_response("download", response)
+        if response.status_code != 200:
+            print(f"Failed to download output bundle: {response.status_code}")
+            return []
+        try:
+            paths = extract_stream(response.raw, output_dir, prefix)
+        finally:
+            response.close()
+        span.set(files=len(paths))
+    delete(token, bundle)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Bundled Workitem Outputs")
+    parser.add_argument("source", help="Signed URL or local path of an output bundle")
+    parser.add_argument("--list", action="store_true", help="Print the index")
+    parser.add_argument("--entry", action="append", default=[], help="Fetch only this entry (repeatable)")
+    parser.add_argument("--output-dir", default="output", help="Where to write entries")
+    parser.add_argument("--prefix", default="", help="File name prefix, usually the model name")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.list:
+            index = read_index(args.source)
+            result = [entry._asdict() for entry in index.values()]
+        elif args.entry:
+            index = read_index(args.source)
+            missing = [name for name in args.entry if name not in index]
+            if missing:
+                print(f"❌ Not in bundle: {', '.join(missing)}")
+                sys.exit(1)
+            os.makedirs(args.output_dir, exist_ok=True)
+            result = []
+            for name in args.entry:
+                target = _target_path(args.output_dir, args.prefix, name)
+                with open(target, "wb") as f:
+                    f.write(fetch_entry(args.source, index[name]))
+                result.append(target)
+        elif args.source.startswith(("http://", "https://")):
+            response = aps_client.session().get(args.source, stream=True)
+            if response.status_code != 200:
+                print(f"❌ Download failed: {response.status_code}")
+                sys.exit(1)
+            result = extract_stream(response.raw, args.output_dir, args.prefix)
+        else:
+            with open(args.source, "rb") as f:
+                result = extract_stream(f, args.output_dir, args.prefix)
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.list:
+        for entry in result:
+            print(f"   {entry['name']:<48}{entry['size']:>12} bytes  @{entry['offset']}")
+    else:
+        for path in result:
+            print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Pre-flight Validation
+
+Checks Revit files locally before a batch spends an upload and a workitem on
+them. A file is rejected, with the reason, when it
+
+- is a Revit backup copy (`model.0001.rvt`)
+- is empty, too small to be a model, or larger than the size limit
+- cannot be opened for reading (locked by another process, no permission)
+- is not an OLE compound file, is truncated, or has no BasicFileInfo stream
+- was saved by a Revit release newer than every Design Automation engine
+- has the same contents as a file earlier in the list (only files of equal
+  size are hashed)
+
+Files are checked in a thread pool; the compound-file checks read the
+header, FAT and directory through rvt_file.py, not the whole model.
+
+Usage:
+    python preflight.py <directory or file>... [--max-size MB] [--workers N] [--json]
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from da_deploy import engine_year
+from rvt_file import BASIC_FILE_INFO, CompoundFile, CompoundFileError, parse_basic_file_info
+
+MIN_SIZE = 64 * 1024  # an empty project saved by Revit is several hundred KB
+MAX_WORKERS = 8
+CHUNK = 8 * 1024 * 1024
+BACKUP_NAME = re.compile(r"\.\d{4}\.(rvt|rfa)$", re.IGNORECASE)
+
+
+def check_file(path: str, max_size: Optional[int] = None) -> Optional[str]:
+    """Reason to reject a single file, None when it looks processable"""
+    if BACKUP_NAME.search(path):
+        return "Revit backup copy"
+    try:
+        size = os.path.getsize(path)
+    except OSError as e:
+        return f"not readable: {e.strerror}"
+    if size == 0:
+        return "empty file"
+    if size < MIN_SIZE:
+        return f"too small for a Revit model: {size} bytes"
+    if max_size and size > max_size:
+        return f"larger than the {max_size // (1024 * 1024)} MB limit: {size // (1024 * 1024)} MB"
+
+    try:
+        with CompoundFile(path) as cf:
+            if cf.allocated_sectors() > cf.sector_count:
+                return f"truncated: {cf.sector_count} of {cf.allocated_sectors()} sectors present"
+            if not cf.exists(BASIC_FILE_INFO):
+                return f"no {BASIC_FILE_INFO} stream, not a Revit model"
+            year = parse_basic_file_info(cf.stream(BASIC_FILE_INFO))["year"]
+    except PermissionError:
+        return "not readable: locked by another process or no permission"
+    except OSError as e:
+        return f"not readable: {e.strerror}"
+    except CompoundFileError as e:
+        return str(e).replace(f"{path}: ", "", 1)
+    if not engine_year(year):
+        return f"saved by Revit {year}, newer than every Design Automation engine"
+    return None
+
+
+def _sha256(path: str) -> Optional[str]:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def find_duplicates(paths: List[str], workers: int = MAX_WORKERS) -> Dict[str, str]:
+    """Duplicate path -> first path with the same contents; only files sharing a size are read"""
+    by_size: Dict[int, List[str]] = {}
+    for path in paths:
+        by_size.setdefault(os.path.getsize(path), []).append(path)
+    candidates = [path for group in by_size.values() if len(group) > 1 for path in group]
+    if not candidates:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="preflight") as executor:
+        hashes = dict(zip(candidates, executor.map(_sha256, candidates)))
+    first: Dict[Tuple[int, str], str] = {}
+    duplicates = {}
+    for path in paths:
+        content_hash = hashes.get(path)
+        if content_hash is None:
+            continue
+        original = first.setdefault((os.path.getsize(path), content_hash), path)
+        if original != path:
+            duplicates[path] = original
+    return duplicates
+
+
+def validate(paths: Iterable[str], max_size: Optional[int] = None,
+             workers: int = MAX_WORKERS) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Split files into (accepted paths, rejections); input order is kept
+
+    Each rejection is {"file": path, "rejected": reason}, the shape of a
+    batch report entry.
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="preflight") as executor:
+        reasons = dict(zip(paths, executor.map(lambda path: check_file(path, max_size), paths)))
+    accepted = [path for path in paths if reasons[path] is None]
+    for duplicate, original in find_duplicates(accepted, workers).items():
+        reasons[duplicate] = f"duplicate of {os.path.basename(original)}"
+    accepted = [path for path in accepted if reasons[path] is None]
+    rejected = [{"file": path, "rejected": reasons[path]} for path in paths if reasons[path] is not None]
+    return accepted, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Pre-flight Validation")
+    parser.add_argument("sources", nargs="+", help="Revit files or directories (their *.rvt files)")
+    parser.add_argument("--max-size", type=float, help="Reject files larger than this many MB")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Files checked in parallel")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    paths = []
+    for source in args.sources:
+        if os.path.isdir(source):
+            paths.extend(os.path.join(source, f) for f in sorted(os.listdir(source)) if f.lower().endswith(".rvt"))
+        else:
+            paths.append(source)
+    max_size = int(args.max_size * 1024 * 1024) if args.max_size else None
+    accepted, rejected = validate(paths, max_size, args.workers)
+
+    if args.json:
+        print(json.dumps({"accepted": accepted, "rejected": rejected}, indent=2))
+    else:
+        for path in accepted:
+            print(f"✅ {path}")
+        for rejection in rejected:
+            print(f"🚫 {rejection['file']}: {rejection['rejected']}")
+        print(f"\n{len(accepted)} of {len(paths)} files passed")
+    if rejected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
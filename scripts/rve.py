@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Command-Line Entry Point
+
+One entry point for the scripts/ tools. Each subcommand maps to a script
+module that is imported only when that subcommand runs, and the scripts
+import heavy dependencies (requests, Pillow) inside the functions that use
+them, so `--help`, listings and JSON-only commands start fast.
+
+Usage:
+    python rve.py <command> [args]   Run a tool, e.g. `python rve.py diff a.json b.json`
+    python rve.py --help             List the commands
+    python rve.py daemon start       Start the warm daemon (also: stop, status, run)
+    python rve.py startup [options]  Check startup time against a budget
+
+While the daemon (rve_daemon.py) is running, short commands (list-views,
+export, upload, draw, overlay, report) are sent to it over its Unix socket
+instead of starting cold. Set RVE_NO_DAEMON=1 to always run locally.
+
+Startup options:
+    --budget-ms N     Allowed `<command> --help` time above a bare interpreter
+                      start, in ms (default: 150)
+    --runs N          Runs per command; the median is used (default: 5)
+    --json            Output in JSON format
+    COMMAND ...       Commands to check (default: all)
+
+The startup check also fails when `<command> --help` imports requests, PIL
+or numpy, or does not exit cleanly.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+
+# command -> (module, description)
+COMMANDS = {
+    "list-views": ("list_views", "List the views of a Revit file in Design Automation"),
+    "upload": ("upload_and_process", "Upload a Revit file to OSS and process it"),
+    "buckets": ("bucket_pool", "List or create the long-lived upload buckets"),
+    "sign": ("signed_urls", "Issue signed download or upload URLs in batches"),
+    "export": ("export_view", "Export views of a Revit file as images"),
+    "batch": ("batch_process", "Process a directory of Revit files"),
+    "check": ("preflight", "Check Revit files locally before they are uploaded"),
+    "queue": ("batch_queue", "Distributed batch processing through a shared work queue"),
+    "outputs": ("output_bundle", "List, fetch or extract bundled workitem outputs"),
+    "info": ("rvt_file", "Read version, worksharing and preview thumbnails of local Revit files"),
+    "deploy": ("da_deploy", "Show, reconcile or publish the deployed activity and appbundle"),
+    "bundle": ("bundle_build", "Build the appbundle zip deterministically and print its hash"),
+    "diff": ("view_diff", "Diff the views of two model revisions or snapshots"),
+    "select": ("view_selection", "Build a view-selection manifest"),
+    "pack": ("workitem_packing", "Plan and build packs of small files"),
+    "draw": ("draw_annotations", "Draw annotation boxes and labels on a view image"),
+    "overlay": ("overlay_boxes", "Overlay annotation boxes using the crop box"),
+    "report": ("da_report", "Phase timings from workitem reports"),
+    "trace": ("tracing", "Summarize a trace file"),
+    "api": ("api_server", "Run the HTTP API service"),
+    "mock-aps": ("mock_aps", "Run the local APS stand-in server"),
+    "bench-pipeline": ("bench_pipeline", "Benchmark the pipeline against the stand-in"),
+    "bench-overlay": ("bench_overlay", "Benchmark overlay rendering"),
+}
+
+# Short commands that run in the daemon when it is up
+DAEMON_COMMANDS = ["list-views", "export", "upload", "draw", "overlay", "report"]
+
+HEAVY_MODULES = {"requests", "PIL", "numpy"}
+DEFAULT_BUDGET_MS = 150
+
+
+def print_commands():
+    print(__doc__.strip().split("\n\n")[0])
+    print("\nCommands:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"    {name:<16}{description}")
+    print(f"    {'daemon':<16}Start, stop or query the warm daemon")
+    print(f"    {'startup':<16}Check startup time against a budget")
+    print("\nRun `rve.py <command> --help` for the options of a command.")
+
+
+def load_command(name):
+    """Import the script module of command `name`"""
+    module_name, _ = COMMANDS[name]
+    # config.py lives in the repository root
+    if REPO_DIR not in sys.path:
+        sys.path.insert(1, REPO_DIR)
+    return importlib.import_module(module_name)
+
+
+def run_command(name, argv):
+    """Run `name` in the daemon when it is up, otherwise import its module and run main()"""
+    if name in DAEMON_COMMANDS and not os.environ.get("RVE_NO_DAEMON"):
+        import rve_daemon
+        if rve_daemon.is_running():
+            sys.exit(rve_daemon.run_remote(name, argv))
+    module = load_command(name)
+    sys.argv = [f"rve {name}"] + list(argv)
+    return module.main(list(argv))
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+# Startup is measured for cold local runs
+_LOCAL_ENV = dict(os.environ, RVE_NO_DAEMON="1")
+
+
+def _time_run(args, runs):
+    """Median wall time in ms of running `args` with the current interpreter"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=_LOCAL_ENV)
+        timings.append((time.perf_counter() - start) * 1000)
+    return _median(timings)
+
+
+def heavy_imports(name):
+    """Heavy top-level packages imported by `<command> --help` (from -X importtime), and its exit code"""
+    result = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__), name, "--help"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=_LOCAL_ENV)
+    found = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.count("|") == 2:
+            package = line.rsplit("|", 1)[1].strip().split(".")[0]
+            if package in HEAVY_MODULES:
+                found.add(package)
+    return sorted(found), result.returncode
+
+
+def check_startup(commands, budget_ms=DEFAULT_BUDGET_MS, runs=5):
+    """Measure `<command> --help` for each command against the budget"""
+    baseline = _time_run(["-c", "pass"], runs)
+    results = {}
+    for name in commands:
+        elapsed = _time_run([os.path.abspath(__file__), name, "--help"], runs)
+        heavy, returncode = heavy_imports(name)
+        overhead = elapsed - baseline
+        results[name] = {
+            "ms": round(elapsed, 1),
+            "overhead_ms": round(overhead, 1),
+            "heavy_imports": heavy,
+            "exit_code": returncode,
+            "ok": overhead <= budget_ms and not heavy and returncode == 0
+        }
+    return {"baseline_ms": round(baseline, 1), "budget_ms": budget_ms, "commands": results}
+
+
+def startup_main(argv):
+    parser = argparse.ArgumentParser(prog="rve startup", description="RevitViewExtractor - Startup Budget")
+    parser.add_argument("commands", nargs="*", help="Commands to check (default: all)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Allowed startup overhead in ms")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.commands if name not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown commands: {', '.join(unknown)}")
+
+    report = check_startup(args.commands or list(COMMANDS), args.budget_ms, max(1, args.runs))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"⏱️ Startup of `<command> --help` (interpreter alone: {report['baseline_ms']:.0f} ms, "
+              f"budget: +{args.budget_ms:.0f} ms)")
+        for name, r in report["commands"].items():
+            mark = "✅" if r["ok"] else "❌"
+            notes = f"  imports {', '.join(r['heavy_imports'])}" if r["heavy_imports"] else ""
+            if r["exit_code"]:
+                notes += f"  exited with {r['exit_code']}"
+            print(f"   {mark} {name:<16}{r['ms']:>7.0f} ms  (+{r['overhead_ms']:.0f}){notes}")
+
+    if not all(r["ok"] for r in report["commands"].values()):
+        sys.exit(1)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print_commands()
+        return
+    name, argv = sys.argv[1], sys.argv[2:]
+    if name == "startup":
+        return startup_main(argv)
+    if name == "daemon":
+        import rve_daemon
+        return rve_daemon.control_main(argv)
+    if name not in COMMANDS:
+        print(f"Unknown command: {name}\n", file=sys.stderr)
+        print_commands()
+        sys.exit(2)
+    return run_command(name, argv)
+
+
+if __name__ == "__main__":
+    main()
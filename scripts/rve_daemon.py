@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - rve Daemon
+
+Optional long-lived local process that runs short rve commands (list views,
+export view, overlay, ...) warm instead of from scratch: modules are already
+imported, APS tokens cached, HTTP connections pooled, recent uploads indexed
+(aps_client), pool buckets verified (bucket_pool) and workitems tracked
+(lifecycle) across calls.
+
+Protocol: one JSON request line per connection on a Unix socket,
+
+    {"command": "list-views", "argv": ["100.rvt", "--json"], "cwd": "/work",
+     "env": {"APS_BASE_URL": null, "RVE_DEPLOYMENTS": null}}
+
+answered by JSON lines streaming the command's output,
+
+    {"stream": "stdout", "data": "..."}
+
+and a final {"exit_code": 0}. Control commands: "_status" and "_stop".
+
+Commands run concurrently on handler threads. Their output is routed through
+a context variable, which WorkitemScheduler jobs inherit. The working
+directory is switched to the caller's; commands from another directory wait
+until the running ones finish. Settings read once at import (FORWARDED_ENV)
+must match the client's; a command sent with different values is rejected.
+
+The socket is created under umask 077, so only its owner can connect.
+
+Usage:
+    python rve_daemon.py [--socket PATH]    Run in the foreground
+    python rve.py daemon start|stop|status  Manage the background daemon
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import traceback
+import contextvars
+import socketserver
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_SOCKET = os.environ.get("RVE_SOCKET") or os.path.join(os.path.expanduser("~"), ".rve", "daemon.sock")
+START_TIMEOUT = 10  # seconds to wait for a background daemon to listen
+# Environment the commands' modules read at import time; fixed for the daemon's lifetime
+FORWARDED_ENV = ("APS_BASE_URL", "RVE_DEPLOYMENTS")
+
+_sink: contextvars.ContextVar = contextvars.ContextVar("rve_output_sink", default=None)
+
+
+class _RoutedStream:
+    """sys.stdout/sys.stderr replacement writing to the current command's client"""
+
+    def __init__(self, name: str, fallback):
+        self.name = name
+        self._fallback = fallback
+
+    def write(self, data: str) -> int:
+        sink = _sink.get()
+        if sink is None:
+            return self._fallback.write(data)
+        sink(self.name, data)
+        return len(data)
+
+    def flush(self):
+        if _sink.get() is None:
+            self._fallback.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+class _WorkingDirectory:
+    """Shares the process working directory between concurrent commands"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = 0
+
+    @contextmanager
+    def use(self, path: str) -> Iterator[None]:
+        with self._cond:
+            while self._active and os.getcwd() != path:
+                self._cond.wait()
+            if os.getcwd() != path:
+                os.chdir(path)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self._send_lock = threading.Lock()
+        self._connected = True
+
+    def send(self, message: Dict[str, Any]):
+        if not self._connected:
+            return
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        with self._send_lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                self._connected = False  # Client went away; keep running the command
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+        except ValueError:
+            self.send({"error": "invalid request", "exit_code": 2})
+            return
+
+        command = request.get("command")
+        if command == "_status":
+            self.send(self.server.status())
+        elif command == "_stop":
+            self.send({"stopping": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            mismatch = [name for name in FORWARDED_ENV
+                        if (request.get("env") or {}).get(name) != self.server.env.get(name)]
+            if mismatch:
+                self.send({"stream": "stderr",
+                           "data": f"The rve daemon was started with different {', '.join(mismatch)}; "
+                                   f"restart it (rve daemon stop) or set RVE_NO_DAEMON=1\n"})
+                self.send({"exit_code": 2})
+                return
+            self.send({"exit_code": self.run(command, request.get("argv") or [], request.get("cwd") or os.getcwd())})
+
+    def run(self, command: str, argv, cwd: str) -> int:
+        import rve
+        if command not in rve.COMMANDS:
+            self.send({"stream": "stderr", "data": f"Unknown command: {command}\n"})
+            return 2
+
+        token = _sink.set(lambda stream, data: self.send({"stream": stream, "data": data}))
+        self.server.begin()
+        try:
+            with self.server.cwd.use(cwd):
+                rve.load_command(command).main(list(argv))
+            return 0
+        except SystemExit as exc:
+            return _exit_code(exc)
+        except KeyboardInterrupt:
+            return 130
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            self.server.end()
+            _sink.reset(token)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        super().__init__(socket_path, DaemonHandler)
+        self.socket_path = socket_path
+        self.env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+        self.started = time.time()
+        self.cwd = _WorkingDirectory()
+        self.served = 0
+        self.running = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self.running += 1
+
+    def end(self):
+        with self._lock:
+            self.running -= 1
+            self.served += 1
+
+    def status(self) -> Dict[str, Any]:
+        import aps_client
+        from bucket_pool import buckets
+        from lifecycle import lifecycle
+        from signed_urls import broker
+        with self._lock:
+            served, running = self.served, self.running
+        return {
+            "pid": os.getpid(),
+            "socket": self.socket_path,
+            "uptime": round(time.time() - self.started, 1),
+            "served": served,
+            "running": running,
+            "workitems": lifecycle.outstanding,
+            **aps_client.stats(),
+            **buckets.stats(),
+            **broker.stats()
+        }
+
+
+def warm_up():
+    """Import the daemon commands and open the HTTP session ahead of the first call"""
+    import rve
+    for name in rve.DAEMON_COMMANDS:
+        try:
+            rve.load_command(name)
+        except Exception as exc:  # A missing optional dependency only disables that command
+            print(f"⚠️ Could not preload {name}: {exc}")
+    try:
+        import aps_client
+        aps_client.session()
+    except ImportError as exc:
+        print(f"⚠️ No HTTP session: {exc}")
+
+
+def serve(socket_path: str = DEFAULT_SOCKET):
+    """Run the daemon in the foreground until stopped"""
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            print(f"❌ A daemon is already listening on {socket_path}")
+            sys.exit(1)
+        os.unlink(socket_path)  # Stale socket of a daemon that died
+
+    warm_up()
+    # Private from the moment it exists: bind with a umask, not a chmod afterwards
+    umask = os.umask(0o077)
+    try:
+        server = DaemonServer(socket_path)
+    finally:
+        os.umask(umask)
+    sys.stdout = _RoutedStream("stdout", sys.stdout)
+    sys.stderr = _RoutedStream("stderr", sys.stderr)
+
+    # Outstanding workitems are cancelled when the daemon stops
+    from lifecycle import lifecycle
+    lifecycle.install_handlers(delete_storage=True)
+
+    print(f"🚀 rve daemon {os.getpid()} listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        print("👋 rve daemon stopped")
+
+
+# Client side
+
+def _connect(socket_path: str, timeout: Optional[float] = None) -> socket.socket:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    client.connect(socket_path)
+    return client
+
+
+def is_running(socket_path: str = DEFAULT_SOCKET) -> bool:
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return False
+    try:
+        _connect(socket_path, timeout=1).close()
+        return True
+    except OSError:
+        return False
+
+
+def request(payload: Dict[str, Any], socket_path: str = DEFAULT_SOCKET) -> Iterator[Dict[str, Any]]:
+    """Send one request and yield the response messages"""
+    with _connect(socket_path) as client:
+        client.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with client.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                yield json.loads(line)
+
+
+def run_remote(command: str, argv, socket_path: str = DEFAULT_SOCKET) -> int:
+    """Run a command in the daemon, streaming its output; returns the exit code"""
+    payload = {"command": command, "argv": list(argv), "cwd": os.getcwd(),
+               "env": {name: os.environ.get(name) for name in FORWARDED_ENV}}
+    for message in request(payload, socket_path):
+        if "stream" in message:
+            stream = sys.stderr if message["stream"] == "stderr" else sys.stdout
+            stream.write(message["data"])
+            stream.flush()
+        if "exit_code" in message:
+            return message["exit_code"]
+    return 1  # Connection closed without an exit code
+
+
+def start_background(socket_path: str = DEFAULT_SOCKET, log_path: Optional[str] = None) -> bool:
+    """Start a detached daemon and wait until it listens"""
+    log_path = log_path or os.path.splitext(socket_path)[0] + ".log"
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    with open(log_path, "a") as log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--socket", socket_path],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                         start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if is_running(socket_path):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def control_main(argv):
+    """`rve daemon start|stop|status|run`"""
+    parser = argparse.ArgumentParser(prog="rve daemon", description="RevitViewExtractor - rve Daemon")
+    parser.add_argument("action", choices=["start", "stop", "status", "run"], help="run stays in the foreground")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path")
+    parser.add_argument("--log", help="Log file of a background daemon (default: next to the socket)")
+
+    args = parser.parse_args(argv)
+
+    if args.action == "run":
+        serve(args.socket)
+    elif args.action == "start":
+        if is_running(args.socket):
+            print(f"✅ Daemon already running on {args.socket}")
+        elif start_background(args.socket, args.log):
+            print(f"✅ Daemon started on {args.socket}")
+        else:
+            print(f"❌ Daemon did not start; see {args.log or os.path.splitext(args.socket)[0] + '.log'}")
+            sys.exit(1)
+    elif not is_running(args.socket):
+        print(f"⏹️ No daemon running on {args.socket}")
+        if args.action == "status":
+            sys.exit(1)
+    elif args.action == "stop":
+        list(request({"command": "_stop"}, args.socket))
+        deadline = time.monotonic() + START_TIMEOUT
+        while os.path.exists(args.socket) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print("✅ Daemon stopped")
+    else:
+        status = next(request({"command": "_status"}, args.socket))
+        print(json.dumps(status, indent=2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - rve Daemon")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path")
+
+    args = parser.parse_args(argv)
+
+    # Commands are imported by name from scripts/ and config.py from the repository root
+    import rve
+    for path in (rve.SCRIPTS_DIR, rve.REPO_DIR):
+        if path not in sys.path:
+            sys.path.insert(1, path)
+    sys.argv = ["rve"]  # Command usage lines read "usage: rve ..."
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
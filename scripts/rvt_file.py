@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Local RVT File Reader
+
+An .rvt file is an OLE compound file (a FAT file system inside one file).
+Its BasicFileInfo stream records the Revit release that last saved the
+model, so the version is known locally, before anything is uploaded:
+
+- CompoundFile maps the file (mmap) and reads the header, FAT and directory;
+  a stream is read by following its sector chain, so only the sectors of
+  the streams asked for are touched
+- basic_file_info() decodes BasicFileInfo (UTF-16 text with a binary
+  prefix) into its "Key: value" lines plus the saved release year
+- read_metadata() summarizes it (version, build, worksharing, central model
+  path) and can take the preview image Revit embeds in the RevitPreview4.0
+  stream, a PNG after a binary header
+- scan() does this for whole directory trees in a thread pool and writes
+  the previews as thumbnails, so a catalog of models gets thumbnails and
+  versions without an upload, a workitem or a Model Derivative job
+
+da_deploy.py uses the year to submit each model to an activity on the
+matching Revit engine: a model opened by a newer engine is upgraded first,
+which costs minutes per file in Design Automation.
+
+Usage:
+    python rvt_file.py <file or directory>... [options]
+
+Options:
+    --thumbnails DIR  Write each model's preview to DIR/<file name>.png, e.g.
+                      a.rvt.png (directory arguments keep their subfolder layout)
+    --workers N       Files read in parallel (default: 8)
+    --json            Output in JSON format
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+import argparse
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+HEADER_SIZE = 512
+MAX_REGULAR_SECTOR = 0xFFFFFFFA
+END_OF_CHAIN = 0xFFFFFFFE
+FREE_SECTOR = 0xFFFFFFFF
+NO_STREAM = 0xFFFFFFFF
+DIRECTORY_ENTRY_SIZE = 128
+STORAGE, STREAM, ROOT = 1, 2, 5
+
+BASIC_FILE_INFO = "BasicFileInfo"
+PREVIEW_STREAM = "RevitPreview4.0"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+REVIT_EXTENSIONS = (".rvt", ".rfa", ".rte", ".rft")
+MAX_WORKERS = 8
+# "Format: 2021" since Revit 2019, "Autodesk Revit 2017 (Build: ...)" before
+YEAR_PATTERNS = (re.compile(r"Format:\s*(\d{4})"), re.compile(r"Autodesk Revit(?: Architecture| MEP| Structure)? (\d{4})"))
+INFO_LINE = re.compile(r"^\s*([A-Za-z][A-Za-z ]{1,40}):\s?(.*?)\s*$")
+
+
+class CompoundFileError(ValueError):
+    """Not an OLE compound file, or a damaged one"""
+
+
+class CompoundFile:
+    """Read-only OLE compound file on a memory map
+
+    Use as a context manager; stream() returns the bytes of a stream by path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise CompoundFileError(f"{path}: too small for a compound file ({size} bytes)")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        try:
+            self._read_header()
+            self._fat = self._read_fat()
+            self._entries = self._read_directory()
+            self._paths = self._walk()
+            self._mini_fat: Optional[array] = None
+            self._mini_stream: Optional[bytes] = None
+        except (struct.error, IndexError) as e:
+            self.close()
+            raise CompoundFileError(f"{path}: damaged compound file ({e})")
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    # Structure
+
+    def _read_header(self):
+        data = self._map
+        if data[:8] != OLE_SIGNATURE:
+            raise CompoundFileError(f"{self.path}: not an OLE compound file")
+        self.sector_shift, self.mini_sector_shift = struct.unpack_from("<HH", data, 0x1E)
+        if self.sector_shift not in (9, 12) or self.mini_sector_shift != 6:
+            raise CompoundFileError(f"{self.path}: unsupported sector size")
+        self.sector_size = 1 << self.sector_shift
+        (self._fat_sectors, self._directory_start, self.mini_cutoff, self._mini_fat_start,
+         self._mini_fat_sectors, self._difat_start, self._difat_sectors) = struct.unpack_from("<II4xIIIII", data, 0x2C)
+        self.sector_count = (len(data) - 1) >> self.sector_shift  # sectors after the header, the last may be partial
+
+    def _sector(self, sector: int) -> bytes:
+        if sector > MAX_REGULAR_SECTOR or sector >= self.sector_count:
+            raise CompoundFileError(f"{self.path}: truncated or damaged, sector {sector} is outside the file")
+        offset = (sector + 1) << self.sector_shift
+        return self._map[offset:offset + self.sector_size]
+
+    @staticmethod
+    def _uint32s(data) -> array:
+        values = array("I")  # 4 bytes on every platform CPython supports
+        values.frombytes(data[:len(data) // 4 * 4])
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def _read_fat(self) -> array:
+        # The first 109 FAT sector numbers are in the header, the rest in the DIFAT chain
+        fat_sectors = list(self._uint32s(self._map[0x4C:HEADER_SIZE]))
+        sector = self._difat_start
+        for _ in range(self._difat_sectors):
+            if sector > MAX_REGULAR_SECTOR:
+                break
+            entries = self._uint32s(self._sector(sector))
+            fat_sectors.extend(entries[:-1])
+            sector = entries[-1]
+        fat = array("I")
+        for sector in fat_sectors[:self._fat_sectors]:
+            fat.extend(self._uint32s(self._sector(sector)))
+        return fat
+
+    def _chain(self, start: int, table: array) -> List[int]:
+        chain = []
+        sector = start
+        while sector != END_OF_CHAIN and sector <= MAX_REGULAR_SECTOR:
+            if len(chain) > len(table):
+                raise CompoundFileError(f"{self.path}: sector chain loops")
+            chain.append(sector)
+            sector = table[sector]
+        return chain
+
+    def _read_directory(self) -> List[Dict[str, Any]]:
+        entries = []
+        for sector in self._chain(self._directory_start, self._fat):
+            data = self._sector(sector)
+            for offset in range(0, self.sector_size, DIRECTORY_ENTRY_SIZE):
+                name_size, kind = struct.unpack_from("<HB", data, offset + 64)
+                left, right, child = struct.unpack_from("<III", data, offset + 68)
+                start, size = struct.unpack_from("<IQ", data, offset + 116)
+                if self.sector_shift == 9:
+                    size &= 0xFFFFFFFF  # version 3 files only use the low 32 bits
+                name = data[offset:offset + max(0, min(name_size, 64) - 2)].decode("utf-16-le", "replace")
+                entries.append({"name": name, "type": kind, "left": left, "right": right, "child": child,
+                                "start": start, "size": size})
+        if not entries or entries[0]["type"] != ROOT:
+            raise CompoundFileError(f"{self.path}: missing root directory entry")
+        return entries
+
+    def _walk(self) -> Dict[str, int]:
+        """Directory entry index by stream/storage path ("Storage/Stream")"""
+        paths = {}
+        pending = [(self._entries[0]["child"], "")]
+        seen = set()
+        while pending:
+            index, prefix = pending.pop()
+            if index == NO_STREAM or index >= len(self._entries) or index in seen:
+                continue
+            seen.add(index)
+            entry = self._entries[index]
+            path = f"{prefix}{entry['name']}"
+            paths[path] = index
+            pending.append((entry["left"], prefix))
+            pending.append((entry["right"], prefix))
+            if entry["type"] == STORAGE:
+                pending.append((entry["child"], f"{path}/"))
+        return paths
+
+    def allocated_sectors(self) -> int:
+        """Sectors the FAT says are in use (through the last used one); more than sector_count means truncated"""
+        last = len(self._fat) - 1
+        while last >= 0 and self._fat[last] == FREE_SECTOR:
+            last -= 1
+        return last + 1
+
+    # Streams
+
+    def streams(self) -> List[str]:
+        return sorted(path for path, index in self._paths.items() if self._entries[index]["type"] == STREAM)
+
+    def exists(self, path: str) -> bool:
+        return path in self._paths
+
+    def stream(self, path: str) -> bytes:
+        """Contents of the stream at `path`"""
+        index = self._paths.get(path)
+        if index is None or self._entries[index]["type"] != STREAM:
+            raise KeyError(path)
+        entry = self._entries[index]
+        if entry["size"] < self.mini_cutoff:
+            return self._read_mini(entry["start"], entry["size"])
+        return self._read(entry["start"], entry["size"])
+
+    def _read(self, start: int, size: int) -> bytes:
+        data = b"".join(self._sector(sector) for sector in self._chain(start, self._fat))
+        if len(data) < size:
+            raise CompoundFileError(f"{self.path}: stream shorter than its directory entry")
+        return data[:size]
+
+    def _read_mini(self, start: int, size: int) -> bytes:
+        # Small streams live in 64-byte sectors inside the root entry's stream
+        if self._mini_stream is None:
+            root = self._entries[0]
+            self._mini_stream = self._read(root["start"], root["size"])
+            self._mini_fat = self._uint32s(self._read(self._mini_fat_start, self._mini_fat_sectors * self.sector_size)) \
+                if self._mini_fat_sectors else array("I")
+        mini_size = 1 << self.mini_sector_shift
+        data = b"".join(self._mini_stream[sector * mini_size:(sector + 1) * mini_size]
+                        for sector in self._chain(start, self._mini_fat))
+        if len(data) < size:
+            raise CompoundFileError(f"{self.path}: stream shorter than its directory entry")
+        return data[:size]
+
+
+def _decode_text(data: bytes) -> str:
+    """Text of BasicFileInfo; the UTF-16 part can start at an odd offset after the binary prefix"""
+    candidates = [data.decode("utf-16-le", "ignore"), data[1:].decode("utf-16-le", "ignore")]
+    return max(candidates, key=lambda text: sum(1 for c in text if c.isascii() and (c.isprintable() or c in "\r\n")))
+
+
+def parse_basic_file_info(data: bytes) -> Dict[str, Any]:
+    """"Key: value" lines of a BasicFileInfo stream, plus "year" (int or None)"""
+    text = _decode_text(data)
+    info: Dict[str, Any] = {}
+    for line in re.split(r"[\r\n\x00]+", text):
+        # Lines can carry length prefixes and other binary characters
+        match = INFO_LINE.match("".join(c for c in line if c.isprintable()))
+        if match and match.group(1).strip() not in info:
+            info[match.group(1).strip()] = match.group(2)
+    info["year"] = None
+    for pattern in YEAR_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            info["year"] = int(match.group(1))
+            break
+    return info
+
+
+def basic_file_info(path: str) -> Dict[str, Any]:
+    """Parsed BasicFileInfo of an .rvt/.rfa file; raises CompoundFileError for non-Revit files"""
+    with CompoundFile(path) as cf:
+        if not cf.exists(BASIC_FILE_INFO):
+            raise CompoundFileError(f"{path}: no {BASIC_FILE_INFO} stream")
+        return parse_basic_file_info(cf.stream(BASIC_FILE_INFO))
+
+
+def saved_year(path: str) -> Optional[int]:
+    """Revit release that last saved the file, None when it cannot be read"""
+    try:
+        return basic_file_info(path).get("year")
+    except (OSError, CompoundFileError):
+        return None
+
+
+def extract_png(data: bytes) -> Optional[bytes]:
+    """The PNG image inside `data` (signature through IEND chunk), None if there is none"""
+    start = data.find(PNG_SIGNATURE)
+    if start < 0:
+        return None
+    offset = start + len(PNG_SIGNATURE)
+    while offset + 12 <= len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        offset += 12 + length  # length, type, data, CRC
+        if kind == b"IEND":
+            return data[start:offset] if offset <= len(data) else None
+    return None
+
+
+def read_metadata(path: str, preview: bool = False) -> Dict[str, Any]:
+    """Version, worksharing and central model path of a Revit file, with its preview PNG if asked for
+
+    "preview" is None when the file embeds no PNG preview. Raises
+    CompoundFileError for files that are not Revit files.
+    """
+    with CompoundFile(path) as cf:
+        if not cf.exists(BASIC_FILE_INFO):
+            raise CompoundFileError(f"{path}: no {BASIC_FILE_INFO} stream")
+        info = parse_basic_file_info(cf.stream(BASIC_FILE_INFO))
+        png = extract_png(cf.stream(PREVIEW_STREAM)) if preview and cf.exists(PREVIEW_STREAM) else None
+    worksharing = info.get("Worksharing") or None
+    metadata = {
+        "year": info["year"],
+        "build": info.get("Build") or None,
+        "worksharing": worksharing,
+        "workshared": worksharing not in (None, "Not enabled"),
+        "central_path": info.get("Central Model Path") or None,
+        "username": info.get("Username") or None,
+        "size": os.path.getsize(path)
+    }
+    if preview:
+        metadata["preview"] = png
+    return metadata
+
+
+def revit_files(sources: Iterable[str]) -> List[Tuple[str, str]]:
+    """(path, path relative to its source) of the Revit files among files and directory trees"""
+    files = []
+    for source in sources:
+        if not os.path.isdir(source):
+            files.append((source, os.path.basename(source)))
+            continue
+        for root, dirs, names in os.walk(source):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(REVIT_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    files.append((path, os.path.relpath(path, source)))
+    return files
+
+
+def _scan_file(path: str, thumbnail: Optional[str]) -> Dict[str, Any]:
+    try:
+        metadata = read_metadata(path, preview=bool(thumbnail))
+    except (OSError, CompoundFileError) as e:
+        return {"error": str(e)}
+    png = metadata.pop("preview", None)
+    if png:
+        os.makedirs(os.path.dirname(thumbnail) or ".", exist_ok=True)
+        with open(thumbnail, "wb") as f:
+            f.write(png)
+        metadata["thumbnail"] = thumbnail
+    elif thumbnail:
+        metadata["thumbnail"] = None
+    return metadata
+
+
+def scan(sources: Iterable[str], thumbnails: Optional[str] = None,
+         workers: int = MAX_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """Metadata by path for the Revit files among `sources`, read in parallel
+
+    With `thumbnails`, each preview is written to thumbnails/<relative
+    path>.png, extension included, so a.rvt and a.rfa do not share one.
+    Files that cannot be read get {"error": reason}.
+    """
+    files = revit_files(sources)
+    targets = [os.path.join(thumbnails, relative + ".png") if thumbnails else None
+               for _, relative in files]
+    # Reading is mostly waiting on the disk or share, so threads overlap it
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="rvt") as executor:
+        results = executor.map(_scan_file, [path for path, _ in files], targets)
+        return dict(zip((path for path, _ in files), results))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Local RVT File Reader")
+    parser.add_argument("sources", nargs="+", help="Revit files or directories")
+    parser.add_argument("--thumbnails", metavar="DIR", help="Write the embedded previews as PNG files to DIR")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Files read in parallel")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    from da_deploy import engine_year, engine_id
+
+    results = scan(args.sources, args.thumbnails, args.workers)
+    for metadata in results.values():
+        if "error" not in metadata:
+            engine = engine_year(metadata["year"])
+            metadata["engine"] = engine_id(engine) if engine else None
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for path, metadata in results.items():
+            if "error" in metadata:
+                print(f"❌ {metadata['error']}")
+                continue
+            notes = []
+            if metadata["workshared"]:
+                notes.append(f"workshared ({metadata['worksharing']}"
+                             + (f", central: {metadata['central_path']})" if metadata["central_path"] else ")"))
+            if "thumbnail" in metadata:
+                notes.append(f"preview: {metadata['thumbnail']}" if metadata["thumbnail"] else "no preview")
+            print(f"📄 {path}: Revit {metadata['year'] or 'unknown'} -> "
+                  f"{metadata['engine'] or 'no engine (newer than the supported releases)'}"
+                  + "".join(f", {note}" for note in notes))
+        errors = sum(1 for metadata in results.values() if "error" in metadata)
+        print(f"\n{len(results) - errors} of {len(results)} files read")
+    if any("error" in metadata for metadata in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
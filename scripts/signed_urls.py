@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Signed URL Broker
+
+Issues the S3 signed URLs that workitem arguments point at, in batches and
+ahead of time instead of one signing round trip per input/output:
+
+- download_urls() signs many objects of a bucket with
+  POST objects/batchsigneds3download (25 objects per request, requests in
+  parallel) and caches each URL until shortly before its expiration, so
+  resubmitting or re-exporting a model reuses it
+- upload_urls() does the same with batchsigneds3upload; an upload URL set
+  (uploadKey + part URLs) is handed out once, since completing the upload
+  consumes it
+- prefetch() starts signing for queued jobs in the background; a later
+  download_urls()/upload_urls() call for the same keys waits for the
+  in-flight request instead of signing again
+
+Usage:
+    python signed_urls.py <bucket> <object key>... [--upload] [--parts N] [--json]
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aps_client
+import metrics
+from config import APS_BASE_URL
+from tracing import tracer
+
+OSS_BUCKETS_URL = f"{APS_BASE_URL}/oss/v2/buckets"
+MINUTES_EXPIRATION = 60  # longest validity OSS issues
+BATCH_SIZE = 25          # objects per batch request
+EXPIRY_MARGIN = 10 * 60  # seconds of validity left for the DA queue and download
+MAX_PARALLEL = 4
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SignedUrlBroker:
+    """Batch-issued, expiry-cached signed URLs"""
+
+    def __init__(self, minutes: int = MINUTES_EXPIRATION, margin: float = EXPIRY_MARGIN):
+        self.minutes = minutes
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._downloads: Dict[Tuple[str, str], Tuple[str, float]] = {}  # (bucket, key) -> (url, expires at)
+        self._uploads: Dict[Tuple[str, str, int], Tuple[Dict[str, Any], float]] = {}
+        self._pending: Dict[Tuple, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.issued = 0
+        self.hits = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL, thread_name_prefix="sign")
+            return self._executor
+
+    @staticmethod
+    def _expires_at(result: Dict[str, Any], minutes: int) -> float:
+        expiration = result.get("urlExpiration")
+        return expiration / 1000 if expiration else time.time() + 60 * minutes
+
+    def _request(self, token: str, bucket: str, operation: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        url = f"{OSS_BUCKETS_URL}/{bucket}/objects/batch{operation}?minutesExpiration={self.minutes}"
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        with tracer.span("sign", operation=operation, objects=len(requests)) as span:
+            response = aps_client.session().post(url, headers=headers, json={"requests": requests})
+            span.set(status_code=response.status_code)
+        metrics.observe_response("sign", response)
+        if response.status_code != 200:
+            print(f"Failed to sign {len(requests)} objects in {bucket}: {response.status_code} - {response.text}")
+            return {}
+        return response.json().get("results", {})
+
+    def _sign_downloads(self, token: str, bucket: str, keys: List[str]):
+        results = self._request(token, bucket, "signeds3download", [{"objectKey": key} for key in keys])
+        with self._lock:
+            for key, result in results.items():
+                if result.get("status") == "complete" and result.get("url"):
+                    self._downloads[(bucket, key)] = (result["url"], self._expires_at(result, self.minutes))
+                    self.issued += 1
+                else:
+                    print(f"⚠️ No download URL for {bucket}/{key}: {result.get('reason', result.get('status'))}")
+
+    def _sign_uploads(self, token: str, bucket: str, keys: List[str], parts: int):
+        results = self._request(token, bucket, "signeds3upload",
+                                [{"objectKey": key, "parts": parts} for key in keys])
+        with self._lock:
+            for key, result in results.items():
+                if result.get("uploadKey"):
+                    self._uploads[(bucket, key, parts)] = (result, self._expires_at(result, self.minutes))
+                    self.issued += 1
+
+    def _fresh(self, expires_at: float) -> bool:
+        return expires_at - self.margin > time.time()
+
+    def _start(self, token: str, bucket: str, keys: List[str], parts: Optional[int]) -> List[Future]:
+        """Sign `keys` not cached or in flight, in parallel batches; returns the futures to wait on"""
+        futures = []
+        started = []
+        pool = self._pool()
+        # Check and claim under one lock, so two callers never sign the same key
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                cache_key = (bucket, key) if parts is None else (bucket, key, parts)
+                cached = self._downloads.get(cache_key) if parts is None else self._uploads.get(cache_key)
+                if cached and self._fresh(cached[1]):
+                    continue
+                pending = self._pending.get(cache_key)
+                if pending:
+                    futures.append(pending)
+                else:
+                    missing.append((key, cache_key))
+            for chunk in _chunks(missing, BATCH_SIZE):
+                chunk_keys = [key for key, _ in chunk]
+                if parts is None:
+                    future = pool.submit(self._sign_downloads, token, bucket, chunk_keys)
+                else:
+                    future = pool.submit(self._sign_uploads, token, bucket, chunk_keys, parts)
+                for _, cache_key in chunk:
+                    self._pending[cache_key] = future
+                started.append((future, [cache_key for _, cache_key in chunk]))
+                futures.append(future)
+        # Outside the lock: a future that is already done runs its callback right here
+        for future, cache_keys in started:
+            future.add_done_callback(lambda f, cache_keys=cache_keys: self._done(cache_keys, f))
+        return futures
+
+    def _done(self, cache_keys, future: Future):
+        with self._lock:
+            for cache_key in cache_keys:
+                if self._pending.get(cache_key) is future:
+                    del self._pending[cache_key]
+
+    def prefetch(self, token: str, bucket: str, keys: Iterable[str], upload: bool = False, parts: int = 1):
+        """Start signing in the background; returns immediately"""
+        self._start(token, bucket, list(keys), parts if upload else None)
+
+    def download_urls(self, token: str, bucket: str, keys: Iterable[str]) -> Dict[str, str]:
+        """Signed GET URLs by object key (missing keys could not be signed)"""
+        keys = list(keys)
+        wait(self._start(token, bucket, keys, None))
+        urls = {}
+        with self._lock:
+            for key in keys:
+                cached = self._downloads.get((bucket, key))
+                if cached and self._fresh(cached[1]):
+                    urls[key] = cached[0]
+            self.hits += len(urls)
+        return urls
+
+    def download_url(self, token: str, bucket: str, key: str) -> Optional[str]:
+        return self.download_urls(token, bucket, [key]).get(key)
+
+    def upload_urls(self, token: str, bucket: str, keys: Iterable[str], parts: int = 1) -> Dict[str, Dict[str, Any]]:
+        """uploadKey and part URLs by object key; each set is handed out once"""
+        keys = list(keys)
+        wait(self._start(token, bucket, keys, parts))
+        uploads = {}
+        with self._lock:
+            for key in keys:
+                cached = self._uploads.pop((bucket, key, parts), None)
+                if cached and self._fresh(cached[1]):
+                    uploads[key] = cached[0]
+        return uploads
+
+    def invalidate(self, bucket: str, key: str):
+        """Forget a download URL, e.g. after the object was replaced"""
+        with self._lock:
+            self._downloads.pop((bucket, key), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"signed_urls": sum(1 for _, expires in self._downloads.values() if self._fresh(expires)),
+                    "signed_issued": self.issued}
+
+
+# Shared broker used by the scripts
+broker = SignedUrlBroker()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Signed URL Broker")
+    parser.add_argument("bucket", help="Bucket key")
+    parser.add_argument("keys", nargs="+", help="Object keys")
+    parser.add_argument("--upload", action="store_true", help="Issue upload URLs instead of download URLs")
+    parser.add_argument("--parts", type=int, default=1, help="Parts per upload")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+
+    args = parser.parse_args(argv)
+
+    token = aps_client.get_token("data:read data:write")
+    if not token:
+        sys.exit(1)
+    if args.upload:
+        results = broker.upload_urls(token, args.bucket, args.keys, args.parts)
+    else:
+        results = broker.download_urls(token, args.bucket, args.keys)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key in args.keys:
+            print(f"{'✅' if key in results else '❌'} {key}: {results.get(key, 'not signed')}")
+    if len(results) < len(set(args.keys)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Pipeline Tracing
+
+Lightweight spans with hierarchical ids and durations around the pipeline
+stages (token fetch, bucket create, upload, workitem submit, queue wait,
+processing, report fetch, download).
+
+Spans nest through contextvars, so a span opened inside another one - also
+on a WorkitemScheduler worker thread - records it as its parent. Finished
+spans are written as JSON lines using OpenTelemetry field names:
+
+    {"traceId": "...", "spanId": "...", "parentSpanId": "...", "name": "upload",
+     "startTimeUnixNano": ..., "endTimeUnixNano": ..., "durationMs": 812.4,
+     "attributes": {"file": "100.rvt", "bytes": 1048576, "bytes_per_s": 1290555.1},
+     "status": "ok"}
+
+Durations are also aggregated per span name in memory, so a run can print a
+stage summary at the end without writing a trace file. Only the latest
+MAX_DURATIONS per name are kept for the percentiles, so a long-running
+process (rve_daemon.py, api_server.py) does not grow without bound.
+
+Usage:
+    python tracing.py <trace.jsonl>    Print the stage summary of a trace file
+"""
+
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+MAX_DURATIONS = 10000  # spans per name kept for the percentiles
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("rve_current_span", default=None)
+
+
+class Span:
+    """One timed operation; attributes can be added while it is open"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int((self.end or self.start) * 1e9),
+            "durationMs": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "status": self.status
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(durations: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """Per-name count, total and latency percentiles in seconds"""
+    return {
+        name: {
+            "count": len(values),
+            "total": sum(values),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values)
+        }
+        for name, values in durations.items() if values
+    }
+
+
+def print_summary(summary: Dict[str, Dict[str, float]], title: str = "Stage summary"):
+    if not summary:
+        return
+    print(f"\n⏱️ {title}")
+    print(f"   {'stage':<14}{'count':>7}{'total s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, s in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+        print(f"   {name:<14}{s['count']:>7}{s['total']:>10.1f}{s['mean'] * 1000:>10.0f}"
+              f"{s['p50'] * 1000:>10.0f}{s['p95'] * 1000:>10.0f}{s['max'] * 1000:>10.0f}")
+
+
+class Tracer:
+    """Creates spans, writes them to an optional JSON lines file and aggregates durations"""
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self._file = None
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Deque[float]] = {}  # the latest MAX_DURATIONS per name
+        self._totals: Dict[str, List[float]] = {}       # name -> [count, total seconds] of all spans
+
+    def configure(self, path: Optional[str] = None):
+        """Start writing finished spans to `path` (appending)"""
+        self.close()
+        if path:
+            self._file = open(path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span"""
+        parent = _current_span.get()
+        span = Span(name, self.trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "error"
+            span.attributes["error"] = repr(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.time()
+            self._finish(span)
+
+    def record(self, name: str, start: float, end: float, **attributes) -> Span:
+        """Record a span measured after the fact (epoch seconds), e.g. a queue wait seen by polling"""
+        parent = _current_span.get()
+        span = Span(name, self.trace_id, parent.span_id if parent else None, attributes)
+        span.start = start
+        span.end = end
+        self._finish(span)
+        return span
+
+    def _finish(self, span: Span):
+        with self._lock:
+            duration = span.duration
+            self._durations.setdefault(span.name, deque(maxlen=MAX_DURATIONS)).append(duration)
+            totals = self._totals.setdefault(span.name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+            if self._file:
+                self._file.write(json.dumps(span.to_record(), default=str) + "\n")
+                self._file.flush()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles over the latest spans per name; count, total and mean over all of them"""
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+            totals = {name: list(values) for name, values in self._totals.items()}
+        summary = summarize(durations)
+        for name, stats in summary.items():
+            count, total = totals[name]
+            stats.update(count=count, total=total, mean=total / count)
+        return summary
+
+    def print_summary(self, title: str = "Stage summary"):
+        print_summary(self.summary(), title)
+
+
+# Shared tracer used by the scripts
+tracer = Tracer()
+
+
+def load_trace(path: str) -> Dict[str, List[float]]:
+    """Durations per span name from a JSON lines trace file"""
+    durations: Dict[str, List[float]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            durations.setdefault(record["name"], []).append(record["durationMs"] / 1000.0)
+    return durations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Trace Summary")
+    parser.add_argument("trace", help="JSON lines trace file")
+    parser.add_argument("--json", action="store_true", help="Output the summary as JSON")
+
+    args = parser.parse_args(argv)
+
+    summary = summarize(load_trace(args.trace))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary, f"Stage summary of {args.trace}")
+    if not summary:
+        print("No spans found", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
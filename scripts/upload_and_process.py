@@ -10,6 +10,7 @@ Usage:
 Options:
     --type TYPE       Filter by view type
     --exportable      Show only exportable views
+    --single-read     Hash the file while uploading it (one read; no skip when OSS already has it)
     --json            Output in JSON format
 """
 
@@ -17,63 +18,67 @@ import os
 import sys
 import json
 import argparse
-import requests
-from config import CLIENT_ID, CLIENT_SECRET, APS_BASE_URL
+import metrics
+import aps_client
+from bucket_pool import buckets, file_digests, object_key, object_url, remote_match
+from config import CLIENT_ID, APS_BASE_URL
+from signed_urls import broker
+from tracing import tracer
+from upload_stream import stream_upload
 
 def get_access_token():
-    """Get Autodesk access token"""
-    url = "https://developer.api.autodesk.com/authentication/v2/token"
-    data = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials",
-        "scope": "code:all data:write data:read bucket:create bucket:read"
-    }
-    response = requests.post(url, headers={"Content-Type": "application/x-www-form-urlencoded"}, data=data)
-    return response.json()["access_token"] if response.status_code == 200 else None
-
-def create_bucket(token):
-    """Create a bucket for file uploads"""
-    bucket_name = f"{CLIENT_ID.lower()}-revit-view-extractor"
-    url = f"{APS_BASE_URL}/oss/v2/buckets"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "bucketKey": bucket_name,
-        "policyKey": "transient"  # Files will be automatically deleted after some time
-    }
-    
-    response = requests.post(url, headers=headers, json=data)
-    
-    if response.status_code in [200, 409]:  # 409 means bucket already exists
-        return bucket_name
-    
-    print(f"Failed to create bucket: {response.text}")
-    return None
-
-def upload_file(token, bucket_name, file_path):
-    """Upload file to OSS"""
+    """Get Autodesk access token (cached until shortly before it expires)"""
+    return aps_client.get_token("code:all data:write data:read bucket:create bucket:read")
+
+def create_bucket(token, size=None):
+    """Pool bucket for uploads (long-lived, verified once per process)"""
+    return buckets.bucket_for(token, size)
+
+def upload_file(token, bucket_name, file_path, single_read=False):
+    """Upload file to OSS under its content-addressed key; returns a signed read URL for the workitem
+    
+    With bucket_name None the pool bucket is picked by file size. When OSS
+    already holds the same bytes under the key (uploaded from any machine),
+    the upload is skipped. With single_read the file is hashed while it is
+    uploaded (upload_stream.py), so it is read once but always sent.
+    """
+    http = aps_client.session()
     filename = os.path.basename(file_path)
-    url = f"{APS_BASE_URL}/oss/v2/buckets/{bucket_name}/objects/{filename}"
+    if bucket_name is None:
+        bucket_name = create_bucket(token, os.path.getsize(file_path))
+        if not bucket_name:
+            return None
+    if single_read:
+        result = stream_upload(token, bucket_name, file_path, single_read=True)
+        return broker.download_url(token, bucket_name, result["key"]) if result else None
+    
+    content_hash, sha1, file_size = file_digests(file_path)
+    key = object_key(content_hash, filename)
+    if remote_match(token, bucket_name, key, sha1, file_size):
+        print(f"♻️ {filename} is already in {bucket_name}, skipping upload")
+        return broker.download_url(token, bucket_name, key)
+    url = object_url(bucket_name, key)
     
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/octet-stream"
     }
     
-    with open(file_path, 'rb') as f:
-        response = requests.put(url, headers=headers, data=f)
+    with tracer.span("upload", file=filename, bytes=file_size) as span, open(file_path, 'rb') as f:
+        response = http.put(url, headers=headers, data=f)
+        span.set(status_code=response.status_code, bytes_per_s=file_size / max(span.duration, 1e-9))
     
+    metrics.observe_response("upload", response)
     if response.status_code == 200:
-        return f"https://developer.api.autodesk.com/oss/v2/buckets/{bucket_name}/objects/{filename}"
+        metrics.upload_bytes.inc(file_size)
+        return broker.download_url(token, bucket_name, key)
     
     print(f"Failed to upload file: {response.text}")
     return None
 
 def process_revit_file(file_url, view_type=None, exportable=None):
     """Process uploaded Revit file in Design Automation"""
+    http = aps_client.session()
     token = get_access_token()
     
     # Prepare workitem data
@@ -88,13 +93,15 @@ def process_revit_file(file_url, view_type=None, exportable=None):
     }
     
     # Send workitem to process file
-    url = "https://developer.api.autodesk.com/da/us-east/v3/workitems"
+    url = f"{APS_BASE_URL}/da/us-east/v3/workitems"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
     
-    response = requests.post(url, headers=headers, json=workitem_data)
+    with tracer.span("submit") as span:
+        response = http.post(url, headers=headers, json=workitem_data)
+        span.set(status_code=response.status_code)
     
     if response.status_code != 200:
         print(f"Error processing file: {response.text}")
@@ -103,18 +110,19 @@ def process_revit_file(file_url, view_type=None, exportable=None):
     workitem_id = response.json()["id"]
     
     # Monitor workitem
-    status_url = f"https://developer.api.autodesk.com/da/us-east/v3/workitems/{workitem_id}"
+    status_url = f"{APS_BASE_URL}/da/us-east/v3/workitems/{workitem_id}"
     
     import time
     for _ in range(30):  # 5 minutes timeout
-        status_response = requests.get(status_url, headers=headers)
+        status_response = http.get(status_url, headers=headers)
         if status_response.status_code == 200:
             status_data = status_response.json()
             if status_data["status"] == "success":
                 # Get report
                 report_url = status_data.get("reportUrl")
                 if report_url:
-                    report_response = requests.get(report_url)
+                    with tracer.span("report"):
+                        report_response = http.get(report_url)
                     if report_response.status_code == 200:
                         return parse_view_report(report_response.text, view_type, exportable)
             elif status_data["status"] == "failed":
@@ -154,14 +162,16 @@ def parse_view_report(report_text, view_type=None, exportable=None):
     
     return views
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="RevitViewExtractor - Upload and Process")
     parser.add_argument("file", help="Path to Revit file")
     parser.add_argument("--type", help="Filter by view type")
     parser.add_argument("--exportable", action="store_true", help="Show only exportable views")
+    parser.add_argument("--single-read", action="store_true",
+                        help="Hash the file while uploading it, reading it once")
     parser.add_argument("--json", action="store_true", help="Output in JSON format")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Get token
     token = get_access_token()
@@ -169,14 +179,8 @@ def main():
         print("Failed to get access token")
         sys.exit(1)
     
-    # Create bucket
-    bucket_name = create_bucket(token)
-    if not bucket_name:
-        print("Failed to create bucket")
-        sys.exit(1)
-    
-    # Upload file
-    file_url = upload_file(token, bucket_name, args.file)
+    # Upload file to its pool bucket
+    file_url = upload_file(token, None, args.file, args.single_read)
     if not file_url:
         print("Failed to upload file")
         sys.exit(1)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Single-Read Upload Pipeline
+
+Uploads go to a content-addressed key (bucket_pool.object_key). For a local
+file, stream_upload() hashes it first and skips the upload when OSS already
+holds the same bytes under the key, which is the common case for models
+that were submitted before.
+
+Hashing a file and then uploading it reads the file twice, though; on a
+network share that read is the bottleneck for large models. With
+single_read=True (when the file is rarely in OSS already) it is read once:
+
+- the file is memory-mapped and walked part by part; a part is a memoryview
+  slice of the mapping, so no part is copied into a Python buffer
+- the reading thread feeds each part to SHA-256 (the object key) and SHA-1
+  (what OSS reports) and hands the same slice to an upload thread, which PUTs
+  it to its S3 part URL
+- at most MAX_IN_FLIGHT parts are out at a time, so reading never runs more
+  than that far ahead of the uplink
+
+The key is only known once the last part is hashed, so the parts go to a
+staging key and are then copied to the content-addressed key within the
+bucket (OSS copyto). When that key already holds the same bytes, the staging
+object is just deleted. Staging objects left by an interrupted run are
+deleted on shutdown with --cleanup-storage, or expire with the transient
+pool bucket's retention.
+"""
+
+import os
+import mmap
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import aps_client
+import metrics
+from bucket_pool import file_digests, object_details, object_key, object_url, remote_match
+from lifecycle import lifecycle
+from signed_urls import broker
+from tracing import tracer
+
+MIN_PART_SIZE = 8 * 1024 * 1024  # S3 needs 5 MB parts, except the last
+MAX_PARTS = 25                   # part URLs OSS issues in one request
+MAX_IN_FLIGHT = 4
+STAGING_PREFIX = "staging/"
+
+
+def part_size(size: int) -> int:
+    """Part size that fits `size` bytes into at most MAX_PARTS parts"""
+    return max(MIN_PART_SIZE, -(-size // MAX_PARTS))
+
+
+def _put_part(url: str, part: memoryview, slots: threading.BoundedSemaphore) -> int:
+    try:
+        response = aps_client.session().put(url, data=part)
+        metrics.observe_response("upload_part", response)
+        return response.status_code
+    finally:
+        part.release()
+        slots.release()
+
+
+def _send_parts(path: str, size: int, urls, step: int, digest: bool = True):
+    """Hash the file (unless `digest` is False) and upload its parts in one pass; returns (sha256, sha1, part statuses)"""
+    sha256, sha1 = hashlib.sha256(), hashlib.sha1()
+    slots = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+    futures = []
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        view = memoryview(mapped) if mapped else memoryview(b"")
+        try:
+            if mapped and hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT, thread_name_prefix="part") as executor:
+                for index, url in enumerate(urls):
+                    part = view[index * step:(index + 1) * step]
+                    if digest:
+                        # hashlib releases the GIL, so hashing overlaps the part uploads
+                        sha256.update(part)
+                        sha1.update(part)
+                    slots.acquire()
+                    futures.append(executor.submit(_put_part, url, part, slots))
+            statuses = [future.result() for future in futures]
+        finally:
+            view.release()
+            if mapped:
+                mapped.close()
+    return sha256.hexdigest(), sha1.hexdigest(), statuses
+
+
+def _upload_parts(token: str, bucket_key: str, key: str, file_path: str, size: int, digest: bool):
+    """Upload a file in parts to `key` and complete it; returns (sha256, sha1) or None"""
+    filename = os.path.basename(file_path)
+    step = part_size(size)
+    upload = broker.upload_urls(token, bucket_key, [key], max(1, -(-size // step))).get(key)
+    if not upload:
+        print(f"Failed to get upload URLs for {filename}")
+        return None
+
+    with tracer.span("upload", file=filename, bytes=size) as span:
+        content_hash, sha1, statuses = _send_parts(file_path, size, upload["urls"], step, digest)
+        span.set(bytes_per_s=size / max(span.duration, 1e-9))
+    if any(status != 200 for status in statuses):
+        print(f"Failed to upload {filename}: part statuses {statuses}")
+        return None
+
+    response = aps_client.session().post(f"{object_url(bucket_key, key)}/signeds3upload",
+                                         headers={"Authorization": f"Bearer {token}"},
+                                         json={"uploadKey": upload["uploadKey"]})
+    metrics.observe_response("upload", response)
+    if response.status_code != 200:
+        print(f"Failed to complete upload of {filename}: {response.status_code} - {response.text}")
+        return None
+    metrics.upload_bytes.inc(size)
+    return content_hash, sha1
+
+
+def stream_upload(token: str, bucket_key: str, file_path: str, single_read: bool = False) -> Optional[Dict[str, Any]]:
+    """Upload a file to its content-addressed key
+
+    The file is hashed first and not sent when OSS already holds the bytes;
+    with single_read it is hashed while it uploads, through a staging key.
+    Returns {"key", "sha256", "sha1", "size", "uploaded"}; "uploaded" is False
+    when OSS already held the bytes under the key. None on failure.
+    """
+    filename = os.path.basename(file_path)
+    if not single_read:
+        content_hash, sha1, size = file_digests(file_path)
+        key = object_key(content_hash, filename)
+        result = {"key": key, "sha256": content_hash, "sha1": sha1, "size": size, "uploaded": False}
+        if remote_match(token, bucket_key, key, sha1, size):
+            return result
+        if not _upload_parts(token, bucket_key, key, file_path, size, digest=False):
+            return None
+        return {**result, "uploaded": True}
+
+    http = aps_client.session()
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    size = os.path.getsize(file_path)
+    staging = f"{STAGING_PREFIX}{uuid.uuid4().hex}"
+    lifecycle.register_object(bucket_key, staging)
+
+    digests = _upload_parts(token, bucket_key, staging, file_path, size, digest=True)
+    if not digests:
+        return None
+    content_hash, sha1 = digests
+
+    staging_url = object_url(bucket_key, staging)
+    key = object_key(content_hash, filename)
+    details = object_details(token, bucket_key, key)
+    uploaded = not details or details.get("size") != size or str(details.get("sha1", "")).lower() != sha1
+    if uploaded:
+        response = http.put(f"{staging_url}/copyto/{quote(key, safe='')}", headers=headers)
+        metrics.observe_response("copy", response)
+        if response.status_code != 200:
+            print(f"Failed to copy {filename} to {key}: {response.status_code} - {response.text}")
+            return None
+    response = http.delete(staging_url, headers=headers)
+    metrics.observe_response("delete", response)
+    if response.status_code in [200, 204, 404]:
+        lifecycle.release_object(bucket_key, staging)
+    return {"key": key, "sha256": content_hash, "sha1": sha1, "size": size, "uploaded": uploaded}
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - View Diff Utility
+
+Compares the view lists extracted from two revisions of a model and reports
+which views were added, removed, renamed, retyped or changed exportability.
+
+Accepted inputs are the `views_data.json` written by the DA report
+(`{"view_list": [...]}`), the list written by `extract_views_md_api.py`
+(`[{"name", "type", "id"}, ...]`), or a plain text DA report with
+`• Name (Type) ✅` lines.
+
+Views are matched by id first; views that cannot be matched by id (because
+one of the revisions has no ids) fall back to matching on name + type, then
+name alone. Matching is done with hash lookups, so a diff is linear in the
+number of views.
+
+Usage:
+    python view_diff.py <old_views.json> <new_views.json> [options]
+    python view_diff.py <old_dir> <new_dir> [options]
+
+Options:
+    --json            Output the changeset in JSON format
+    --output PATH     Write changesets as JSON lines (directory mode)
+    --workers N       Parallel file pairs in directory mode (default: 4)
+"""
+
+import os
+import sys
+import json
+import argparse
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _parse_text_report(report_text: str) -> List[Dict[str, Any]]:
+    """Parse `• Name (Type) ✅` lines from a plain text DA report"""
+    views = []
+    for line in report_text.split("\n"):
+        if line.startswith("•") and "(" in line:
+            views.append({
+                "name": line.split(" (")[0].strip("•").strip(),
+                "type": line.split(" (")[1].split(")")[0],
+                "exportable": "✅" in line
+            })
+    return views
+
+
+def load_views(path: str) -> List[Dict[str, Any]]:
+    """Load a view list from a views JSON file or a DA text report"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return normalize_views(_parse_text_report(text))
+
+    if isinstance(data, dict):
+        data = data.get("view_list", data.get("views", []))
+    return normalize_views(data)
+
+
+def normalize_views(views: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bring views from any extractor into the same {id, name, type, exportable} shape"""
+    normalized = []
+    for view in views:
+        view_id = view.get("id", view.get("viewId"))
+        normalized.append({
+            "id": str(view_id) if view_id not in (None, "") else None,
+            "name": (view.get("name") or view.get("viewName") or "").strip(),
+            "type": view.get("type") or view.get("viewType"),
+            "exportable": view.get("exportable")
+        })
+    return normalized
+
+
+def _index(views: List[Dict[str, Any]], key) -> Dict[Any, deque]:
+    """Group views by key, keeping document order for duplicates"""
+    index = defaultdict(deque)
+    for view in views:
+        index[key(view)].append(view)
+    return index
+
+
+def _pair_by(old: List[Dict[str, Any]], new: List[Dict[str, Any]], key) -> Tuple[List[Tuple[Dict, Dict]], List[Dict], List[Dict]]:
+    """Pair old and new views sharing the same key; return pairs and leftovers"""
+    new_index = _index(new, key)
+    pairs = []
+    old_left = []
+    for view in old:
+        bucket = new_index.get(key(view))
+        if bucket:
+            pairs.append((view, bucket.popleft()))
+        else:
+            old_left.append(view)
+
+    matched = {id(n) for _, n in pairs}
+    new_left = [view for view in new if id(view) not in matched]
+    return pairs, old_left, new_left
+
+
+def _pair_by_name(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Tuple[List[Tuple[Dict, Dict]], List[Dict], List[Dict]]:
+    """Pair views on name + type first, then on name alone"""
+    by_name_type, old, new = _pair_by(old, new, lambda v: (v["name"], v["type"]))
+    by_name, old, new = _pair_by(old, new, lambda v: v["name"])
+    return by_name_type + by_name, old, new
+
+
+def diff_views(old_views: List[Dict[str, Any]], new_views: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the changeset between two normalized view lists"""
+    old_with_id = [v for v in old_views if v["id"] is not None]
+    new_with_id = [v for v in new_views if v["id"] is not None]
+    old_no_id = [v for v in old_views if v["id"] is None]
+    new_no_id = [v for v in new_views if v["id"] is None]
+
+    # 1. Match on view id
+    pairs, old_left, new_left = _pair_by(old_with_id, new_with_id, lambda v: v["id"])
+
+    # 2. Fall back to names, but only where one side has no id: two views
+    #    with different ids are different elements even if the name matches.
+    fallback, old_no_id, new_pool = _pair_by_name(old_no_id, new_left + new_no_id)
+    pairs.extend(fallback)
+    new_left = [v for v in new_pool if v["id"] is not None]
+    new_no_id = [v for v in new_pool if v["id"] is None]
+
+    fallback, old_left, new_no_id = _pair_by_name(old_left, new_no_id)
+    pairs.extend(fallback)
+
+    added = new_left + new_no_id
+    removed = old_left + old_no_id
+
+    changeset = {
+        "added": added,
+        "removed": removed,
+        "renamed": [],
+        "retyped": [],
+        "exportable_changed": [],
+        "unchanged": 0
+    }
+
+    for old, new in pairs:
+        changed = False
+        if old["name"] != new["name"]:
+            changeset["renamed"].append({"old": old, "new": new})
+            changed = True
+        if old["type"] != new["type"]:
+            changeset["retyped"].append({"old": old, "new": new})
+            changed = True
+        if old["exportable"] is not None and new["exportable"] is not None and old["exportable"] != new["exportable"]:
+            changeset["exportable_changed"].append({"old": old, "new": new})
+            changed = True
+        if not changed:
+            changeset["unchanged"] += 1
+
+    changeset["summary"] = {
+        "added": len(changeset["added"]),
+        "removed": len(changeset["removed"]),
+        "renamed": len(changeset["renamed"]),
+        "retyped": len(changeset["retyped"]),
+        "exportable_changed": len(changeset["exportable_changed"]),
+        "unchanged": changeset["unchanged"]
+    }
+    return changeset
+
+
+def diff_files(old_path: str, new_path: str) -> Dict[str, Any]:
+    """Diff two view files"""
+    return diff_views(load_views(old_path), load_views(new_path))
+
+
+def _view_files(directory: str) -> Dict[str, str]:
+    """Map relative path -> absolute path for every view file under directory"""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith((".json", ".txt")):
+                full_path = os.path.join(root, name)
+                files[os.path.relpath(full_path, directory)] = full_path
+    return files
+
+
+def diff_portfolio(old_dir: str, new_dir: str, max_workers: int = 4) -> Iterator[Dict[str, Any]]:
+    """Diff every model of two portfolio snapshots, yielding one changeset per model
+
+    Files are paired by relative path. Results are yielded in chunks so that
+    thousands of models can be compared without holding every changeset in
+    memory.
+    """
+    old_files = _view_files(old_dir)
+    new_files = _view_files(new_dir)
+
+    for rel_path in sorted(old_files.keys() - new_files.keys()):
+        yield {"model": rel_path, "status": "removed"}
+    for rel_path in sorted(new_files.keys() - old_files.keys()):
+        yield {"model": rel_path, "status": "added"}
+
+    def diff_one(rel_path):
+        try:
+            changeset = diff_files(old_files[rel_path], new_files[rel_path])
+            return {"model": rel_path, "status": "compared", "changeset": changeset}
+        except (OSError, ValueError) as exc:
+            return {"model": rel_path, "status": "error", "error": str(exc)}
+
+    common = sorted(old_files.keys() & new_files.keys())
+    chunk_size = max_workers * 8
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Submit in chunks so pending changesets stay bounded
+        for start in range(0, len(common), chunk_size):
+            for result in executor.map(diff_one, common[start:start + chunk_size]):
+                yield result
+
+
+def print_changeset(changeset: Dict[str, Any], title: Optional[str] = None):
+    """Print a human readable changeset"""
+    if title:
+        print(f"\n📄 {title}")
+
+    for view in changeset["added"]:
+        print(f"  ➕ {view['name']} ({view['type']})")
+    for view in changeset["removed"]:
+        print(f"  ➖ {view['name']} ({view['type']})")
+    for change in changeset["renamed"]:
+        print(f"  ✏️  {change['old']['name']} → {change['new']['name']}")
+    for change in changeset["retyped"]:
+        print(f"  🔁 {change['new']['name']}: {change['old']['type']} → {change['new']['type']}")
+    for change in changeset["exportable_changed"]:
+        status = "exportable" if change["new"]["exportable"] else "non-exportable"
+        print(f"  🖨️  {change['new']['name']} is now {status}")
+
+    summary = changeset["summary"]
+    print(f"  Added: {summary['added']}, Removed: {summary['removed']}, "
+          f"Renamed: {summary['renamed']}, Retyped: {summary['retyped']}, "
+          f"Exportable changed: {summary['exportable_changed']}, Unchanged: {summary['unchanged']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - View Diff")
+    parser.add_argument("old", help="Old views file or portfolio directory")
+    parser.add_argument("new", help="New views file or portfolio directory")
+    parser.add_argument("--json", action="store_true", help="Output in JSON format")
+    parser.add_argument("--output", help="Write changesets as JSON lines (directory mode)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel file pairs in directory mode")
+
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.old) and os.path.isdir(args.new):
+        out = open(args.output, "w") if args.output else None
+        totals = defaultdict(int)
+        try:
+            for result in diff_portfolio(args.old, args.new, args.workers):
+                totals[result["status"]] += 1
+                if out:
+                    out.write(json.dumps(result) + "\n")
+                elif args.json:
+                    print(json.dumps(result))
+                elif result["status"] == "compared":
+                    summary = result["changeset"]["summary"]
+                    if any(summary[k] for k in summary if k != "unchanged"):
+                        print_changeset(result["changeset"], result["model"])
+                else:
+                    print(f"\n📄 {result['model']}: {result['status']} {result.get('error', '')}")
+        finally:
+            if out:
+                out.close()
+
+        print(f"\n📊 Portfolio diff complete: {dict(totals)}")
+        if args.output:
+            print(f"Changesets saved to: {args.output}")
+        return
+
+    if os.path.isdir(args.old) or os.path.isdir(args.new):
+        print("ERROR: Compare two files or two directories")
+        sys.exit(1)
+
+    changeset = diff_files(args.old, args.new)
+    if args.json:
+        print(json.dumps(changeset, indent=2))
+    else:
+        print_changeset(changeset, f"{args.old} → {args.new}")
+
+
+if __name__ == "__main__":
+    main()
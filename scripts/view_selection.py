@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - View Selection Manifest
+
+Builds the view-selection manifest passed to a Design Automation workitem as
+the `viewSelection` input argument. The activity opens the model once and
+exports only the views listed in the manifest, so one workitem per model
+replaces one workitem per view.
+
+The selection is computed from view listings: every view matching the
+type/exportable filters, optionally narrowed to the views that changed since
+a previous listing (see view_diff.py), plus any explicitly requested views.
+
+Manifest format:
+    {"document": "100.rvt", "viewIds": ["855058", ...], "viewNames": ["South", ...]}
+
+`viewIds` is used when the listing carries element ids; views known only by
+name (plain DA text reports) are listed in `viewNames`.
+
+Small manifests travel inline in the workitem as a percent-encoded data URL;
+larger ones (over INLINE_LIMIT bytes) are uploaded to the pool bucket under
+their content hash and passed as a signed URL.
+
+Usage:
+    python view_selection.py <current_views.json> [options]
+
+Options:
+    --previous PATH   Previous view listing; select only added/changed views
+    --view-id ID      Always select this view id (repeatable)
+    --view NAME       Always select this view name (repeatable)
+    --type TYPE       Filter by view type
+    --exportable      Select only exportable views
+    --output PATH     Write manifest to PATH instead of stdout
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from view_diff import diff_views, load_views, normalize_views
+
+# Activity parameter carrying the manifest into the workitem
+VIEW_SELECTION_PARAM = "viewSelection"
+VIEW_SELECTION_LOCAL_NAME = "views.json"
+INLINE_LIMIT = 4096  # encoded bytes passed inline; larger manifests are uploaded
+
+
+def activity_parameter() -> Dict[str, Any]:
+    """Parameter definition to add to an activity that accepts a view selection"""
+    return {
+        "verb": "get",
+        "description": "JSON manifest of view ids/names to export",
+        "localName": VIEW_SELECTION_LOCAL_NAME,
+        "required": False
+    }
+
+
+def filter_views(views: List[Dict[str, Any]], view_type: Optional[str] = None, exportable: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Filter views based on criteria"""
+    if view_type:
+        views = [v for v in views if v.get("type") == view_type]
+
+    if exportable is not None:
+        views = [v for v in views if v.get("exportable") == exportable]
+
+    return views
+
+
+def changed_views(current_views: List[Dict[str, Any]], previous_views: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Views that are new or changed in the current listing"""
+    changeset = diff_views(previous_views, current_views)
+    changed = list(changeset["added"])
+    for key in ("renamed", "retyped", "exportable_changed"):
+        changed.extend(change["new"] for change in changeset[key])
+
+    # A view can be both renamed and retyped; keep it once, in listing order
+    changed_ids = {id(v) for v in changed}
+    return [v for v in current_views if id(v) in changed_ids]
+
+
+def select_views(current_views: List[Dict[str, Any]], previous_views: Optional[List[Dict[str, Any]]] = None,
+                 view_ids: Iterable[str] = (), view_names: Iterable[str] = (),
+                 view_type: Optional[str] = None, exportable: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Compute the views a workitem should export
+
+    Without a previous listing or explicit requests every view matching the
+    filters is selected. With a previous listing only changed views are
+    selected, and explicitly requested ids/names are always added.
+    """
+    current_views = normalize_views(current_views)
+    candidates = filter_views(current_views, view_type, exportable)
+
+    requested_ids = {str(i) for i in view_ids}
+    requested_names = set(view_names)
+    if previous_views is None and not requested_ids and not requested_names:
+        return candidates
+
+    selected = set()
+    if previous_views is not None:
+        selected.update(id(v) for v in changed_views(candidates, normalize_views(previous_views)))
+    for view in candidates:
+        if view["id"] in requested_ids or view["name"] in requested_names:
+            selected.add(id(view))
+
+    return [v for v in candidates if id(v) in selected]
+
+
+def build_manifest(document: str, views: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the manifest for a list of selected views"""
+    return {
+        "document": os.path.basename(document),
+        "viewIds": [v["id"] for v in views if v.get("id")],
+        "viewNames": [v["name"] for v in views if not v.get("id")]
+    }
+
+
+def is_empty(manifest: Dict[str, Any]) -> bool:
+    """True when the manifest selects no views, i.e. the workitem can be skipped"""
+    return not manifest["viewIds"] and not manifest["viewNames"]
+
+
+def upload_manifest(token: str, payload: bytes) -> Optional[str]:
+    """Upload a manifest to the pool bucket under its content hash; returns a signed GET URL"""
+    import aps_client
+    import metrics
+    from bucket_pool import buckets, object_details, object_key, object_url
+    from signed_urls import broker
+
+    bucket_key = buckets.bucket_for(token, len(payload))
+    if not bucket_key:
+        return None
+    key = object_key(hashlib.sha256(payload).hexdigest(), VIEW_SELECTION_LOCAL_NAME)
+    details = object_details(token, bucket_key, key)
+    if not details or details.get("size") != len(payload):
+        upload = broker.upload_urls(token, bucket_key, [key]).get(key)
+        if not upload:
+            print(f"Failed to get an upload URL for the view selection {key}")
+            return None
+        http = aps_client.session()
+        response = http.put(upload["urls"][0], data=payload)
+        metrics.observe_response("upload_part", response)
+        if response.status_code != 200:
+            print(f"Failed to upload the view selection: {response.status_code} - {response.text}")
+            return None
+        response = http.post(f"{object_url(bucket_key, key)}/signeds3upload",
+                             headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+                             json={"uploadKey": upload["uploadKey"]})
+        metrics.observe_response("upload", response)
+        if response.status_code != 200:
+            print(f"Failed to complete the view selection upload: {response.status_code} - {response.text}")
+            return None
+    return broker.download_url(token, bucket_key, key)
+
+
+def workitem_argument(manifest: Dict[str, Any], token: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Workitem argument passing the manifest inline as a data URL, or uploaded when it is large
+
+    Large manifests need a `token` with data:write and bucket scopes; None
+    when the upload fails.
+    """
+    payload = json.dumps(manifest, separators=(",", ":"))
+    url = f"data:application/json,{quote(payload, safe='')}"
+    if len(url) > INLINE_LIMIT:
+        if not token:
+            raise ValueError(f"View selection of {len(payload)} bytes needs a token to be uploaded")
+        url = upload_manifest(token, payload.encode("utf-8"))
+        if not url:
+            return None
+    return {
+        "url": url,
+        "verb": "get",
+        "localName": VIEW_SELECTION_LOCAL_NAME
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - View Selection Manifest")
+    parser.add_argument("current", help="Current view listing (views JSON or DA report)")
+    parser.add_argument("--previous", help="Previous view listing; select only added/changed views")
+    parser.add_argument("--view-id", action="append", default=[], help="Always select this view id")
+    parser.add_argument("--view", action="append", default=[], help="Always select this view name")
+    parser.add_argument("--type", help="Filter by view type")
+    parser.add_argument("--exportable", action="store_true", help="Select only exportable views")
+    parser.add_argument("--document", help="Document name recorded in the manifest")
+    parser.add_argument("--output", help="Write manifest to this path")
+
+    args = parser.parse_args(argv)
+
+    current = load_views(args.current)
+    previous = load_views(args.previous) if args.previous else None
+    views = select_views(
+        current,
+        previous,
+        view_ids=args.view_id,
+        view_names=args.view,
+        view_type=args.type,
+        exportable=True if args.exportable else None
+    )
+
+    manifest = build_manifest(args.document or args.current, views)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(manifest, f, indent=2)
+        print(f"✅ Selected {len(views)} of {len(current)} views")
+        print(f"Manifest saved to: {args.output}")
+    else:
+        print(json.dumps(manifest, indent=2))
+
+    if is_empty(manifest):
+        print("ℹ️ No views selected - the workitem can be skipped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Work Queue
+
+Durable job queue for spreading batch processing over several worker
+processes and hosts. Workers lease jobs for a visibility timeout and extend
+the lease while they work; a job whose worker crashed becomes visible again
+once its lease expires, and is failed for good after `max_attempts` leases.
+
+Two interchangeable backends:
+
+- SQLiteQueue (`sqlite:///path/queue.db` or a *.db path): one database file,
+  for worker processes on one host or a local disk
+- FileQueue (`file:///shared/queue` or a directory): one JSON file per job in
+  queued/, leased/, done/ and failed/ directories, moved with atomic
+  renames, for hosts sharing a network filesystem (where SQLite locking is
+  unreliable); a leased file is named after its owner
+
+Both expose enqueue, lease, extend, complete, fail, release, stats and
+results; open_queue() picks the backend from a URL. batch_queue.py is the
+command-line front end.
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_VISIBILITY_TIMEOUT = 600  # seconds a lease lasts unless extended
+DEFAULT_MAX_ATTEMPTS = 3
+STATUSES = ["queued", "leased", "done", "failed"]
+
+
+def worker_id() -> str:
+    """host:pid:thread, unique per worker thread"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class SQLiteQueue:
+    """Work queue in one SQLite database"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            priority REAL NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            result TEXT,
+            error TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, created);
+    """
+
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(self.SCHEMA)
+
+    def _connect(self):
+        # Imported here: most commands never open a SQLite queue
+        import sqlite3
+        # A connection per call: sqlite3 connections must not cross threads
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    @contextmanager
+    def _db(self):
+        db = self._connect()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _job(row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], priority: float = 0) -> bool:
+        """Add a job; False when a job with this id already exists"""
+        now = time.time()
+        with self._db() as db:
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO jobs (id, payload, priority, created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), priority, now, now))
+            return cursor.rowcount == 1
+
+    def lease(self, owner: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """Take the next visible job (queued, or leased with an expired lease)"""
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # Give up on jobs whose leases keep expiring (e.g. a model that crashes workers)
+            db.execute("UPDATE jobs SET status = 'failed', error = 'lease expired too often', updated = ? "
+                       "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                       (now, now, self.max_attempts))
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, created LIMIT 1", (now,)).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute("UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                       "lease_expires = ?, updated = ? WHERE id = ?",
+                       (owner, now + visibility_timeout, now, row["id"]))
+            job = self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+            db.execute("COMMIT")
+            return job
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def _update_leased(self, job_id: str, owner: str, sql: str, params: tuple) -> bool:
+        """Apply an update only while `owner` still holds the lease"""
+        with self._db() as db:
+            cursor = db.execute(f"UPDATE jobs SET {sql}, updated = ? WHERE id = ? AND status = 'leased' "
+                                f"AND lease_owner = ?", params + (time.time(), job_id, owner))
+            return cursor.rowcount == 1
+
+    def extend(self, job_id: str, owner: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        """Keep a lease alive; False when it was lost to another worker"""
+        return self._update_leased(job_id, owner, "lease_expires = ?", (time.time() + visibility_timeout,))
+
+    def complete(self, job_id: str, owner: str, result: Any = None) -> bool:
+        return self._update_leased(job_id, owner, "status = 'done', lease_owner = NULL, result = ?",
+                                   (json.dumps(result, default=str),))
+
+    def fail(self, job_id: str, owner: str, error: str, retry: bool = True) -> bool:
+        """Record a failure; the job is queued again until it ran max_attempts times"""
+        with self._db() as db:
+            row = db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        status = "queued" if retry and row and row["attempts"] < self.max_attempts else "failed"
+        return self._update_leased(job_id, owner, "status = ?, lease_owner = NULL, error = ?", (status, error))
+
+    def release(self, job_id: str, owner: str) -> bool:
+        """Give a job back without counting the attempt (e.g. on shutdown)"""
+        return self._update_leased(job_id, owner, "status = 'queued', lease_owner = NULL, attempts = attempts - 1",
+                                   ())
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        with self._db() as db:
+            for row in db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["n"]
+            counts["expired"] = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'leased' AND lease_expires < ?",
+                                           (time.time(),)).fetchone()[0]
+        return counts
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Finished jobs (done and failed)"""
+        with self._db() as db:
+            rows = db.execute("SELECT * FROM jobs WHERE status IN ('done', 'failed') ORDER BY updated").fetchall()
+        for row in rows:
+            yield self._job(row)
+
+
+class FileQueue:
+    """Work queue in a directory tree; a job is owned by whoever renamed its file
+
+    A leased job is stored as leased/<id>.<owner>.json. Every change to a
+    job first renames its file to a name private to the calling thread, so
+    a worker whose lease was taken over (or that lost a race with another
+    worker's expiry check) finds its file gone and writes nothing.
+    """
+
+    def __init__(self, directory: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.directory = directory
+        self.max_attempts = max_attempts
+        for status in STATUSES:
+            os.makedirs(os.path.join(directory, status), exist_ok=True)
+
+    def _path(self, status: str, job_id: str) -> str:
+        return os.path.join(self.directory, status, f"{job_id}.json")
+
+    def _lease_path(self, job_id: str, owner: str) -> str:
+        return os.path.join(self.directory, "leased", f"{job_id}.{re.sub(r'[^A-Za-z0-9_-]', '_', owner)}.json")
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # Moved by another worker, or being rewritten
+
+    @staticmethod
+    def _write(path: str, job: Dict[str, Any]):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp_path, path)
+
+    def _take(self, source: str, target: str, update: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        """Move a job file from source to target, rewriting it on the way
+
+        None when another worker moved the file first. While it is rewritten
+        the file has a name no other worker looks at.
+        """
+        private = f"{source}.{os.getpid()}.{threading.get_ident()}.claim"
+        try:
+            os.rename(source, private)
+        except FileNotFoundError:
+            return None
+        job = self._read(private)
+        update(job)
+        self._write(private, job)
+        os.rename(private, target)
+        return job
+
+    def _job_ids(self, status: str) -> List[str]:
+        return [name[:-5] for name in os.listdir(os.path.join(self.directory, status)) if name.endswith(".json")]
+
+    def _leases(self) -> List[str]:
+        """Paths of the leased job files"""
+        directory = os.path.join(self.directory, "leased")
+        return [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], priority: float = 0) -> bool:
+        leased = any(os.path.basename(path).startswith(f"{job_id}.") for path in self._leases())
+        if leased or any(os.path.exists(self._path(status, job_id)) for status in ("queued", "done", "failed")):
+            return False
+        now = time.time()
+        self._write(self._path("queued", job_id), {
+            "id": job_id, "payload": payload, "priority": priority, "status": "queued", "attempts": 0,
+            "lease_owner": None, "lease_expires": None, "result": None, "error": None,
+            "created": now, "updated": now
+        })
+        return True
+
+    def _requeue_expired(self):
+        now = time.time()
+        for path in self._leases():
+            job = self._read(path)
+            if not job or (job.get("lease_expires") or now) >= now:
+                continue
+            target = "queued" if job["attempts"] < self.max_attempts else "failed"
+
+            def update(job, target=target):
+                job.update(status=target, lease_owner=None, lease_expires=None, updated=now)
+                if target == "failed":
+                    job["error"] = "lease expired too often"
+
+            # Claim the expired job by moving it; only one worker succeeds
+            self._take(path, self._path(target, job["id"]), update)
+
+    def lease(self, owner: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> Optional[Dict[str, Any]]:
+        self._requeue_expired()
+        candidates = []
+        for job_id in self._job_ids("queued"):
+            job = self._read(self._path("queued", job_id))
+            if job:
+                candidates.append((job["priority"], job["created"], job_id))
+        for _, _, job_id in sorted(candidates):
+            now = time.time()
+            job = self._take(self._path("queued", job_id), self._lease_path(job_id, owner),
+                             lambda job: job.update(status="leased", attempts=job["attempts"] + 1, lease_owner=owner,
+                                                    lease_expires=now + visibility_timeout, updated=now))
+            if job:
+                return job
+        return None
+
+    def _owned(self, job_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        job = self._read(self._lease_path(job_id, owner))
+        return job if job and job.get("lease_owner") == owner else None
+
+    def extend(self, job_id: str, owner: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        path = self._lease_path(job_id, owner)
+        now = time.time()
+        job = self._take(path, path, lambda job: job.update(lease_expires=now + visibility_timeout, updated=now))
+        return job is not None
+
+    def _finish(self, job_id: str, owner: str, target: str, **fields) -> bool:
+        update = dict(fields, status=target, lease_owner=None, lease_expires=None, updated=time.time())
+        job = self._take(self._lease_path(job_id, owner), self._path(target, job_id), lambda job: job.update(update))
+        return job is not None
+
+    def complete(self, job_id: str, owner: str, result: Any = None) -> bool:
+        return self._finish(job_id, owner, "done", result=result)
+
+    def fail(self, job_id: str, owner: str, error: str, retry: bool = True) -> bool:
+        job = self._owned(job_id, owner)
+        if not job:
+            return False
+        target = "queued" if retry and job["attempts"] < self.max_attempts else "failed"
+        return self._finish(job_id, owner, target, error=error)
+
+    def release(self, job_id: str, owner: str) -> bool:
+        job = self._owned(job_id, owner)
+        if not job:
+            return False
+        return self._finish(job_id, owner, "queued", attempts=job["attempts"] - 1)
+
+    def stats(self) -> Dict[str, int]:
+        counts = {status: len(self._job_ids(status)) for status in STATUSES}
+        now = time.time()
+        counts["expired"] = sum(
+            1 for path in self._leases() if ((self._read(path) or {}).get("lease_expires") or now) < now)
+        return counts
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        jobs = []
+        for status in ("done", "failed"):
+            for job_id in self._job_ids(status):
+                job = self._read(self._path(status, job_id))
+                if job:
+                    jobs.append(job)
+        yield from sorted(jobs, key=lambda job: job["updated"])
+
+
+def open_queue(url: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """SQLiteQueue for sqlite:// URLs and *.db/*.sqlite paths, FileQueue for file:// URLs and directories"""
+    if url.startswith("sqlite://"):
+        return SQLiteQueue(url[len("sqlite://"):], max_attempts)
+    if url.startswith("file://"):
+        return FileQueue(url[len("file://"):], max_attempts)
+    if "://" in url:
+        raise ValueError(f"Unsupported queue URL: {url} (use sqlite:// or file://)")
+    if url.endswith((".db", ".sqlite", ".sqlite3")):
+        return SQLiteQueue(url, max_attempts)
+    return FileQueue(url, max_attempts)
+
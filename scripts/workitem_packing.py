@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+RevitViewExtractor - Multi-file Workitem Packing
+
+Groups small Revit files (families, templates, small models) into packs so
+that one Design Automation workitem processes many files and the DA queue
+and engine start-up cost is paid once per pack instead of once per file.
+
+A pack is a zip passed as the `inputPack` argument:
+    manifest.json             {"files": [{"key", "name", "path", "size"}]}
+    files/<key>/<name>.rvt
+
+The activity unzips it, opens each file in manifest order and writes the
+results of each file under its own key in the `resultPack` output zip:
+    <key>/result.txt, <key>/<View>.png, ...
+
+`split_pack_results` routes those entries back to per-file output folders.
+
+Usage:
+    python workitem_packing.py <directory_path> [options]
+
+Options:
+    --threshold MB    Files up to this size are packed (default: 20)
+    --pack-size MB    Maximum total size of one pack (default: 200)
+    --max-files N     Maximum number of files in one pack (default: 50)
+    --output-dir DIR  Write pack zips to DIR instead of only printing the plan
+"""
+
+import os
+import json
+import shutil
+import zipfile
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Activity parameters for pack workitems
+PACK_INPUT_PARAM = "inputPack"
+PACK_OUTPUT_PARAM = "resultPack"
+PACK_MANIFEST = "manifest.json"
+
+MB = 1024 * 1024
+
+
+def activity_parameters() -> Dict[str, Dict[str, Any]]:
+    """Parameter definitions for an activity that processes packs"""
+    return {
+        PACK_INPUT_PARAM: {
+            "verb": "get",
+            "description": "Zip of Revit files with manifest.json",
+            "localName": "pack",
+            "zip": True,
+            "required": True
+        },
+        PACK_OUTPUT_PARAM: {
+            "verb": "put",
+            "description": "Zip of per-file results keyed by manifest key",
+            "localName": "results",
+            "zip": True,
+            "required": True
+        }
+    }
+
+
+def plan_packs(file_paths: List[str], threshold: int = 20 * MB, pack_size: int = 200 * MB,
+               max_files: int = 50, group: Optional[Callable[[str], Any]] = None) -> Tuple[List[List[str]], List[str]]:
+    """Split files into packs of small files and a list of files processed alone
+
+    Small files are packed first-fit decreasing by size, which keeps the
+    number of packs close to minimal while staying under pack_size. Files
+    with different `group` keys (e.g. the engine year) never share a pack.
+    """
+    sized = [(os.path.getsize(path), path) for path in file_paths]
+    singles = [path for size, path in sized if size > threshold]
+    small = sorted(((size, path) for size, path in sized if size <= threshold), reverse=True)
+
+    packs = []  # [group key, total_size, [paths]]
+    for size, path in small:
+        key = group(path) if group else None
+        for pack in packs:
+            if pack[0] == key and pack[1] + size <= pack_size and len(pack[2]) < max_files:
+                pack[1] += size
+                pack[2].append(path)
+                break
+        else:
+            packs.append([key, size, [path]])
+
+    # A pack of one file gains nothing over a plain workitem
+    result = []
+    for _, _, paths in packs:
+        if len(paths) == 1:
+            singles.append(paths[0])
+        else:
+            result.append(paths)
+    return result, singles
+
+
+def build_pack(file_paths: List[str], zip_path: str) -> Dict[str, Any]:
+    """Write a pack zip and return its manifest
+
+    RVT files are already compressed, so entries are stored, not deflated.
+    """
+    manifest = {"files": []}
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zipf:
+        for index, file_path in enumerate(file_paths):
+            key = f"f{index:04d}"
+            name = os.path.basename(file_path)
+            arcname = f"files/{key}/{name}"
+            zipf.write(file_path, arcname)
+            manifest["files"].append({
+                "key": key,
+                "name": name,
+                "path": arcname,
+                "source": file_path,
+                "size": os.path.getsize(file_path)
+            })
+        zipf.writestr(PACK_MANIFEST, json.dumps(manifest, indent=2))
+    return manifest
+
+
+def split_pack_results(result_zip_path: str, manifest: Dict[str, Any], output_dir: str) -> Dict[str, List[str]]:
+    """Extract a resultPack zip into one output folder per source file
+
+    Returns a mapping of source file path -> extracted result paths. Files
+    without any result entry map to an empty list.
+    """
+    by_key = {entry["key"]: entry for entry in manifest["files"]}
+    results = {entry["source"]: [] for entry in manifest["files"]}
+
+    with zipfile.ZipFile(result_zip_path) as zipf:
+        for info in zipf.infolist():
+            if info.is_dir():
+                continue
+            key, _, relative = info.filename.partition("/")
+            entry = by_key.get(key)
+            if not entry or not relative:
+                continue
+
+            stem = os.path.splitext(entry["name"])[0]
+            target = os.path.normpath(os.path.join(output_dir, stem, relative))
+            if not target.startswith(os.path.normpath(os.path.join(output_dir, stem)) + os.sep):
+                continue  # Ignore entries escaping the output folder
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zipf.open(info) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            results[entry["source"]].append(target)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RevitViewExtractor - Workitem Packing")
+    parser.add_argument("directory", help="Directory containing Revit files")
+    parser.add_argument("--threshold", type=float, default=20, help="Pack files up to this size in MB")
+    parser.add_argument("--pack-size", type=float, default=200, help="Maximum pack size in MB")
+    parser.add_argument("--max-files", type=int, default=50, help="Maximum files per pack")
+    parser.add_argument("--output-dir", help="Write pack zips to this directory")
+
+    args = parser.parse_args(argv)
+
+    rvt_files = [
+        os.path.join(args.directory, f)
+        for f in os.listdir(args.directory)
+        if f.lower().endswith('.rvt')
+    ]
+
+    packs, singles = plan_packs(rvt_files, int(args.threshold * MB), int(args.pack_size * MB), args.max_files)
+
+    for i, pack in enumerate(packs):
+        total = sum(os.path.getsize(p) for p in pack)
+        print(f"📦 Pack {i + 1}: {len(pack)} files, {total / MB:.1f} MB")
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            zip_path = os.path.join(args.output_dir, f"pack_{i + 1:04d}.zip")
+            build_pack(pack, zip_path)
+            print(f"   Saved to: {zip_path}")
+
+    print(f"\n📊 {len(rvt_files)} files → {len(packs)} packs + {len(singles)} single workitems")
+
+
+if __name__ == "__main__":
+    main()